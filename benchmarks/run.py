@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite: drives the scrapers and processors end to end
+against the local stand-in server (benchmarks/server.py) and reports
+throughput as JSON, so runs can be compared across commits.
+
+    python -m benchmarks.run                              # all scenarios, 500 items each
+    python -m benchmarks.run -s maxspeed_islamqa_en -n 2000 --latency-ms 40 --error-rate 0.02
+    python -m benchmarks.run --compare benchmarks/results/<earlier>.json
+
+Every scenario runs in its own Python process (the server in yet another one),
+so CPU time and peak RSS belong to the code under test alone. A scenario
+whose dependencies are not installed is reported as skipped, not failed.
+
+Per scenario: items, wall seconds, items/sec, CPU seconds (all threads, plus
+worker processes the scenario started and joined), CPU ms per item and peak
+RSS in MB (of the scenario process itself).
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+ScenarioResult = Tuple[int, Dict]
+
+
+class ScenarioContext:
+    """What a scenario gets: server root URL, item count and a scratch directory."""
+
+    def __init__(self, server: str, items: int, workdir: str, concurrency: Optional[int] = None):
+        self.server = server
+        self.items = items
+        self.workdir = workdir
+        self.concurrency = concurrency
+        self.reset_clock()
+
+    def reset_clock(self):
+        """Start measuring from here; scenarios call it after building their input."""
+        self.wall_start = time.perf_counter()
+        self.cpu_start = cpu_seconds()
+
+    @property
+    def db_path(self) -> str:
+        return os.path.join(self.workdir, 'bench.db')
+
+
+def cpu_seconds() -> float:
+    """This process's CPU time plus that of its exited (joined) child processes."""
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+
+# =============================================================================
+# FIXTURE HELPERS
+# =============================================================================
+
+class _TextCollector(HTMLParser):
+    """Text of every <h1> and <p>, in order; enough to build processor input without bs4."""
+
+    def __init__(self):
+        super().__init__()
+        self.h1: List[str] = []
+        self.paragraphs: List[str] = []
+        self._current: Optional[List[str]] = None
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+        elif tag in ('h1', 'p'):
+            self._current = []
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self._skip -= 1
+        elif tag in ('h1', 'p') and self._current is not None:
+            text = ' '.join(''.join(self._current).split())
+            (self.h1 if tag == 'h1' else self.paragraphs).append(text)
+            self._current = None
+
+    def handle_data(self, data):
+        if self._current is not None and not self._skip:
+            self._current.append(data)
+
+
+def render_fixture(name: str, page_id: int) -> str:
+    return (FIXTURES_DIR / f'{name}.html').read_text(encoding='utf-8').replace('{{id}}', str(page_id))
+
+
+def fixture_text(name: str, page_id: int) -> Tuple[str, List[str]]:
+    """(title, paragraphs) of a rendered fixture."""
+    collector = _TextCollector()
+    collector.feed(render_fixture(name, page_id))
+    return (collector.h1[0] if collector.h1 else ''), collector.paragraphs
+
+
+def count_rows(db_path: str, table: str) -> int:
+    if not os.path.exists(db_path):
+        return 0
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    finally:
+        conn.close()
+
+
+# =============================================================================
+# SCENARIOS
+# =============================================================================
+
+def _import_from(directory: Path, module: str):
+    sys.path.insert(0, str(directory))
+    return importlib.import_module(module)
+
+
+def maxspeed_islamqa_en(ctx: ScenarioContext) -> ScenarioResult:
+    import bs4  # noqa: F401  parse() imports it lazily and turns a failure into "no content"
+    scraper_module = _import_from(REPO_ROOT / 'pipelines' / 'islamqa', 'scraper')
+    scraper = scraper_module.MaxSpeedScraper(1, ctx.items, db_path=ctx.db_path,
+                                             base_url=f'{ctx.server}/islamqa_en')
+    if ctx.concurrency:
+        scraper.concurrency = ctx.concurrency
+    asyncio.run(scraper.run())
+    return count_rows(ctx.db_path, 'qa_pairs'), {'concurrency': scraper.concurrency}
+
+
+def arabic_islamqa_ar(ctx: ScenarioContext) -> ScenarioResult:
+    import bs4  # noqa: F401  see maxspeed_islamqa_en
+    scraper_module = _import_from(REPO_ROOT / 'pipelines' / 'islamqa_ar', 'scraper')
+    scraper = scraper_module.ArabicScraper(1, ctx.items, ctx.db_path,
+                                           base_url=f'{ctx.server}/islamqa_ar')
+    if ctx.concurrency:
+        scraper.concurrency = ctx.concurrency
+    asyncio.run(scraper.run())
+    return count_rows(ctx.db_path, 'qa_pairs'), {'concurrency': scraper.concurrency}
+
+
+def _coreengine(ctx: ScenarioContext, site: str, fixture: str, url_path: str) -> ScenarioResult:
+    """One CoreEngine crawl of `site` over ctx.items fixture pages, as `main.py scrape` runs it."""
+    core = _import_from(REPO_ROOT / 'legacy', 'scrapers.core')
+    engine = core.CoreEngine(db_path=ctx.db_path, default_delay=0.0)
+    urls = [f'{ctx.server}/{fixture}/{url_path}/{i}' for i in range(1, ctx.items + 1)]
+
+    if site == 'islamqa':
+        from scrapers.adapters.islamqa import IslamQAAdapter
+        adapter = IslamQAAdapter(start_id=1, end_id=ctx.items)
+        adapter.base_url = f'{ctx.server}/{fixture}'
+    elif site == 'sunnah':
+        from scrapers.adapters.sunnah import SunnahAdapter
+        adapter = SunnahAdapter(start_urls=urls)
+    elif site == 'darussalam':
+        from scrapers.adapters.darussalam import DarussalamAdapter
+        adapter = DarussalamAdapter(start_urls=urls)
+    elif site == 'salafipublications':
+        from scrapers.adapters.salafipublications import SalafiPublicationsAdapter
+        adapter = SalafiPublicationsAdapter(start_urls=urls)
+    else:
+        from scrapers.adapters.abdurrahman import AbdurrahmanAdapter
+        adapter = AbdurrahmanAdapter(start_urls=urls)
+
+    concurrency = ctx.concurrency or 16
+    engine.scrape_site(adapter, concurrent_requests=concurrency, disable_rate_limit=True,
+                       download_delay=0.0, log_level='ERROR', simple_output=True)
+    return engine.get_stats()['by_source'].get(adapter.source_name, 0), {'concurrency': concurrency}
+
+
+def coreengine_islamqa(ctx: ScenarioContext) -> ScenarioResult:
+    return _coreengine(ctx, 'islamqa', 'islamqa_en', 'en/answers')
+
+
+def coreengine_sunnah(ctx: ScenarioContext) -> ScenarioResult:
+    # Each fixture page holds 5 hadith, so items is 5x the page count
+    return _coreengine(ctx, 'sunnah', 'sunnah', 'bench')
+
+
+def coreengine_darussalam(ctx: ScenarioContext) -> ScenarioResult:
+    return _coreengine(ctx, 'darussalam', 'darussalam', 'books')
+
+
+def coreengine_salafipublications(ctx: ScenarioContext) -> ScenarioResult:
+    return _coreengine(ctx, 'salafipublications', 'salafipublications', 'articles')
+
+
+def coreengine_abdurrahman(ctx: ScenarioContext) -> ScenarioResult:
+    return _coreengine(ctx, 'abdurrahman', 'abdurrahman', 'articles')
+
+
+def process_islamqa(ctx: ScenarioContext) -> ScenarioResult:
+    """DataSeparator over a qa_pairs DB built from the islamqa_en fixture."""
+    conn = sqlite3.connect(ctx.db_path)
+    conn.execute('''
+        CREATE TABLE qa_pairs (
+            id TEXT PRIMARY KEY, url TEXT UNIQUE, question TEXT, answer TEXT,
+            language TEXT, quality_score REAL, scraped_at TEXT
+        )
+    ''')
+    rows = []
+    for i in range(1, ctx.items + 1):
+        title, paragraphs = fixture_text('islamqa_en', i)
+        rows.append((f'qa_{i}', f'https://islamqa.info/en/answers/{i}', title, '\n'.join(paragraphs),
+                     'english', 1.0, datetime.now().isoformat()))
+    conn.executemany('INSERT INTO qa_pairs VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+    processor = _import_from(REPO_ROOT / 'pipelines' / 'islamqa', 'processor')
+    separator = processor.DataSeparator(output_dir=os.path.join(ctx.workdir, 'output'))
+    ctx.reset_clock()
+    separator.run([ctx.db_path])
+    return separator.stats['islamqa_records'], {}
+
+
+def process_answeringhinduism(ctx: ScenarioContext) -> ScenarioResult:
+    """ContentProcessor.process_all over an articles DB built from the answeringhinduism fixture."""
+    conn = sqlite3.connect(ctx.db_path)
+    # Same tables as pipelines/answeringhinduism/scraper.py creates
+    conn.execute('''
+        CREATE TABLE articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE, title TEXT,
+            raw_content TEXT, category TEXT, scraped_at TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE criticisms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, article_id INTEGER, topic TEXT, claim TEXT,
+            source_excerpt TEXT, hindu_reference TEXT, reasoning_type TEXT,
+            dependency_on_christianity INTEGER DEFAULT 0, retain INTEGER DEFAULT 1,
+            FOREIGN KEY(article_id) REFERENCES articles(id)
+        )
+    ''')
+    rows = []
+    for i in range(1, ctx.items + 1):
+        title, paragraphs = fixture_text('answeringhinduism', i)
+        rows.append((f'https://answeringhinduism.org/bench/{i}/', title, '\n\n'.join(paragraphs),
+                     'general', datetime.now().isoformat()))
+    conn.executemany('INSERT INTO articles (url, title, raw_content, category, scraped_at) VALUES (?, ?, ?, ?, ?)',
+                     rows)
+    conn.commit()
+    conn.close()
+
+    processor = _import_from(REPO_ROOT / 'pipelines' / 'answeringhinduism', 'processor')
+    workers = ctx.concurrency or os.cpu_count() or 1
+    ctx.reset_clock()
+    totals = processor.ContentProcessor(ctx.db_path).process_all(workers=workers)
+    return len(rows), {'units': totals['units'], 'workers': workers}
+
+
+SCENARIOS: Dict[str, Callable[[ScenarioContext], ScenarioResult]] = {
+    'maxspeed_islamqa_en': maxspeed_islamqa_en,
+    'arabic_islamqa_ar': arabic_islamqa_ar,
+    'coreengine_islamqa': coreengine_islamqa,
+    'coreengine_sunnah': coreengine_sunnah,
+    'coreengine_darussalam': coreengine_darussalam,
+    'coreengine_salafipublications': coreengine_salafipublications,
+    'coreengine_abdurrahman': coreengine_abdurrahman,
+    'process_islamqa': process_islamqa,
+    'process_answeringhinduism': process_answeringhinduism,
+}
+
+# Scenarios that need the stand-in server
+NETWORK_SCENARIOS = {name for name in SCENARIOS if not name.startswith('process_')}
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def run_child(name: str, ctx: ScenarioContext) -> Dict:
+    """Run one scenario in this process and measure it."""
+    ctx.reset_clock()
+    try:
+        items, extra = SCENARIOS[name](ctx)
+    except ImportError as e:
+        return {'status': 'skipped', 'reason': f'{type(e).__name__}: {e}'}
+    wall = time.perf_counter() - ctx.wall_start
+    cpu = cpu_seconds() - ctx.cpu_start
+    return {
+        'status': 'ok',
+        'items': items,
+        'wall_seconds': round(wall, 3),
+        'items_per_second': round(items / wall, 2) if wall else None,
+        'cpu_seconds': round(cpu, 3),
+        'cpu_ms_per_item': round(cpu * 1000 / items, 3) if items else None,
+        'peak_rss_mb': peak_rss_mb(),
+        **extra,
+    }
+
+
+def run_scenario(name: str, server: Optional[str], items: int, concurrency: Optional[int]) -> Dict:
+    """Run one scenario in a fresh interpreter; its own output goes to a log file."""
+    workdir = tempfile.mkdtemp(prefix=f'bench_{name}_')
+    result_path = os.path.join(workdir, 'result.json')
+    log_path = os.path.join(workdir, 'output.log')
+    command = [sys.executable, '-m', 'benchmarks.run', '--child', name,
+               '--items', str(items), '--workdir', workdir, '--result', result_path]
+    if server:
+        command += ['--server', server]
+    if concurrency:
+        command += ['--concurrency', str(concurrency)]
+
+    with open(log_path, 'w', encoding='utf-8') as log:
+        proc = subprocess.run(command, cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT)
+    if proc.returncode != 0 or not os.path.exists(result_path):
+        return {'status': 'failed', 'returncode': proc.returncode, 'log': log_path}
+    with open(result_path, encoding='utf-8') as f:
+        result = json.load(f)
+    result['log'] = log_path
+    return result
+
+
+def start_server(args) -> Tuple[subprocess.Popen, str]:
+    command = [sys.executable, '-m', 'benchmarks.server', '--port', str(args.port),
+               '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+               '--error-rate', str(args.error_rate), '--not-found-rate', str(args.not_found_rate),
+               '--seed', str(args.seed)]
+    proc = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith('READY '):
+        proc.kill()
+        raise RuntimeError('Benchmark server did not start (is aiohttp installed?)')
+    return proc, line.split()[1]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f'{out}-dirty' if dirty else out
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(baseline_path: str, report: Dict):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline.get('git_revision')} ({baseline_path})")
+    print(f"{'scenario':<32} {'items/s':>18} {'cpu ms/item':>20} {'peak MB':>16}")
+
+    def delta(old, new):
+        if not old or new is None:
+            return f"{new if new is not None else '-':>9}"
+        return f"{new:>9} {(new - old) / old * 100:+6.1f}%"
+
+    for name, result in report['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if result.get('status') != 'ok' or not old or old.get('status') != 'ok':
+            continue
+        print(f"{name:<32} {delta(old['items_per_second'], result['items_per_second']):>18} "
+              f"{delta(old['cpu_ms_per_item'], result['cpu_ms_per_item']):>20} "
+              f"{delta(old['peak_rss_mb'], result['peak_rss_mb']):>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline scraper/processor benchmarks')
+    parser.add_argument('-s', '--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scenario to run (repeatable; default: all)')
+    parser.add_argument('-n', '--items', type=int, default=500, help='Pages (or records) per scenario')
+    parser.add_argument('--concurrency', type=int, help='Override the scraper concurrency (worker processes for process_answeringhinduism)')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Server response delay')
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answering 503 (re-rolled per retry)')
+    parser.add_argument('--not-found-rate', type=float, default=0.0, help='Share of pages answering 404')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--out', type=str, help='Result file (default: benchmarks/results/<time>-<rev>.json)')
+    parser.add_argument('--compare', type=str, metavar='BASELINE.json', help='Print deltas against an earlier result')
+    # Internal: run a single scenario in this process
+    parser.add_argument('--child', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--server', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--result', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        os.chdir(args.workdir)
+        ctx = ScenarioContext(args.server, args.items, args.workdir, args.concurrency)
+        result = run_child(args.child, ctx)
+        with open(args.result, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return
+
+    names = args.scenario or list(SCENARIOS)
+    server_proc, server = None, None
+    if NETWORK_SCENARIOS.intersection(names):
+        try:
+            server_proc, server = start_server(args)
+        except (OSError, RuntimeError) as e:
+            print(f"⚠️  {e}; running offline-only scenarios")
+            names = [name for name in names if name not in NETWORK_SCENARIOS]
+
+    report = {
+        'git_revision': git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {key: getattr(args, key) for key in
+                   ('items', 'concurrency', 'latency_ms', 'jitter_ms', 'error_rate', 'not_found_rate', 'seed')},
+        'results': {},
+    }
+
+    print(f"{'scenario':<32} {'status':<8} {'items':>7} {'items/s':>9} {'cpu ms/item':>12} {'peak MB':>8}")
+    try:
+        for name in names:
+            result = run_scenario(name, server, args.items, args.concurrency)
+            report['results'][name] = result
+            if result['status'] == 'ok':
+                print(f"{name:<32} {'ok':<8} {result['items']:>7} {result['items_per_second']:>9} "
+                      f"{result['cpu_ms_per_item'] or '-':>12} {result['peak_rss_mb'] or '-':>8}")
+            else:
+                print(f"{name:<32} {result['status']:<8} {result.get('reason') or result.get('log')}")
+    finally:
+        if server_proc is not None:
+            server_proc.terminate()
+            server_proc.wait()
+
+    out_path = Path(args.out) if args.out else RESULTS_DIR / (
+        f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_revision'] or 'norev'}.json")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results: {out_path}")
+
+    if args.compare:
+        print_comparison(args.compare, report)
+
+
+if __name__ == '__main__':
+    main()
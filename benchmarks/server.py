@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the scraped sites, serving the HTML fixtures in
+benchmarks/fixtures/.
+
+    http://127.0.0.1:<port>/<fixture>/<any path>
+
+renders fixtures/<fixture>.html with {{id}} replaced by the last number in the
+path (or a stable hash of it), so every URL gets distinct content and the
+dedup paths see unique pages. Point a scraper's base_url at
+http://127.0.0.1:<port>/islamqa_en and it fetches /islamqa_en/en/answers/<id>.
+
+Latency, jitter and injected errors are drawn from a generator seeded with the
+URL and --seed, so a URL behaves the same on every run. A 404 is permanent,
+while a 503 is re-rolled on each repeat request for the URL (as transient
+errors are), so retries can get through. /robots.txt is a 404 (allow all).
+
+    python -m benchmarks.server --port 8765 --latency-ms 40 --jitter-ms 20 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import sys
+import zlib
+from pathlib import Path
+
+from aiohttp import web
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+
+def load_fixtures(directory: Path = FIXTURES_DIR) -> dict:
+    """Fixture name -> HTML template."""
+    return {path.stem: path.read_text(encoding='utf-8') for path in sorted(directory.glob('*.html'))}
+
+
+def page_id(path: str) -> str:
+    numbers = re.findall(r'\d+', path)
+    return numbers[-1] if numbers else str(zlib.crc32(path.encode('utf-8')) % 1000000)
+
+
+def build_app(latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+              not_found_rate: float = 0.0, seed: int = 0) -> web.Application:
+    fixtures = load_fixtures()
+    stats = {'requests': 0, 'served': 0, 'errors': 0, 'not_found': 0}
+    hits = {}
+
+    async def robots(request):
+        return web.Response(status=404, text='Not Found')
+
+    async def server_stats(request):
+        return web.json_response(stats)
+
+    async def page(request):
+        stats['requests'] += 1
+        path = request.path
+        rng = random.Random(zlib.crc32(path.encode('utf-8')) ^ seed)
+        delay = latency_ms + rng.uniform(-jitter_ms, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        template = fixtures.get(request.match_info['fixture'])
+        if template is None or rng.random() < not_found_rate:
+            stats['not_found'] += 1
+            return web.Response(status=404, text='Not Found')
+        hit = hits[path] = hits.get(path, 0) + 1
+        if random.Random(zlib.crc32(f"{path}#{hit}".encode('utf-8')) ^ seed).random() < error_rate:
+            stats['errors'] += 1
+            return web.Response(status=503, text='Service Unavailable', headers={'Retry-After': '1'})
+
+        stats['served'] += 1
+        return web.Response(text=template.replace('{{id}}', page_id(path)), content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/robots.txt', robots)
+    app.router.add_get('/__stats', server_stats)
+    app.router.add_get('/{fixture}/{tail:.*}', page)
+    return app
+
+
+async def serve(host: str, port: int, **options):
+    runner = web.AppRunner(build_app(**options), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    # benchmarks.run waits for this line to learn the port
+    print(f"READY http://{host}:{bound_port}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve benchmark fixtures locally')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='0 picks a free port')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Mean response delay')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform +/- jitter on the delay')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of URLs answering 503')
+    parser.add_argument('--not-found-rate', type=float, default=0.0, help='Share of URLs answering 404')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          error_rate=args.error_rate, not_found_rate=args.not_found_rate, seed=args.seed))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
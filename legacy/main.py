@@ -12,6 +12,8 @@ from pathlib import Path
 from typing import Optional
 
 from scrapers.core import CoreEngine
+from profiling.stages import add_profile_arguments, enable_from_args
+from progress.frontier import Frontier, frontier_path, retry_failed_command
 from scrapers.storage import UnifiedStorage
 from scrapers.adapters.islamqa import IslamQAAdapter
 from export.formats import TrainingDataExporter
@@ -49,73 +51,51 @@ def load_sites_config(config_path: str = "config/sites.yaml") -> dict:
         return {}
 
 
-def cmd_scrape(args):
-    """Scrape a specific site."""
-    logger.info(f"Starting scrape for site: {args.site}")
-    
-    # Load configs
-    config = load_config()
-    sites_config = load_sites_config()
-    
-    # Get site config
-    site_config = sites_config.get('sites', {}).get(args.site, {})
-    if not site_config or not site_config.get('enabled', True):
-        logger.error(f"Site {args.site} is not enabled or not found")
-        return
-    
-    # Initialize core engine
-    db_path = config.get('database', {}).get('path', 'islamic_data.db')
-    default_delay = config.get('defaults', {}).get('download_delay', 1.0)
-    user_agent = config.get('user_agent', 'IslamicDataScraper/1.0')
-    
-    engine = CoreEngine(
-        db_path=db_path,
-        default_delay=default_delay,
-        user_agent=user_agent
-    )
-    
-    # Initialize storage for adapter
-    storage = UnifiedStorage(db_path)
-    
-    # Create adapter based on site
-    site = args.site.lower()
+SUPPORTED_SITES = ('islamqa', 'sunnah', 'islamweb', 'shamela', 'sunnahonline', 'ahadith',
+                   'sahih_bukhari', 'darussalam', 'salafipublications', 'abdurrahman')
+
+
+def build_adapter(site: str, site_config: dict, args, storage: UnifiedStorage):
+    """Create the adapter for a site, or None if there is none."""
+    site = site.lower()
     if site == 'islamqa':
         start_id = args.start_id if args.start_id else site_config.get('start_id', 1)
         end_id = args.end_id if args.end_id else site_config.get('end_id', 10000)
-        adapter = IslamQAAdapter(start_id=start_id, end_id=end_id, storage=storage)
+        return IslamQAAdapter(start_id=start_id, end_id=end_id, storage=storage)
     elif site == 'sunnah':
         from scrapers.adapters.sunnah import SunnahAdapter
-        adapter = SunnahAdapter(start_urls=site_config.get('start_urls'))
+        return SunnahAdapter(start_urls=site_config.get('start_urls'))
     elif site == 'islamweb':
         from scrapers.adapters.islamweb import IslamWebAdapter
-        adapter = IslamWebAdapter(start_urls=site_config.get('start_urls'))
+        return IslamWebAdapter(start_urls=site_config.get('start_urls'))
     elif site == 'shamela':
         from scrapers.adapters.shamela import ShamelaAdapter
-        adapter = ShamelaAdapter(start_urls=site_config.get('start_urls'))
+        return ShamelaAdapter(start_urls=site_config.get('start_urls'))
     elif site == 'sunnahonline':
         from scrapers.adapters.sunnahonline import SunnahOnlineAdapter
-        adapter = SunnahOnlineAdapter(start_urls=site_config.get('start_urls'))
+        return SunnahOnlineAdapter(start_urls=site_config.get('start_urls'))
     elif site == 'ahadith':
         from scrapers.adapters.ahadith import AhadithAdapter
-        adapter = AhadithAdapter(start_urls=site_config.get('start_urls'))
+        return AhadithAdapter(start_urls=site_config.get('start_urls'))
     elif site in ('sahih_bukhari', 'sahih-bukhari'):
         from scrapers.adapters.sahih_bukhari import SahihBukhariAdapter
-        adapter = SahihBukhariAdapter(start_urls=site_config.get('start_urls'))
+        return SahihBukhariAdapter(start_urls=site_config.get('start_urls'))
     elif site == 'darussalam':
         from scrapers.adapters.darussalam import DarussalamAdapter
-        adapter = DarussalamAdapter(start_urls=site_config.get('start_urls'))
+        return DarussalamAdapter(start_urls=site_config.get('start_urls'))
     elif site == 'salafipublications':
         from scrapers.adapters.salafipublications import SalafiPublicationsAdapter
-        adapter = SalafiPublicationsAdapter(start_urls=site_config.get('start_urls'))
+        return SalafiPublicationsAdapter(start_urls=site_config.get('start_urls'))
     elif site == 'abdurrahman':
         from scrapers.adapters.abdurrahman import AbdurrahmanAdapter
-        adapter = AbdurrahmanAdapter(start_urls=site_config.get('start_urls'))
-    else:
-        logger.error(f"Adapter for {args.site} not yet implemented")
-        logger.info("Available sites: islamqa, sunnah, islamweb, shamela, sunnahonline, ahadith, sahih_bukhari, darussalam, salafipublications, abdurrahman")
-        return
+        return AbdurrahmanAdapter(start_urls=site_config.get('start_urls'))
+    return None
+
+
+def scrape_options(site_config: dict, config: dict, args) -> dict:
+    """Crawl options for one site: site config, then CLI overrides."""
+    default_delay = config.get('defaults', {}).get('download_delay', 1.0)
     
-    # Scrape
     # Compute effective settings (allow CLI overrides)
     if getattr(args, 'download_delay', None) is not None:
         download_delay = args.download_delay
@@ -143,16 +123,84 @@ def cmd_scrape(args):
     # Auto-enable simple output for better UX
     simple_output = getattr(args, 'simple_output', True)  # Default to True
     
-    engine.scrape_site(
-        adapter=adapter,
-        concurrent_requests=concurrent_requests,
-        download_delay=download_delay,
-        log_level=log_level,
-        disable_rate_limit=disable_rate_limit,
-        simple_output=simple_output,
-        fast_mode=getattr(args, 'fast', False)
+    return {
+        'concurrent_requests': concurrent_requests,
+        'download_delay': download_delay,
+        'log_level': log_level,
+        'disable_rate_limit': disable_rate_limit,
+        'simple_output': simple_output,
+        'fast_mode': getattr(args, 'fast', False),
+    }
+
+
+def cmd_scrape(args):
+    """Scrape one site, or several at once (--sites / --all-enabled)."""
+    # Load configs
+    config = load_config()
+    sites_config = load_sites_config()
+    all_sites = sites_config.get('sites', {})
+    
+    if args.all_enabled:
+        site_names = [name for name, site_config in all_sites.items() if site_config.get('enabled', True)]
+    elif args.sites:
+        site_names = [name.strip() for name in args.sites.split(',') if name.strip()]
+    else:
+        site_names = [args.site]
+    logger.info(f"Starting scrape for site(s): {', '.join(site_names)}")
+    
+    # Initialize core engine
+    db_path = config.get('database', {}).get('path', 'islamic_data.db')
+    default_delay = config.get('defaults', {}).get('download_delay', 1.0)
+    user_agent = config.get('user_agent', 'IslamicDataScraper/1.0')
+    
+    engine = CoreEngine(
+        db_path=db_path,
+        default_delay=default_delay,
+        user_agent=user_agent
+    )
+    
+    # Metrics export (CLI overrides config)
+    metrics_config = config.get('metrics', {}) or {}
+    engine.enable_metrics(
+        textfile=args.metrics_file or metrics_config.get('textfile'),
+        port=args.metrics_port or metrics_config.get('port'),
+        interval=metrics_config.get('interval', 10)
     )
     
+    # Per-domain delays of every configured site (adapters may follow links across sites)
+    for other_site in all_sites.values():
+        if other_site.get('base_url') and other_site.get('download_delay') is not None:
+            engine.rate_limiter.set_delay(other_site['base_url'], other_site['download_delay'])
+    
+    # Initialize storage for adapter
+    storage = UnifiedStorage(db_path)
+    
+    jobs = []
+    for site in site_names:
+        # Get site config
+        site_config = all_sites.get(site, {})
+        if not site_config or not site_config.get('enabled', True):
+            logger.error(f"Site {site} is not enabled or not found")
+            continue
+        
+        # Create adapter based on site
+        adapter = build_adapter(site, site_config, args, storage)
+        if adapter is None:
+            logger.error(f"Adapter for {site} not yet implemented")
+            logger.info(f"Available sites: {', '.join(SUPPORTED_SITES)}")
+            continue
+        jobs.append((adapter, scrape_options(site_config, config, args)))
+    
+    if not jobs:
+        return
+    
+    # Scrape
+    if len(jobs) == 1:
+        adapter, options = jobs[0]
+        engine.scrape_site(adapter=adapter, **options)
+    else:
+        engine.scrape_sites(jobs)
+    
     # Print stats
     stats = engine.get_stats()
     logger.info("\nScraping Statistics:")
@@ -268,9 +316,30 @@ def cmd_status(args):
         else:
             print(f"  {site_name:20s}: not started")
     
+    # URLs still to fetch per site (see `retry-failed` for dead letters)
+    if Path(frontier_path(db_path)).exists():
+        print("\nFrontier:")
+        for site_name in sites_config.get('sites', {}).keys():
+            frontier = Frontier(frontier_path(db_path), site=site_name)
+            try:
+                counts = frontier.counts()
+                dead = sum(frontier.dead_letters().values())
+            finally:
+                frontier.close()
+            if any(counts.values()):
+                print(f"  {site_name:20s}: {counts['pending']:,} pending, {counts['done']:,} done, "
+                      f"{counts['failed']:,} failed ({dead:,} dead-lettered)")
+    
     print("\n" + "=" * 60)
 
 
+def cmd_retry_failed(args):
+    """Requeue a site's dead-lettered URLs for the next scrape."""
+    config = load_config()
+    db_path = config.get('database', {}).get('path', 'islamic_data.db')
+    retry_failed_command(db_path, args.site, args.outcomes)
+
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -281,6 +350,10 @@ Examples:
   # Scrape islamqa.info
   python main.py scrape --site islamqa --start-id 1 --end-id 1000
   
+  # Scrape several sites at once (one crawler per site)
+  python main.py scrape --sites islamweb,shamela,ahadith
+  python main.py scrape --all-enabled
+  
   # Export all Q&A data
   python main.py export --content-type "q&a"
   
@@ -292,15 +365,23 @@ Examples:
   
   # Show status
   python main.py status
+  
+  # Requeue failed URLs (all but not_found by default)
+  python main.py retry-failed --site islamqa blocked
         """
     )
     
     subparsers = parser.add_subparsers(dest='command', help='Command to execute')
     
     # Scrape command
-    scrape_parser = subparsers.add_parser('scrape', help='Scrape a site')
-    scrape_parser.add_argument('--site', type=str, required=True,
-                              help='Site to scrape (e.g., islamqa)')
+    scrape_parser = subparsers.add_parser('scrape', help='Scrape one or more sites')
+    site_group = scrape_parser.add_mutually_exclusive_group(required=True)
+    site_group.add_argument('--site', type=str,
+                            help='Site to scrape (e.g., islamqa)')
+    site_group.add_argument('--sites', type=str,
+                            help='Comma-separated sites to scrape in parallel (e.g., islamqa,shamela)')
+    site_group.add_argument('--all-enabled', action='store_true',
+                            help='Scrape every site enabled in config/sites.yaml in parallel')
     scrape_parser.add_argument('--start-id', type=int,
                               help='Starting ID (for islamqa)')
     scrape_parser.add_argument('--end-id', type=int,
@@ -317,6 +398,11 @@ Examples:
                               help='Log level for this run')
     scrape_parser.add_argument('--simple-output', action='store_true',
                               help='Cleaner terminal output (hide Scrapy noise, show concise progress)')
+    scrape_parser.add_argument('--metrics-file', type=str,
+                              help='Rewrite Prometheus metrics to this file while scraping')
+    scrape_parser.add_argument('--metrics-port', type=int,
+                              help='Serve /metrics and /metrics.json on this local port')
+    add_profile_arguments(scrape_parser)
     
     # Export command
     export_parser = subparsers.add_parser('export', help='Export data to training formats')
@@ -341,6 +427,13 @@ Examples:
     # Status command
     status_parser = subparsers.add_parser('status', help='Show scraping status')
     
+    # Retry-failed command
+    retry_parser = subparsers.add_parser('retry-failed', help='Requeue dead-lettered URLs of a site')
+    retry_parser.add_argument('--site', type=str, required=True,
+                              help='Site whose failed URLs to requeue (e.g., islamqa)')
+    retry_parser.add_argument('outcomes', nargs='*',
+                              help='Outcomes to requeue (transient, blocked, parse_failure, not_found, robots, all)')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -349,6 +442,7 @@ Examples:
     
     # Execute command
     if args.command == 'scrape':
+        enable_from_args(args)
         cmd_scrape(args)
     elif args.command == 'export':
         cmd_export(args)
@@ -356,6 +450,8 @@ Examples:
         cmd_migrate(args)
     elif args.command == 'status':
         cmd_status(args)
+    elif args.command == 'retry-failed':
+        cmd_retry_failed(args)
     else:
         parser.print_help()
 
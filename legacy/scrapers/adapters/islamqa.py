@@ -6,7 +6,7 @@ Uses Playwright as fallback for JavaScript-rendered pages.
 
 import re
 import time
-from typing import List, Dict, Any, Optional
+from typing import Iterator, Dict, Any, Optional
 from bs4 import BeautifulSoup
 from scrapers.base import BaseScraper
 from scrapers.storage import UnifiedStorage
@@ -24,7 +24,8 @@ class IslamQAAdapter(BaseScraper):
     """
     Adapter for islamqa.info Q&A scraping.
     Uses ID-based URL generation: https://islamqa.info/en/answers/{id}
-    Supports resume by tracking last scraped ID.
+    Resume is handled by CoreEngine's frontier, which also retries gaps
+    left by an interrupted run.
     """
     
     def __init__(self, start_id: int = 1, end_id: int = 10000, 
@@ -35,7 +36,7 @@ class IslamQAAdapter(BaseScraper):
         Args:
             start_id: Starting ID for URL generation
             end_id: Ending ID for URL generation
-            storage: Optional storage instance for resume support
+            storage: Optional storage instance
         """
         super().__init__(
             source_name='islamqa',
@@ -44,28 +45,19 @@ class IslamQAAdapter(BaseScraper):
         self.start_id = start_id
         self.end_id = end_id
         self.storage = storage
-        
-        # Check resume state if storage provided
-        if storage:
-            resume_state = storage.get_resume_state('islamqa')
-            if resume_state and resume_state.get('last_id'):
-                self.start_id = max(start_id, resume_state['last_id'] + 1)
-                self.logger.info(f"Resuming from ID {self.start_id}")
     
-    def get_start_urls(self) -> List[str]:
+    def get_start_urls(self) -> Iterator[str]:
         """
-        Generate list of URLs based on ID range.
+        Generate URLs based on ID range, lazily.
         
-        Returns:
-            List of URLs to scrape
+        Yields:
+            URLs to scrape
         """
-        urls = []
         for i in range(self.start_id, self.end_id + 1):
             # Support both English and Arabic
-            urls.append(f"https://islamqa.info/en/answers/{i}")
+            yield f"{self.base_url}/en/answers/{i}"
             # Optionally add Arabic URLs
-            # urls.append(f"https://islamqa.info/ar/answers/{i}")
-        return urls
+            # yield f"{self.base_url}/ar/answers/{i}"
     
     def parse(self, response) -> Optional[Dict[str, Any]]:
         """
@@ -3,7 +3,7 @@ Base scraper interface for site-specific adapters.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional, Any
+from typing import Iterable, Dict, Optional, Any
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,12 +28,13 @@ class BaseScraper(ABC):
         self.logger = logging.getLogger(f"scraper.{source_name}")
     
     @abstractmethod
-    def get_start_urls(self) -> List[str]:
+    def get_start_urls(self) -> Iterable[str]:
         """
-        Generate list of starting URLs to scrape.
+        Generate starting URLs to scrape.
+        May return a generator; it is consumed lazily while requests are scheduled.
         
         Returns:
-            List of URL strings
+            Iterable of URL strings
         """
         pass
     
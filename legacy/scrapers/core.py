@@ -2,20 +2,36 @@
 Core engine that coordinates scraping, deduplication, rate limiting, and robots.txt compliance.
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import itertools
 import logging
+import os
+import sys
 from datetime import datetime
 import time
 
 from scrapers.base import BaseScraper
-from scrapers.storage import UnifiedStorage
+from scrapers.storage import SAVED, StorageWriter, UnifiedStorage
 from utils.robots import RobotsTxtChecker
 from utils.rate_limiter import RateLimiter
+from utils.metrics import MetricsExporter, MetricsRegistry, should_sample
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from profiling.stages import PROFILER
+from progress.frontier import Frontier, frontier_path
 from utils.deduplication import compute_content_hash
 from utils.text_cleaner import clean_text, contains_html
 
 logger = logging.getLogger(__name__)
 
+# Start URLs added to (and leased from) the frontier per transaction
+START_URL_CHUNK = 500
+# Scrapy's scheduler may hold a leased request for the whole run; a killed
+# run's leases are returned by recover() on the next start
+FRONTIER_LEASE_SECONDS = 24 * 3600
+FRONTIER_RETRY_SECONDS = 300
+
 
 # Note: Scrapy is imported lazily inside scrape_site to allow non-scraping
 # commands (like status/export) to run without Scrapy installed.
@@ -38,23 +54,118 @@ class CoreEngine:
             user_agent: User agent string (default: polite scraper)
         """
         self.storage = UnifiedStorage(db_path)
-        self.robots_checker = RobotsTxtChecker()
-        self.rate_limiter = RateLimiter(default_delay=default_delay)
         self.user_agent = user_agent or 'IslamicDataScraper/1.0 (+https://github.com/your-repo)'
+        self.robots_checker = RobotsTxtChecker(storage=self.storage, user_agent=self.user_agent)
+        self.rate_limiter = RateLimiter(default_delay=default_delay)
+        self.writer: Optional[StorageWriter] = None  # Set while scrape_sites runs
+        self.metrics = MetricsRegistry()
+        self.metrics_exporter: Optional[MetricsExporter] = None
+        self._describe_metrics()
         
         logger.info("CoreEngine initialized")
     
-    def scrape_site(self, adapter: BaseScraper, 
-                   concurrent_requests: int = 8,
-                   download_delay: float = None,
-                   log_level: str = 'INFO',
-                   disable_rate_limit: bool = False,
-                   simple_output: bool = False,
-                   fast_mode: bool = False,
-                   **scrapy_settings):
+    def _describe_metrics(self):
+        m = self.metrics
+        m.describe('scraper_fetch_seconds', 'histogram', 'Download latency per response')
+        m.describe('scraper_parse_seconds', 'histogram', 'Adapter extract_content time per response')
+        m.describe('scraper_save_seconds', 'histogram', 'Time to save one item (or one writer batch)')
+        m.describe('scraper_items_saved_total', 'counter', 'Items saved to storage')
+        m.describe('scraper_dedup_total', 'counter', 'Items or URLs skipped as already known, by reason')
+        m.describe('scraper_http_responses_total', 'counter', 'Responses by HTTP status')
+        m.describe('scraper_request_errors_total', 'counter', 'Failed requests by error type')
+        m.describe('scraper_parse_errors_total', 'counter', 'Responses whose processing raised')
+        m.describe('scraper_items_per_second', 'gauge', 'Items saved per second since the previous export')
+        m.describe('scraper_queue_depth', 'gauge', 'Requests waiting in the Scrapy scheduler')
+        m.describe('scraper_in_flight', 'gauge', 'Requests being downloaded')
+    
+    def enable_metrics(self, textfile: Optional[str] = None, port: Optional[int] = None,
+                       interval: float = 10.0):
+        """
+        Export metrics while crawling: rewrite `textfile` (Prometheus text
+        format) every `interval` seconds and/or serve them on 127.0.0.1:`port`.
+        """
+        if textfile or port:
+            self.metrics_exporter = MetricsExporter(self.metrics, textfile=textfile,
+                                                    port=port, interval=interval)
+    
+    def _record_saves(self, results, seconds: Optional[float] = None):
+        """Count (source, status) save results; `seconds` is a writer batch's time."""
+        if seconds is not None:
+            self.metrics.observe('scraper_save_seconds', seconds, source='writer_batch')
+        for source, status in results:
+            if status == SAVED:
+                self.metrics.inc('scraper_items_saved_total', source=source)
+            elif status != 'error':
+                self.metrics.inc('scraper_dedup_total', source=source, reason=status)
+    
+    def scrape_site(self, adapter: BaseScraper, **options):
         """
         Scrape a single site using its adapter.
         
+        Args:
+            adapter: BaseScraper instance
+            **options: Crawl options, see _build_spider
+        """
+        spider_cls = self._build_spider(adapter, **options)
+        self._run_crawlers([spider_cls])
+        logger.info(f"Completed scrape for {adapter.source_name}")
+    
+    def scrape_sites(self, jobs: List[Tuple[BaseScraper, Dict[str, Any]]]):
+        """
+        Scrape several independent sites at once: one crawler per site in a
+        single reactor, each with its own concurrency and rate budget, so the
+        run takes as long as the slowest site instead of the sum of all.
+        All crawlers save through one StorageWriter that batches inserts.
+        
+        Args:
+            jobs: (adapter, options) pairs; options as for scrape_site
+        """
+        robots_urls = []
+        for adapter, _ in jobs:
+            robots_urls += [adapter.base_url] + list(getattr(adapter, 'start_urls_list', None) or [])
+        asyncio.run(self.robots_checker.prefetch(robots_urls))
+        
+        self.writer = StorageWriter(self.storage, on_batch=self._record_saves)
+        self.writer.start()
+        try:
+            spiders = [self._build_spider(adapter, **options) for adapter, options in jobs]
+            self._run_crawlers(spiders)
+        finally:
+            self.writer.close()
+            self.writer = None
+        logger.info(f"Completed scrape for {', '.join(adapter.source_name for adapter, _ in jobs)}")
+    
+    def _run_crawlers(self, spiders):
+        """Run spider classes (custom_settings set) in one CrawlerProcess."""
+        from scrapy.crawler import CrawlerProcess  # type: ignore
+        
+        # Process-wide settings come from the first spider; each crawler
+        # still applies its own custom_settings
+        process = CrawlerProcess(spiders[0].custom_settings)
+        for spider_cls in spiders:
+            process.crawl(spider_cls)
+        
+        # Start crawling
+        if self.metrics_exporter:
+            self.metrics_exporter.start()
+        try:
+            process.start()
+        finally:
+            if self.metrics_exporter:
+                self.metrics_exporter.stop()
+    
+    def _build_spider(self, adapter: BaseScraper, 
+                      concurrent_requests: int = 8,
+                      download_delay: float = None,
+                      log_level: str = 'INFO',
+                      disable_rate_limit: bool = False,
+                      simple_output: bool = False,
+                      fast_mode: bool = False,
+                      **scrapy_settings):
+        """
+        Build the spider class for one site, with its Scrapy settings as
+        custom_settings.
+        
         Args:
             adapter: BaseScraper instance
             concurrent_requests: Number of concurrent requests
@@ -73,7 +184,6 @@ class CoreEngine:
         else:
             target_level = getattr(logging, log_level.upper(), logging.INFO)
         
-        logging.getLogger('utils.rate_limiter').setLevel(logging.WARNING)
         logging.getLogger('asyncio').setLevel(logging.WARNING)
         logging.getLogger('scrapy').setLevel(target_level)
         logging.getLogger('scrapy.utils.log').setLevel(target_level)
@@ -91,7 +201,6 @@ class CoreEngine:
         # Lazy import Scrapy components so non-scraping commands don't require it
         try:
             import scrapy  # type: ignore
-            from scrapy.crawler import CrawlerProcess  # type: ignore
         except Exception as e:
             raise RuntimeError(
                 "Scrapy is required to run scraping. Install with: pip install scrapy twisted-iocpsupport"
@@ -101,8 +210,20 @@ class CoreEngine:
         if download_delay:
             self.rate_limiter.set_delay(adapter.base_url, download_delay)
         
+        # robots.txt of the site's domains: fetched concurrently (or read from the DB
+        # cache) before the reactor starts, so start_requests never blocks on it
+        robots_urls = [adapter.base_url] + list(getattr(adapter, 'start_urls_list', None) or [])
+        asyncio.run(self.robots_checker.prefetch(robots_urls))
+        if not disable_rate_limit:
+            for url in {self.robots_checker._get_domain(u) for u in robots_urls}:
+                self.robots_checker.apply_crawl_delay(self.rate_limiter, url, self.user_agent)
+        
         # Configure Scrapy settings
         actual_delay = 0.0 if fast_mode else (download_delay if download_delay is not None else 1.0)
+        rate_limit_enabled = not disable_rate_limit
+        if rate_limit_enabled:
+            # Per-domain spacing comes from the token buckets of RateLimitMiddleware
+            actual_delay = 0.0
         actual_concurrency = 24 if fast_mode else concurrent_requests
         actual_per_domain = 12 if fast_mode else max(1, concurrent_requests // 2)
         
@@ -122,6 +243,11 @@ class CoreEngine:
             'LOG_LEVEL': 'ERROR' if simple_output else log_level,  # Only show errors in simple mode
             **scrapy_settings
         }
+        if rate_limit_enabled:
+            settings['DOWNLOADER_MIDDLEWARES'] = {
+                **settings.get('DOWNLOADER_MIDDLEWARES', {}),
+                'utils.rate_limiter.RateLimitMiddleware': 543,
+            }
         if simple_output:
             # Reduce Scrapy noise for human-friendly output
             settings.update({
@@ -134,7 +260,6 @@ class CoreEngine:
         
         # Define the spider class lazily to avoid referencing scrapy at import time
         engine_self = self
-        rate_limit_enabled = not disable_rate_limit
         progress_last = {'t': time.time()}
         simple_output_flag = simple_output
 
@@ -150,10 +275,21 @@ class CoreEngine:
                 self.scraped_count = 0
                 self.skipped_count = 0
                 self.error_count = 0
-                self.start_urls = adapter.get_start_urls()
-                logger.info(
-                    f"Initialized spider for {adapter.source_name} with {len(self.start_urls)} start URLs"
+                self._rate_last = (time.time(), 0)
+                # Durable per-site frontier: acks wait for the writer to commit the items
+                self.frontier = Frontier(
+                    frontier_path(engine_self.storage.db_path), site=adapter.source_name,
+                    lease_seconds=FRONTIER_LEASE_SECONDS,
+                    before_flush=engine_self.writer.flush if engine_self.writer is not None else None
                 )
+                if self.frontier.is_empty():
+                    self.frontier.add(self.storage.get_visited_urls(adapter.source_name), done=True)
+                recovered = self.frontier.recover()
+                if recovered:
+                    logger.info(f"Recovered {recovered} in-flight URLs of an interrupted {adapter.source_name} run")
+                # May be a generator; consumed lazily by start_requests
+                self.start_urls = adapter.get_start_urls()
+                logger.info(f"Initialized spider for {adapter.source_name}")
                 
                 # Re-apply log level suppression after Scrapy initializes its loggers
                 if simple_output_flag:
@@ -161,54 +297,94 @@ class CoreEngine:
                                     'scrapy.downloadermiddlewares', 'scrapy.downloadermiddlewares.retry']:
                         logging.getLogger(log_name).setLevel(logging.ERROR)
 
+            async def start(self):
+                """Scrapy >= 2.13 entry point; newer releases no longer call start_requests."""
+                for request in self.start_requests():
+                    yield request
+
             def start_requests(self):
-                total_urls = len(self.start_urls)
+                """
+                Stream start URLs through the frontier in chunks: each chunk is
+                added (URLs already known are ignored), then pending URLs are
+                leased, oldest first, so an interrupted run's backlog and gaps
+                go out before new URLs. The first request goes out immediately
+                and memory does not grow with the size of the URL range.
+                """
+                engine_self.metrics.add_collector(self._sample_metrics)
+                user_agent = self.settings.get('USER_AGENT', '*')
                 already_visited = 0
-                urls_to_scrape = []
-                
-                # Pre-load all visited URLs into a set for fast lookup
-                print("Loading visited URLs from database...")
-                visited_urls_set = self.storage.get_visited_urls(adapter.source_name)
-                print(f"Loaded {len(visited_urls_set)} visited URLs")
+                queued = 0
+                urls = iter(self.start_urls)
                 
-                for url in self.start_urls:
-                    if not self.robots_checker.can_fetch(
-                        url, user_agent=self.settings.get('USER_AGENT', '*')
-                    ):
-                        logger.warning(f"robots.txt disallows: {url}")
-                        self.skipped_count += 1
-                        continue
-                    
-                    # Use the pre-loaded set for O(1) lookup instead of database query
-                    if url in visited_urls_set:
-                        already_visited += 1
-                        continue  # Skip silently, we'll show summary
+                while True:
+                    chunk = list(itertools.islice(urls, START_URL_CHUNK))
+                    self.frontier.add(chunk)
+                    # Pending and failed URLs are the backlog, not dedup hits
+                    done = len(self.frontier.filter_done(chunk))
+                    already_visited += done
+                    if done:
+                        engine_self.metrics.inc('scraper_dedup_total', done,
+                                                source=adapter.source_name, reason='visited')
+                    leased = self.frontier.lease(START_URL_CHUNK)
+                    if not chunk and not leased:
+                        break
                     
-                    # This URL will be scraped
-                    urls_to_scrape.append(url)
+                    for url, _ in leased:
+                        if not self.robots_checker.can_fetch(url, user_agent=user_agent):
+                            logger.warning(f"robots.txt disallows: {url}")
+                            engine_self.metrics.inc('scraper_dedup_total', source=adapter.source_name,
+                                                    reason='robots')
+                            self.frontier.fail(url, "disallowed by robots.txt", outcome='robots')
+                            self.skipped_count += 1
+                            continue
+                        
+                        queued += 1
+                        # RateLimitMiddleware spaces requests per domain
+                        yield scrapy.Request(
+                            url=url,
+                            callback=self.parse,
+                            errback=self.errback,
+                            dont_filter=False,
+                            meta={'adapter': self.adapter, 'frontier_url': url}
+                        )
                 
-                # Show summary of what will be scraped
-                new_urls = len(urls_to_scrape)
+                # Summary once the start URLs are exhausted
                 if already_visited > 0:
-                    print(f"\n>> Summary: {already_visited} URLs already scraped, {new_urls} URLs will be processed\n")
-                
-                # Yield requests for URLs to scrape
-                for url in urls_to_scrape:
-                    if rate_limit_enabled:
-                        # Suppress rate limiter logging - it's too noisy
-                        old_level = logging.getLogger('utils.rate_limiter').level
-                        logging.getLogger('utils.rate_limiter').setLevel(logging.WARNING)
-                        self.rate_limiter.wait_if_needed(url)
-                        logging.getLogger('utils.rate_limiter').setLevel(old_level)
-                    yield scrapy.Request(
-                        url=url,
-                        callback=self.parse,
-                        errback=self.errback,
-                        dont_filter=False,
-                        meta={'adapter': self.adapter}
-                    )
+                    print(f"\n>> Summary: {already_visited} URLs already scraped, {queued} URLs queued\n")
+
+            def _sample_metrics(self, registry):
+                """Collector: scheduler depth, downloads in flight and items/sec."""
+                source = adapter.source_name
+                engine = self.crawler.engine
+                if engine.slot is not None:
+                    registry.set('scraper_queue_depth', len(engine.slot.scheduler), source=source)
+                registry.set('scraper_in_flight', len(engine.downloader.active), source=source)
+                now = time.time()
+                saved = registry.get('scraper_items_saved_total', source=source)
+                last_t, last_saved = self._rate_last
+                if now > last_t:
+                    registry.set('scraper_items_per_second', round((saved - last_saved) / (now - last_t), 3),
+                                 source=source)
+                self._rate_last = (now, saved)
 
             def parse(self, response):
+                """Runs the adapter on a response, then settles its frontier row."""
+                parsed = yield from self._parse(response)
+                url = response.meta.get('frontier_url')
+                if url is None:
+                    return
+                status = getattr(response, 'status', 200)
+                if not parsed:
+                    self.frontier.fail(url, "extract_content raised", outcome='parse_failure')
+                elif status in (404, 410):
+                    self.frontier.fail(url, f"HTTP {status}", outcome='not_found')
+                elif status in (401, 403):
+                    self.frontier.fail(url, f"HTTP {status}", outcome='blocked')
+                else:
+                    self.frontier.ack(url)
+
+            def _parse(self, response):
+                """Yields follow-up requests; returns False if processing raised."""
                 from urllib.parse import urljoin
 
                 adapter_local = response.meta.get('adapter', self.adapter)
@@ -217,13 +393,20 @@ class CoreEngine:
                     required_keys = {'url', 'title', 'content', 'content_type'}
                     return isinstance(data, dict) and required_keys.issubset(set(data.keys()))
 
+                metrics = engine_self.metrics
+                source = adapter_local.source_name
                 try:
-                    # Show what we're trying to scrape
                     status = getattr(response, 'status', 'unknown')
-                    if status == 200 and not simple_output_flag:
-                        print(f"📄 Processing: {response.url}")
+                    metrics.inc('scraper_http_responses_total', source=source, status=status)
+                    latency = response.meta.get('download_latency')
+                    if latency is not None:
+                        metrics.observe('scraper_fetch_seconds', latency, source=source)
+                        PROFILER.record('fetch', latency, group=source)
+                    logger.debug(f"Processing: {response.url}")
 
-                    raw_result = adapter_local.extract_content(response)
+                    with metrics.time('scraper_parse_seconds', source=source), \
+                            PROFILER.stage('extract', group=source):
+                        raw_result = adapter_local.extract_content(response)
 
                     items_to_save = []
                     new_requests = []
@@ -288,29 +471,32 @@ class CoreEngine:
                                         meta={'adapter': adapter_local}
                                     )
 
-                            if self.storage.is_url_visited(req.url):
+                            # Known URLs are done, failed, or still pending for start_requests
+                            if not self.frontier.add([req.url], meta=response.url):
+                                metrics.inc('scraper_dedup_total', source=source, reason='visited')
                                 continue
+                            req.meta['frontier_url'] = req.url
 
                             scheduled_requests += 1
                             yield req
                         except Exception as request_error:
                             logger.warning(f"Failed to schedule follow-up request from {response.url}: {request_error}")
 
-                        if scheduled_requests and not items_to_save and not simple_output_flag:
-                            print(f"[INFO] Discovered {scheduled_requests} new URLs from {response.url}")
+                    if scheduled_requests and not items_to_save:
+                        logger.debug(f"Discovered {scheduled_requests} new URLs from {response.url}")
 
                     if not items_to_save:
-                        # Show why we're skipping (make reasons visible) only if we didn't enqueue new work
+                        # Show why we're skipping (sampled) only if we didn't enqueue new work
                         if not scheduled_requests:
-                            if not simple_output_flag:
+                            self.skipped_count += 1
+                            if should_sample(self.skipped_count):
                                 if status == 200:
-                                    print(f"[WARN] No content extracted from {response.url}")
+                                    logger.info(f"[WARN] No content extracted from {response.url} (#{self.skipped_count} skipped)")
                                 elif status == 404:
-                                    print(f"[SKIP] Skipped (404 Not Found): {response.url}")
+                                    logger.info(f"[SKIP] Skipped (404 Not Found): {response.url} (#{self.skipped_count} skipped)")
                                 else:
-                                    print(f"[SKIP] Skipped ({status}): {response.url}")
-                            self.skipped_count += 1
-                        return
+                                    logger.info(f"[SKIP] Skipped ({status}): {response.url} (#{self.skipped_count} skipped)")
+                        return True
 
                     for content_data in items_to_save:
                         if not isinstance(content_data, dict):
@@ -318,61 +504,64 @@ class CoreEngine:
                             continue
 
                         if not adapter_local.validate_content(content_data):
-                            if not simple_output_flag:
-                                print(f"[ERROR] Invalid content from {response.url}")
                             logger.warning(f"Invalid content from {response.url}")
                             self.error_count += 1
                             continue
 
                         raw_title = content_data.get('title', '')
                         raw_content = content_data.get('content', '')
-                        content_hash = compute_content_hash(raw_title, raw_content)
+                        with PROFILER.stage('hash', group=source):
+                            content_hash = compute_content_hash(raw_title, raw_content)
 
                         metadata = content_data.get('metadata') or {}
                         if not isinstance(metadata, dict):
                             metadata = {'value': metadata}
 
-                        sanitized_metadata = {}
-                        for meta_key, meta_value in metadata.items():
-                            if isinstance(meta_value, str):
-                                sanitized_metadata[meta_key] = clean_text(meta_value)
-                            elif isinstance(meta_value, (int, float, bool)) or meta_value is None:
-                                sanitized_metadata[meta_key] = meta_value
-                            else:
-                                sanitized_metadata[meta_key] = clean_text(str(meta_value))
-
-                        storage_data = {
-                            'id': content_data.get('id', f"{adapter_local.source_name}_{int(time.time())}_{self.scraped_count}"),
-                            'source': adapter_local.source_name,
-                            'url': adapter_local.normalize_url(content_data['url']),
-                            'title': clean_text(raw_title),
-                            'content': clean_text(raw_content),
-                            'content_type': content_data['content_type'],
-                            'metadata': sanitized_metadata,
-                            'language': content_data.get('language') or adapter_local.detect_language(
-                                f"{raw_title} {raw_content}"
-                            ),
-                            'retrieved_at': datetime.now().isoformat(),
-                            'content_hash': content_hash
-                        }
-
-                        if self.storage.save_content(storage_data):
+                        with PROFILER.stage('clean', group=source):
+                            sanitized_metadata = {}
+                            for meta_key, meta_value in metadata.items():
+                                if isinstance(meta_value, str):
+                                    sanitized_metadata[meta_key] = clean_text(meta_value)
+                                elif isinstance(meta_value, (int, float, bool)) or meta_value is None:
+                                    sanitized_metadata[meta_key] = meta_value
+                                else:
+                                    sanitized_metadata[meta_key] = clean_text(str(meta_value))
+
+                            storage_data = {
+                                'id': content_data.get('id', f"{adapter_local.source_name}_{int(time.time())}_{self.scraped_count}"),
+                                'source': adapter_local.source_name,
+                                'url': adapter_local.normalize_url(content_data['url']),
+                                'title': clean_text(raw_title),
+                                'content': clean_text(raw_content),
+                                'content_type': content_data['content_type'],
+                                'metadata': sanitized_metadata,
+                                'language': content_data.get('language') or adapter_local.detect_language(
+                                    f"{raw_title} {raw_content}"
+                                ),
+                                'retrieved_at': datetime.now().isoformat(),
+                                'content_hash': content_hash
+                            }
+
+                        last_id_value = sanitized_metadata.get('question_id') or sanitized_metadata.get('hadith_number') or sanitized_metadata.get('sequence')
+                        try:
+                            last_id_value = int(str(last_id_value)) if last_id_value is not None and str(last_id_value).isdigit() else None
+                        except Exception:
+                            last_id_value = None
+
+                        if engine_self.writer is not None:
+                            # Shared writer: saved/duplicate counts are collected when the spider closes
+                            engine_self.writer.submit(storage_data, last_id=last_id_value)
+                            continue
+
+                        with metrics.time('scraper_save_seconds', source=source), \
+                                PROFILER.stage('save', group=source):
+                            save_status = self.storage.save_content_status(storage_data)
+                        engine_self._record_saves([(source, save_status)])
+                        if save_status == SAVED:
                             self.scraped_count += 1
-                            title_preview = storage_data['title'] if len(storage_data['title']) <= 100 else storage_data['title'][:97] + '...'
-                            if simple_output_flag:
-                                print(f"[OK] Saved #{self.scraped_count}: {title_preview}")
-                            else:
-                                print(f"\n{'='*80}")
-                                print(f"[OK] SAVED #{self.scraped_count}: {title_preview}")
-                                print(f"   URL: {storage_data['url']}")
-                                print(f"{'='*80}\n")
-                            logger.info(f"[OK] SAVED #{self.scraped_count}: {title_preview} | {storage_data['url']}")
-
-                            last_id_value = sanitized_metadata.get('question_id') or sanitized_metadata.get('hadith_number') or sanitized_metadata.get('sequence')
-                            try:
-                                last_id_value = int(str(last_id_value)) if last_id_value is not None and str(last_id_value).isdigit() else None
-                            except Exception:
-                                last_id_value = None
+                            if should_sample(self.scraped_count):
+                                title_preview = storage_data['title'] if len(storage_data['title']) <= 100 else storage_data['title'][:97] + '...'
+                                logger.info(f"[OK] SAVED #{self.scraped_count}: {title_preview} | {storage_data['url']}")
 
                             self.storage.update_resume_state(
                                 adapter_local.source_name,
@@ -382,8 +571,7 @@ class CoreEngine:
                             )
                         else:
                             self.skipped_count += 1
-                            if not simple_output_flag:
-                                print(f"[SKIP] Skipped (duplicate): {storage_data['url']}")
+                            logger.debug(f"[SKIP] Skipped ({save_status}): {storage_data['url']}")
 
                         now = time.time()
                         if now - progress_last['t'] >= 3 and not simple_output_flag:
@@ -391,15 +579,39 @@ class CoreEngine:
                             progress_last['t'] = now
                 except Exception as e:
                     logger.error(f"Error parsing {response.url}: {e}", exc_info=True)
+                    metrics.inc('scraper_parse_errors_total', source=source)
                     self.error_count += 1
+                    return False
+                return True
 
             def errback(self, failure):
                 self.error_count += 1
+                engine_self.metrics.inc('scraper_request_errors_total', source=adapter.source_name,
+                                        error=type(failure.value).__name__)
                 logger.error(f"Request failed: {failure.request.url} - {failure.value}")
+                url = failure.request.meta.get('frontier_url')
+                if url is None:
+                    return
+                status = getattr(getattr(failure.value, 'response', None), 'status', None)
+                if status in (401, 403, 451):
+                    self.frontier.fail(url, f"HTTP {status}", outcome='blocked')
+                elif status is not None and 400 <= status < 500 and status not in (408, 429):
+                    self.frontier.fail(url, f"HTTP {status}", outcome='not_found')
+                else:
+                    error = f"HTTP {status}" if status is not None else f"{type(failure.value).__name__}: {failure.value}"
+                    self.frontier.fail(url, error, retry_in=FRONTIER_RETRY_SECONDS, outcome='transient')
 
             def closed(self, reason):
+                if engine_self.writer is not None:
+                    engine_self.writer.flush()
+                    counts = engine_self.writer.counts(adapter.source_name)
+                    self.scraped_count += counts['saved']
+                    self.skipped_count += counts['duplicates']
+                    self.error_count += counts['errors']
+                # After the writer flush: the final acks refer to committed items
+                self.frontier.close()
                 print(f"\n{'='*80}")
-                print(f">> SCRAPING COMPLETE")
+                print(f">> SCRAPING COMPLETE: {adapter.source_name}")
                 print(f"{'='*80}")
                 print(f"[OK] Saved: {self.scraped_count} items")
                 print(f"    Skipped: {self.skipped_count} items")
@@ -414,14 +626,8 @@ class CoreEngine:
                     status='completed' if reason == 'finished' else 'paused'
                 )
 
-        # Create crawler process
-        process = CrawlerProcess(settings)
-        process.crawl(ScraperSpider)
-        
-        # Start crawling
-        process.start()
-        
-        logger.info(f"Completed scrape for {adapter.source_name}")
+        ScraperSpider.custom_settings = settings
+        return ScraperSpider
     
     def get_stats(self):
         """Get scraping statistics."""
@@ -4,6 +4,9 @@ Unified storage system for all scraped Islamic data.
 
 import sqlite3
 import json
+import queue
+import threading
+import time
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Set
 from pathlib import Path
@@ -11,6 +14,12 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Outcomes of saving one item
+SAVED = 'saved'
+DUPLICATE_HASH = 'content_hash'
+DUPLICATE_URL = 'url'
+SAVE_ERROR = 'error'
+
 
 class UnifiedStorage:
     """
@@ -80,6 +89,16 @@ class UnifiedStorage:
         
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_visited_source ON visited_urls(source)')
         
+        # robots.txt cache (domain = scheme://host), reused across runs
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS robots_txt (
+                domain TEXT PRIMARY KEY,
+                status INTEGER,
+                body TEXT,
+                fetched_at REAL
+            )
+        ''')
+        
         conn.commit()
         conn.close()
         logger.info(f"Initialized database at {self.db_path}")
@@ -104,68 +123,83 @@ class UnifiedStorage:
         Returns:
             True if saved successfully, False if duplicate or error
         """
+        return self.save_content_status(content_data) == SAVED
+    
+    def save_content_status(self, content_data: Dict[str, Any]) -> str:
+        """
+        Same as save_content, but says why an item was not saved.
+        
+        Returns:
+            SAVED, DUPLICATE_HASH, DUPLICATE_URL or SAVE_ERROR
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
-            # Check for duplicate by content_hash
-            cursor.execute('SELECT id FROM content WHERE content_hash = ?', 
-                          (content_data['content_hash'],))
-            if cursor.fetchone():
-                logger.debug(f"Duplicate content (hash {content_data['content_hash'][:8]}...), skipping")
-                return False
-            
-            # Check for duplicate by URL
-            cursor.execute('SELECT id FROM content WHERE url = ?', 
-                          (content_data['url'],))
-            if cursor.fetchone():
-                logger.debug(f"Duplicate URL: {content_data['url']}, skipping")
-                return False
-            
-            # Insert content
-            cursor.execute('''
-                INSERT INTO content 
-                (id, source, url, title, content, content_type, metadata, 
-                 language, retrieved_at, content_hash)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                content_data['id'],
-                content_data['source'],
-                content_data['url'],
-                content_data['title'],
-                content_data['content'],
-                content_data['content_type'],
-                json.dumps(content_data.get('metadata', {})),
-                content_data.get('language'),
-                content_data['retrieved_at'],
-                content_data['content_hash']
-            ))
-            
-            # Track visited URL
-            cursor.execute('''
-                INSERT OR REPLACE INTO visited_urls (url, source, scraped_at)
-                VALUES (?, ?, ?)
-            ''', (
-                content_data['url'],
-                content_data['source'],
-                content_data['retrieved_at']
-            ))
-            
+            status = self._insert_content(cursor, content_data)
             conn.commit()
-            logger.debug(f"Saved content: {content_data['title'][:50]}...")
-            return True
+            return status
             
         except sqlite3.IntegrityError as e:
             logger.warning(f"Integrity error saving content: {e}")
             conn.rollback()
-            return False
+            return SAVE_ERROR
         except Exception as e:
             logger.error(f"Error saving content: {e}")
             conn.rollback()
-            return False
+            return SAVE_ERROR
         finally:
             conn.close()
     
+    @staticmethod
+    def _insert_content(cursor, content_data: Dict[str, Any]) -> str:
+        """Insert one item and mark its URL visited; returns a save status."""
+        # Check for duplicate by content_hash
+        cursor.execute('SELECT id FROM content WHERE content_hash = ?', 
+                      (content_data['content_hash'],))
+        if cursor.fetchone():
+            logger.debug(f"Duplicate content (hash {content_data['content_hash'][:8]}...), skipping")
+            return DUPLICATE_HASH
+        
+        # Check for duplicate by URL
+        cursor.execute('SELECT id FROM content WHERE url = ?', 
+                      (content_data['url'],))
+        if cursor.fetchone():
+            logger.debug(f"Duplicate URL: {content_data['url']}, skipping")
+            return DUPLICATE_URL
+        
+        # Insert content
+        cursor.execute('''
+            INSERT INTO content 
+            (id, source, url, title, content, content_type, metadata, 
+             language, retrieved_at, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            content_data['id'],
+            content_data['source'],
+            content_data['url'],
+            content_data['title'],
+            content_data['content'],
+            content_data['content_type'],
+            json.dumps(content_data.get('metadata', {})),
+            content_data.get('language'),
+            content_data['retrieved_at'],
+            content_data['content_hash']
+        ))
+        
+        # Track visited URL
+        cursor.execute('''
+            INSERT OR REPLACE INTO visited_urls (url, source, scraped_at)
+            VALUES (?, ?, ?)
+        ''', (
+            content_data['url'],
+            content_data['source'],
+            content_data['retrieved_at']
+        ))
+        
+        logger.debug(f"Saved content: {content_data['title'][:50]}...")
+        return SAVED
+    
     def is_url_visited(self, url: str) -> bool:
         """
         Check if URL has already been scraped.
@@ -207,6 +241,69 @@ class UnifiedStorage:
 
         conn.close()
         return urls
+
+    def filter_visited(self, urls: List[str]) -> Set[str]:
+        """
+        Return the subset of `urls` that has already been scraped.
+        Meant for checking start URLs a chunk at a time instead of loading
+        every visited URL up front.
+
+        Args:
+            urls: URLs to check (at most a few hundred per call)
+
+        Returns:
+            Set of the given URLs present in visited_urls.
+        """
+        if not urls:
+            return set()
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        placeholders = ', '.join('?' * len(urls))
+        cursor.execute(f'SELECT url FROM visited_urls WHERE url IN ({placeholders})', list(urls))
+        visited = {row[0] for row in cursor.fetchall()}
+
+        conn.close()
+        return visited
+    
+    def get_robots_txt(self, domain: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the stored robots.txt response for a domain.
+        
+        Args:
+            domain: scheme://host
+            
+        Returns:
+            Dictionary with status, body and fetched_at (epoch seconds) or None
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT status, body, fetched_at FROM robots_txt WHERE domain = ?', (domain,))
+        row = cursor.fetchone()
+        conn.close()
+        
+        if row:
+            return {'status': row[0], 'body': row[1], 'fetched_at': row[2]}
+        return None
+    
+    def save_robots_txt(self, domain: str, status: int, body: Optional[str], fetched_at: float):
+        """
+        Store a fetched robots.txt response.
+        
+        Args:
+            domain: scheme://host
+            status: HTTP status (0 if the fetch failed)
+            body: Response text
+            fetched_at: Fetch time (epoch seconds)
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            'INSERT OR REPLACE INTO robots_txt (domain, status, body, fetched_at) VALUES (?, ?, ?, ?)',
+            (domain, status, body, fetched_at)
+        )
+        conn.commit()
+        conn.close()
     
     def get_resume_state(self, source: str) -> Optional[Dict[str, Any]]:
         """
@@ -252,6 +349,14 @@ class UnifiedStorage:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        self._write_resume_state(cursor, source, last_url, last_id, status)
+        
+        conn.commit()
+        conn.close()
+    
+    @staticmethod
+    def _write_resume_state(cursor, source: str, last_url: Optional[str],
+                            last_id: Optional[int], status: str):
         cursor.execute('''
             INSERT OR REPLACE INTO resume_state 
             (source, last_url, last_id, last_scraped_at, status)
@@ -263,9 +368,6 @@ class UnifiedStorage:
             datetime.now().isoformat(),
             status
         ))
-        
-        conn.commit()
-        conn.close()
     
     def query_content(self, source: Optional[str] = None,
                      content_type: Optional[str] = None,
@@ -414,3 +516,126 @@ class UnifiedStorage:
         conn.close()
         return max_id
 
+
+class StorageWriter:
+    """
+    Single writer shared by crawlers running side by side in one process.
+
+    Items are queued with submit() and written by one background thread over
+    one connection, a batch per transaction, instead of a connection and a
+    commit per item from every spider. Duplicate checks are the same as
+    UnifiedStorage.save_content; results are counted per source.
+    """
+    
+    def __init__(self, storage: UnifiedStorage, batch_size: int = 200,
+                 flush_interval: float = 1.0, on_batch=None):
+        """
+        Args:
+            storage: Storage whose database is written
+            batch_size: Items written per transaction at most
+            flush_interval: Seconds a partial batch may wait before it is written
+            on_batch: Optional callable([(source, status), ...], seconds) run on
+                the writer thread after every batch (e.g. to update metrics)
+        """
+        self.storage = storage
+        self.on_batch = on_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start the writer thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='storage-writer', daemon=True)
+            self._thread.start()
+    
+    def submit(self, content_data: Dict[str, Any], last_id: Optional[int] = None):
+        """
+        Queue one item (same dict as save_content). The resume state of its
+        source is advanced to it when the item is saved.
+        """
+        self._queue.put((content_data, last_id))
+    
+    def flush(self):
+        """Block until everything submitted so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+    
+    def close(self):
+        """Write what is left and stop the thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+    
+    def counts(self, source: str) -> Dict[str, int]:
+        """Saved / duplicate / error counts written so far for a source."""
+        with self._lock:
+            return dict(self._counts.get(source, {'saved': 0, 'duplicates': 0, 'errors': 0}))
+    
+    def _run(self):
+        conn = sqlite3.connect(self.storage.db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        try:
+            stop = False
+            while not stop:
+                batch, waiters = [], []
+                try:
+                    entry = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if entry is None:
+                        stop = True
+                    elif isinstance(entry, threading.Event):
+                        waiters.append(entry)
+                    else:
+                        batch.append(entry)
+                    if stop or waiters or len(batch) >= self.batch_size:
+                        break
+                    try:
+                        entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._write_batch(conn, batch)
+                for waiter in waiters:
+                    waiter.set()
+        finally:
+            conn.close()
+    
+    def _write_batch(self, conn, batch):
+        start = time.perf_counter()
+        cursor = conn.cursor()
+        results = []
+        resume = {}  # source -> (last_url, last_id) of the last item saved
+        try:
+            for content_data, last_id in batch:
+                try:
+                    status = UnifiedStorage._insert_content(cursor, content_data)
+                except sqlite3.IntegrityError as e:
+                    logger.warning(f"Integrity error saving content: {e}")
+                    status = SAVE_ERROR
+                results.append((content_data['source'], status))
+                if status == SAVED:
+                    resume[content_data['source']] = (content_data['url'], last_id)
+            for source, (last_url, last_id) in resume.items():
+                UnifiedStorage._write_resume_state(cursor, source, last_url, last_id, 'running')
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Error writing batch of {len(batch)} items: {e}")
+            conn.rollback()
+            results = [(content_data['source'], SAVE_ERROR) for content_data, _ in batch]
+        
+        with self._lock:
+            for source, status in results:
+                counts = self._counts.setdefault(source, {'saved': 0, 'duplicates': 0, 'errors': 0})
+                key = 'saved' if status == SAVED else ('errors' if status == SAVE_ERROR else 'duplicates')
+                counts[key] += 1
+        if self.on_batch is not None:
+            self.on_batch(results, time.perf_counter() - start)
@@ -0,0 +1,104 @@
+"""
+CoreEngine resuming from the frontier.
+
+Each crawl runs in a subprocess because a Twisted reactor cannot be restarted
+within one interpreter.
+"""
+
+import http.server
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+pytest.importorskip("scrapy")
+
+LEGACY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(LEGACY_DIR, '..', 'shared'))
+from progress.frontier import Frontier, frontier_path  # noqa: E402
+
+CRAWL = textwrap.dedent('''
+    import sys
+    from scrapers.base import BaseScraper
+    from scrapers.core import CoreEngine
+
+    base, db_path = sys.argv[1], sys.argv[2]
+
+    class Numbered(BaseScraper):
+        def __init__(self):
+            super().__init__(source_name="numbered", base_url=base)
+
+        def get_start_urls(self):
+            return (f"{base}/q/{i}" for i in range(1, 6))
+
+        def parse(self, response):
+            if response.status != 200:
+                return None
+            return {"url": response.url, "title": f"Question {response.url}",
+                    "content": response.text, "content_type": "q&a"}
+
+    engine = CoreEngine(db_path=db_path, default_delay=0)
+    engine.scrape_sites([(Numbered(), {"disable_rate_limit": True, "simple_output": True,
+                                       "log_level": "ERROR", "RETRY_TIMES": 0})])
+''')
+
+STATUSES = {"/q/3": 404, "/q/4": 500}
+
+
+class _Page(http.server.BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        status = STATUSES.get(self.path, 404 if self.path == "/robots.txt" else 200)
+        body = f"<html><body>answer {self.path}</body></html>".encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Page.hits = []
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Page)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def crawl(server, db_path):
+    result = subprocess.run([sys.executable, "-c", CRAWL, server, db_path], cwd=LEGACY_DIR,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_second_run_fetches_nothing_already_settled(server, tmp_path):
+    db_path = str(tmp_path / "data.db")
+    crawl(server, db_path)
+
+    frontier = Frontier(frontier_path(db_path), site="numbered")
+    try:
+        assert frontier.counts() == {"pending": 1, "in_flight": 0, "done": 3, "failed": 1}
+        assert frontier.dead_letters() == {"not_found": 1}
+    finally:
+        frontier.close()
+
+    pages = [path for path in _Page.hits if path.startswith("/q/")]
+    assert sorted(pages) == [f"/q/{i}" for i in range(1, 6)]
+
+    # The 500 waits out its retry delay; everything else is done or dead-lettered
+    _Page.hits.clear()
+    output = crawl(server, db_path)
+    assert [path for path in _Page.hits if path.startswith("/q/")] == []
+    # Only the done rows count as already scraped, not the 404 or the pending 500
+    assert ">> Summary: 3 URLs already scraped" in output
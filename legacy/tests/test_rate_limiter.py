@@ -0,0 +1,86 @@
+"""
+RateLimitMiddleware inside a real Scrapy crawl.
+
+The crawl runs in a subprocess because a Twisted reactor cannot be restarted
+within one interpreter.
+"""
+
+import http.server
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+pytest.importorskip("scrapy")
+
+LEGACY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CRAWL = textwrap.dedent('''
+    import json, sys, time
+    import scrapy
+    from scrapy.crawler import CrawlerProcess
+    from utils.rate_limiter import RateLimiter
+
+    base, delay = sys.argv[1], float(sys.argv[2])
+    seen = []
+
+    class TwoPages(scrapy.Spider):
+        name = "two_pages"
+        start_urls = [f"{base}/a", f"{base}/b"]
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.rate_limiter = RateLimiter(default_delay=delay)
+
+        def parse(self, response):
+            seen.append((response.url, time.monotonic()))
+
+    process = CrawlerProcess({
+        "DOWNLOADER_MIDDLEWARES": {"utils.rate_limiter.RateLimitMiddleware": 543},
+        "DOWNLOAD_DELAY": 0,
+        "ROBOTSTXT_OBEY": False,
+        "TELNETCONSOLE_ENABLED": False,
+        "LOG_LEVEL": "ERROR",
+    })
+    process.crawl(TwoPages)
+    process.start()
+    print(json.dumps(seen))
+''')
+
+
+class _Page(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"<html><body>ok</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Page)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_two_requests_to_one_domain_are_both_fetched_and_spaced(server):
+    delay = 0.5
+    result = subprocess.run([sys.executable, "-c", CRAWL, server, str(delay)], cwd=LEGACY_DIR,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    seen = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert sorted(url for url, _ in seen) == [f"{server}/a", f"{server}/b"], result.stderr
+    gap = abs(seen[1][1] - seen[0][1])
+    assert gap >= delay * 0.8
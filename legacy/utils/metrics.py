@@ -0,0 +1,253 @@
+"""
+In-process metrics for scraping runs: counters, gauges and histograms,
+exported in the Prometheus text format.
+
+The registry is cheap to update from the hot path (a dict lookup and an add
+under a lock). MetricsExporter rewrites a Prometheus textfile (for
+node_exporter's textfile collector) at a fixed interval and can serve
+/metrics and /metrics.json on a local port.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds; suits fetch latency as well as parse and save times
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (k + '="' + v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for k, v in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def should_sample(n: int, every: int = 100, first: int = 3) -> bool:
+    """True for the first `first` events and every `every`-th after that."""
+    return n <= first or n % every == 0
+
+
+class MetricsRegistry:
+    """
+    Named metrics with labels. Names follow Prometheus conventions
+    (e.g. scraper_fetch_seconds); metric type is fixed by first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, str] = {}
+        self._types: Dict[str, str] = {}
+        self._values: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, list]] = {}  # key -> [bucket counts, sum, count]
+        self._buckets: Dict[str, Sequence[float]] = {}
+        self._collectors: List[Callable[['MetricsRegistry'], None]] = []
+        self.started = time.time()
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Declare a metric's type ('counter', 'gauge' or 'histogram') and help text."""
+        self._types[name] = kind
+        self._help[name] = help_text
+        if kind == 'histogram':
+            self._buckets[name] = tuple(buckets)
+            self._histograms.setdefault(name, {})
+        else:
+            self._values.setdefault(name, {})
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+        self._types.setdefault(name, 'counter')
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._values.setdefault(name, {})[_label_key(labels)] = value
+        self._types.setdefault(name, 'gauge')
+
+    def observe(self, name: str, value: float, **labels):
+        buckets = self._buckets.get(name)
+        if buckets is None:
+            self.describe(name, 'histogram', name)
+            buckets = self._buckets[name]
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms[name].get(key)
+            if series is None:
+                series = self._histograms[name][key] = [[0] * len(buckets), 0.0, 0]
+            index = bisect.bisect_left(buckets, value)
+            if index < len(buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, name: str, **labels) -> '_Timer':
+        """Context manager observing the elapsed seconds into histogram `name`."""
+        return _Timer(self, name, labels)
+
+    def get(self, name: str, **labels) -> float:
+        """Current value of a counter or gauge series (0 if unset)."""
+        return self._values.get(name, {}).get(_label_key(labels), 0)
+
+    def add_collector(self, collector: Callable[['MetricsRegistry'], None]):
+        """Register a callable run before every export, for sampled gauges (e.g. queue depth)."""
+        self._collectors.append(collector)
+
+    def collect(self):
+        for collector in list(self._collectors):
+            try:
+                collector(self)
+            except Exception as e:
+                logger.debug(f"Metrics collector failed: {e}")
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        self.collect()
+        lines = []
+        with self._lock:
+            for name in sorted(set(self._values) | set(self._histograms)):
+                kind = self._types.get(name, 'untyped')
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == 'histogram':
+                    buckets = self._buckets[name]
+                    for key, (counts, total, count) in sorted(self._histograms[name].items()):
+                        cumulative = 0
+                        for bound, bucket_count in zip(buckets, counts):
+                            cumulative += bucket_count
+                            lines.append(f"{name}_bucket{_format_labels(key, ('le', repr(bound)))} {cumulative}")
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+                        lines.append(f"{name}_sum{_format_labels(key)} {total:.6f}")
+                        lines.append(f"{name}_count{_format_labels(key)} {count}")
+                else:
+                    for key, value in sorted(self._values[name].items()):
+                        lines.append(f"{name}{_format_labels(key)} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict:
+        """All metrics as a JSON-friendly dict; histograms as count/sum/mean."""
+        self.collect()
+        out = {'uptime_seconds': round(time.time() - self.started, 3), 'metrics': {}}
+        with self._lock:
+            for name, series in self._values.items():
+                out['metrics'][name] = [{'labels': dict(key), 'value': value} for key, value in series.items()]
+            for name, series in self._histograms.items():
+                out['metrics'][name] = [
+                    {'labels': dict(key), 'count': count, 'sum': round(total, 6),
+                     'mean': round(total / count, 6) if count else 0.0}
+                    for key, (_, total, count) in series.items()
+                ]
+        return out
+
+    def write_textfile(self, path: str):
+        """Atomically rewrite `path` with the current metrics."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'labels', 'start')
+
+    def __init__(self, registry: MetricsRegistry, name: str, labels: Dict[str, str]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsExporter:
+    """
+    Background exporter: rewrites a textfile every `interval` seconds and/or
+    serves /metrics (Prometheus text) and /metrics.json on 127.0.0.1:`port`.
+    """
+
+    def __init__(self, registry: MetricsRegistry, textfile: Optional[str] = None,
+                 port: Optional[int] = None, interval: float = 10.0):
+        self.registry = registry
+        self.textfile = textfile
+        self.port = port
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self):
+        if self.textfile:
+            self._thread = threading.Thread(target=self._run, name='metrics-textfile', daemon=True)
+            self._thread.start()
+        if self.port:
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.startswith('/metrics.json'):
+                        body = json.dumps(registry.snapshot(), ensure_ascii=False).encode('utf-8')
+                        content_type = 'application/json'
+                    elif self.path.startswith('/metrics'):
+                        body = registry.render_prometheus().encode('utf-8')
+                        content_type = 'text/plain; version=0.0.4'
+                    else:
+                        self.send_error(404)
+                        return
+                    self.send_response(200)
+                    self.send_header('Content-Type', content_type)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+            threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+            logger.info(f"Metrics at http://127.0.0.1:{self.port}/metrics")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def _write(self):
+        try:
+            self.registry.write_textfile(self.textfile)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {self.textfile}: {e}")
+
+    def stop(self):
+        """Stop exporting; the textfile is written one last time."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.textfile:
+            self._write()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -10,70 +10,184 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class TokenBucket:
+    """
+    Token bucket for one domain: `rate` tokens per second, at most `burst`
+    saved up. Callers reserve a token and get back how long to wait for it,
+    so nothing blocks and concurrent callers stay evenly spaced.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """Take one token; returns seconds until it is actually available."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
 class RateLimiter:
     """
     Manages rate limiting per domain to ensure polite crawling.
-    Tracks last request time per domain and enforces delays.
+    Keeps one token bucket per domain; the delay of a domain is the
+    average spacing between its requests.
     """
-    
-    def __init__(self, default_delay: float = 1.0):
+
+    def __init__(self, default_delay: float = 1.0, burst: int = 1):
         """
         Initialize rate limiter.
-        
+
         Args:
             default_delay: Default delay in seconds between requests (default: 1.0)
+            burst: Requests a domain may send back-to-back after being idle (default: 1)
         """
         self.default_delay = default_delay
-        self._last_request: Dict[str, float] = {}  # domain -> timestamp
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}  # domain -> bucket
         self._domain_delays: Dict[str, float] = {}  # domain -> custom delay
-    
+        self._requests: Dict[str, list] = {}  # domain -> [count, first_ts, last_ts]
+
     def _get_domain(self, url: str) -> str:
         """Extract domain from URL."""
         parsed = urlparse(url)
         return parsed.netloc
-    
+
+    def get_delay(self, url: str) -> float:
+        """Current delay (seconds) for the URL's domain."""
+        return self._domain_delays.get(self._get_domain(url), self.default_delay)
+
     def set_delay(self, url: str, delay: float):
         """
         Set custom delay for a specific domain.
-        
+
         Args:
             url: URL from the domain
             delay: Delay in seconds
         """
         domain = self._get_domain(url)
         self._domain_delays[domain] = delay
+        self._buckets.pop(domain, None)
         logger.debug(f"Set delay for {domain}: {delay}s")
-    
+
+    def reserve(self, url: str) -> float:
+        """
+        Book the next request slot for the URL's domain without blocking.
+
+        Args:
+            url: URL being requested
+
+        Returns:
+            Seconds the caller should wait before sending the request
+        """
+        domain = self._get_domain(url)
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            delay = self._domain_delays.get(domain, self.default_delay)
+            bucket = self._buckets[domain] = TokenBucket(1.0 / delay if delay > 0 else 0.0, self.burst)
+        wait = bucket.reserve()
+
+        send_at = time.time() + wait
+        tracked = self._requests.setdefault(domain, [0, send_at, send_at])
+        tracked[0] += 1
+        tracked[2] = max(tracked[2], send_at)
+        return wait
+
     def wait_if_needed(self, url: str):
         """
         Wait if necessary to respect rate limits for the domain.
-        
+        Blocking; only for callers outside the Twisted reactor.
+
         Args:
             url: URL being requested
         """
-        domain = self._get_domain(url)
-        delay = self._domain_delays.get(domain, self.default_delay)
-        
-        if domain in self._last_request:
-            elapsed = time.time() - self._last_request[domain]
-            if elapsed < delay:
-                wait_time = delay - elapsed
-                logger.debug(f"Rate limiting: waiting {wait_time:.2f}s for {domain}")
-                time.sleep(wait_time)
-        
-        self._last_request[domain] = time.time()
-    
+        wait_time = self.reserve(url)
+        if wait_time > 0:
+            logger.debug(f"Rate limiting: waiting {wait_time:.2f}s for {self._get_domain(url)}")
+            time.sleep(wait_time)
+
+    def effective_rates(self) -> Dict[str, float]:
+        """Requests per second actually scheduled per domain so far."""
+        rates = {}
+        for domain, (count, first, last) in self._requests.items():
+            rates[domain] = round((count - 1) / (last - first), 3) if count > 1 and last > first else 0.0
+        return rates
+
     def reset(self, url: Optional[str] = None):
         """
         Reset rate limit tracking for a domain or all domains.
-        
+
         Args:
             url: URL to reset, or None to reset all
         """
         if url:
             domain = self._get_domain(url)
-            if domain in self._last_request:
-                del self._last_request[domain]
+            self._buckets.pop(domain, None)
+            self._requests.pop(domain, None)
         else:
-            self._last_request.clear()
+            self._buckets.clear()
+            self._requests.clear()
+
+
+class RateLimitMiddleware:
+    """
+    Scrapy downloader middleware applying the spider's `rate_limiter`.
+
+    Each request reserves a token for its domain and, if it has to wait,
+    waits on a reactor timer instead of sleeping, so other domains and the
+    rest of the crawler keep running and CONCURRENT_REQUESTS stays meaningful.
+    Requests with meta['dont_rate_limit'] pass straight through.
+
+    Stats: ratelimit/requests, ratelimit/delayed, ratelimit/wait_seconds and,
+    per domain, ratelimit/<domain>/configured_rps and effective_rps.
+    """
+
+    def __init__(self, stats=None, crawler=None):
+        self.stats = stats
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        from scrapy import signals  # type: ignore
+        middleware = cls(crawler.stats, crawler)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    async def process_request(self, request):
+        spider = self.crawler.spider if self.crawler is not None else None
+        limiter = getattr(spider, 'rate_limiter', None)
+        if limiter is None or request.meta.get('dont_rate_limit'):
+            return None
+
+        wait = limiter.reserve(request.url)
+        if self.stats:
+            self.stats.inc_value('ratelimit/requests')
+            domain = limiter._get_domain(request.url)
+            delay = limiter.get_delay(request.url)
+            self.stats.set_value(f'ratelimit/{domain}/configured_rps',
+                                 round(1.0 / delay, 3) if delay > 0 else None)
+            if wait > 0:
+                self.stats.inc_value('ratelimit/delayed')
+                self.stats.inc_value('ratelimit/wait_seconds', round(wait, 3))
+
+        if wait > 0:
+            from twisted.internet import reactor  # type: ignore
+            from twisted.internet.task import deferLater  # type: ignore
+            from scrapy.utils.defer import maybe_deferred_to_future  # type: ignore
+            # Under the asyncio reactor a coroutine cannot await a bare Deferred
+            await maybe_deferred_to_future(deferLater(reactor, wait, lambda: None))
+        return None
 
+    def spider_closed(self, spider):
+        limiter = getattr(spider, 'rate_limiter', None)
+        if limiter is None or not self.stats:
+            return
+        for domain, rate in limiter.effective_rates().items():
+            self.stats.set_value(f'ratelimit/{domain}/effective_rps', rate)
@@ -2,10 +2,13 @@
 robots.txt parser and compliance checker.
 """
 
+import asyncio
 import time
+import urllib.error
+import urllib.request
 from urllib.robotparser import RobotFileParser
 from urllib.parse import urljoin, urlparse
-from typing import Optional, Dict
+from typing import Iterable, Optional, Dict, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,65 +17,140 @@ logger = logging.getLogger(__name__)
 class RobotsTxtChecker:
     """
     Manages robots.txt fetching, parsing, and compliance checking.
-    Caches robots.txt files for 24 hours.
+    Caches robots.txt files for 24 hours, in memory and (with a storage)
+    in the database, so restarts reuse rules fetched by earlier runs.
+    Call prefetch() before crawling so checks never fetch on the reactor thread.
     """
-    
-    def __init__(self):
+
+    def __init__(self, storage=None, cache_duration: int = 24 * 60 * 60,
+                 user_agent: str = 'IslamicDataScraper/1.0', timeout: int = 15):
+        """
+        Args:
+            storage: Optional UnifiedStorage used to persist fetched robots.txt
+            cache_duration: Seconds before a robots.txt is fetched again
+            user_agent: User agent sent when fetching robots.txt
+            timeout: Fetch timeout in seconds
+        """
+        self.storage = storage
         self._cache: Dict[str, tuple] = {}  # domain -> (parser, fetch_time)
-        self._cache_duration = 24 * 60 * 60  # 24 hours in seconds
-    
+        self._cache_duration = cache_duration
+        self.user_agent = user_agent
+        self.timeout = timeout
+
     def _get_domain(self, url: str) -> str:
         """Extract domain from URL."""
         parsed = urlparse(url)
         return f"{parsed.scheme}://{parsed.netloc}"
-    
+
     def _get_robots_url(self, url: str) -> str:
         """Get robots.txt URL for a given URL."""
         domain = self._get_domain(url)
         return urljoin(domain, '/robots.txt')
-    
+
+    def _parse(self, robots_url: str, status: int, body: Optional[str]) -> Optional[RobotFileParser]:
+        """
+        Build a parser from a fetched response: RobotFileParser.read's status
+        rules, except that a 5xx fails open like a network failure.
+        """
+        if status is None or status <= 0:
+            return None  # Network failure: fail open
+        parser = RobotFileParser()
+        parser.set_url(robots_url)
+        if status in (401, 403):
+            parser.disallow_all = True
+        elif 400 <= status < 500:
+            parser.allow_all = True
+        elif status >= 500:
+            return None
+        else:
+            parser.parse((body or '').splitlines())
+        parser.modified()
+        return parser
+
+    def _download(self, robots_url: str) -> Tuple[int, Optional[str]]:
+        """Blocking fetch; returns (status, body). Status 0 means the request failed."""
+        request = urllib.request.Request(robots_url, headers={'User-Agent': self.user_agent})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read().decode('utf-8', errors='ignore')
+        except urllib.error.HTTPError as e:
+            return e.code, None
+        except Exception as e:
+            logger.warning(f"Failed to fetch {robots_url}: {e}")
+            return 0, None
+
+    def _store(self, domain: str, status: int, body: Optional[str], fetch_time: float):
+        parser = self._parse(urljoin(domain, '/robots.txt'), status, body)
+        self._cache[domain] = (parser, fetch_time)
+        if self.storage is not None and 0 < status < 500:
+            # Network failures and 5xx (both fail open) stay in memory only, so the next run retries
+            self.storage.save_robots_txt(domain, status, body, fetch_time)
+        return parser
+
+    def _cached(self, domain: str):
+        """(hit, parser) from memory or the database, ignoring expired entries."""
+        now = time.time()
+        if domain in self._cache:
+            parser, fetch_time = self._cache[domain]
+            if now - fetch_time < self._cache_duration:
+                return True, parser
+        if self.storage is not None:
+            row = self.storage.get_robots_txt(domain)
+            if row and now - row['fetched_at'] < self._cache_duration:
+                parser = self._parse(urljoin(domain, '/robots.txt'), row['status'], row['body'])
+                self._cache[domain] = (parser, row['fetched_at'])
+                return True, parser
+        return False, None
+
+    async def prefetch(self, urls: Iterable[str]):
+        """
+        Fetch robots.txt for every domain in `urls` that has no fresh cache
+        entry, all domains concurrently.
+        """
+        domains = {self._get_domain(url) for url in urls}
+        missing = [d for d in domains if not self._cached(d)[0]]
+        if not missing:
+            return
+
+        async def fetch(domain):
+            status, body = await asyncio.to_thread(self._download, urljoin(domain, '/robots.txt'))
+            self._store(domain, status, body, time.time())
+            logger.info(f"Fetched robots.txt for {domain} (status {status})")
+
+        await asyncio.gather(*(fetch(d) for d in missing))
+
     def _fetch_robots_txt(self, url: str) -> Optional[RobotFileParser]:
         """
-        Fetch and parse robots.txt for a domain.
-        
+        Get the parser for a domain, fetching it (blocking) only if it was
+        neither prefetched nor cached.
+
         Args:
             url: Any URL from the domain
-            
+
         Returns:
             RobotFileParser instance or None if fetch fails
         """
         domain = self._get_domain(url)
-        robots_url = self._get_robots_url(url)
-        
-        # Check cache
-        if domain in self._cache:
-            parser, fetch_time = self._cache[domain]
-            if time.time() - fetch_time < self._cache_duration:
-                return parser
-        
-        # Fetch robots.txt
-        parser = RobotFileParser()
-        parser.set_url(robots_url)
-        
-        try:
-            parser.read()
-            self._cache[domain] = (parser, time.time())
-            logger.info(f"Fetched robots.txt for {domain}")
+        hit, parser = self._cached(domain)
+        if hit:
             return parser
-        except Exception as e:
-            logger.warning(f"Failed to fetch robots.txt for {domain}: {e}")
-            # Cache a None result to avoid repeated failures
-            self._cache[domain] = (None, time.time())
-            return None
-    
+
+        status, body = self._download(self._get_robots_url(url))
+        parser = self._store(domain, status, body, time.time())
+        if parser is None:
+            logger.warning(f"Failed to fetch robots.txt for {domain}")
+        else:
+            logger.info(f"Fetched robots.txt for {domain}")
+        return parser
+
     def can_fetch(self, url: str, user_agent: str = '*') -> bool:
         """
         Check if a URL can be fetched according to robots.txt.
-        
+
         Args:
             url: URL to check
             user_agent: User agent string (default: '*' for all)
-            
+
         Returns:
             True if allowed, False if disallowed, True if robots.txt unavailable
         """
@@ -81,24 +159,44 @@ class RobotsTxtChecker:
             # If robots.txt unavailable, default to allowing (fail open)
             return True
         return parser.can_fetch(user_agent, url)
-    
+
     def get_crawl_delay(self, url: str, user_agent: str = '*') -> Optional[float]:
         """
         Get crawl-delay for a domain from robots.txt.
-        
+        A Request-rate line (n requests per m seconds) counts as a delay of m/n.
+
         Args:
             url: URL from the domain
             user_agent: User agent string
-            
+
         Returns:
             Crawl delay in seconds, or None if not specified
         """
         parser = self._fetch_robots_txt(url)
         if parser is None:
             return None
-        
-        # RobotFileParser doesn't directly expose crawl_delay, but we can check
-        # For now, return None - rate limiter will use default delays
-        # In future, could extend RobotFileParser to parse crawl-delay
-        return None
 
+        delays = []
+        crawl_delay = parser.crawl_delay(user_agent)
+        if crawl_delay is not None:
+            delays.append(float(crawl_delay))
+        rate = parser.request_rate(user_agent)
+        if rate is not None and rate.requests:
+            delays.append(rate.seconds / rate.requests)
+        return max(delays) if delays else None
+
+    def apply_crawl_delay(self, rate_limiter, url: str, user_agent: str = '*') -> Optional[float]:
+        """
+        Raise the rate limiter's delay for the URL's domain to the robots.txt
+        delay when that is stricter than the configured one.
+
+        Returns:
+            The delay now in effect for the domain
+        """
+        robots_delay = self.get_crawl_delay(url, user_agent)
+        if robots_delay is None:
+            return rate_limiter.get_delay(url)
+        if robots_delay > rate_limiter.get_delay(url):
+            logger.info(f"robots.txt Crawl-delay for {self._get_domain(url)}: {robots_delay}s")
+            rate_limiter.set_delay(url, robots_delay)
+        return rate_limiter.get_delay(url)
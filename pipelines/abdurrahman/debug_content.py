@@ -1,11 +1,15 @@
-import sqlite3
+import os
+import sys
 from bs4 import BeautifulSoup
 import re
 
-conn = sqlite3.connect('pipelines/abdurrahman/data.db')
-c = conn.cursor()
-c.execute("SELECT url, html FROM articles ORDER BY RANDOM() LIMIT 1")
-row = c.fetchone()
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from archive.page_archive import PageArchive
+
+archive = PageArchive('pipelines/abdurrahman/data.db', site="abdurrahman")
+archive.absorb_legacy("articles")
+sample = archive.sample(1)
+row = sample[0] if sample else None
 
 if row:
     print(f"URL: {row[0]}")
@@ -35,4 +39,4 @@ if row:
         print("No content div found")
 else:
     print("No articles found")
-conn.close()
+archive.close()
@@ -1,10 +1,14 @@
-import sqlite3
+import sys
 import json
 import re
 import os
 from bs4 import BeautifulSoup
 from typing import Dict, List, Optional
 
+# Add shared modules to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from archive.page_archive import PageArchive
+
 class AbdurRahmanProcessor:
     def __init__(self, db_path: str, output_path: str):
         self.db_path = db_path
@@ -105,20 +109,17 @@ class AbdurRahmanProcessor:
 
     def run(self):
         print("⚙️ PROCESSING ABDURRAHMAN CONTENT...")
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        
-        c.execute("SELECT url, html FROM articles WHERE html IS NOT NULL")
-        rows = c.fetchall()
+        # Stream pages from the compressed archive instead of loading every HTML blob
+        archive = PageArchive(self.db_path, site="abdurrahman")
+        archive.absorb_legacy("articles")
         
         processed_data = []
-        for row in rows:
-            article = self.extract_article(row['html'], row['url'])
+        for url, html, _ in archive.iter_pages():
+            article = self.extract_article(html, url)
             if article and article['content']:
                 processed_data.append(article)
         
-        conn.close()
+        archive.close()
         
         with open(self.output_path, 'w', encoding='utf-8') as f:
             json.dump(processed_data, f, indent=2, ensure_ascii=False)
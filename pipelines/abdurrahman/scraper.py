@@ -8,14 +8,21 @@ Stores raw HTML for careful processing.
 
 import asyncio
 import aiohttp
-import aiosqlite
 import os
 import re
+import sys
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from bs4 import BeautifulSoup
 from typing import Set, Optional
 
+# Add shared modules to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from archive.page_archive import PageArchive
+from progress.frontier import Frontier, frontier_path, retry_failed_command
+from throttle.retry import FetchResult, fetch_with_retry, TRANSIENT
+from discovery.sitemap import SitemapDiscovery, aiohttp_fetcher, load_last_run, save_last_run, WP_POSTS
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("AbdurRahmanScraper")
 
@@ -26,47 +33,34 @@ class AbdurRahmanScraper:
         self.db_path = db_path
         self.concurrency = 5
         self.scraped_urls: Set[str] = set()
+        self.frontier: Optional[Frontier] = None
+        self.sitemap_complete = False
         
     async def init_db(self):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS articles (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT UNIQUE,
-                    html TEXT,
-                    scraped_at TEXT
-                )
-            ''')
-            await db.commit()
+        """Open the compressed raw-page archive (migrating old uncompressed rows)."""
+        self.archive = PageArchive(self.db_path, site="abdurrahman")
+        # Article URLs to download live in the durable frontier; acks wait for the archive flush
+        self.frontier = Frontier(frontier_path(self.db_path), site="abdurrahman", before_flush=self.archive.flush)
+        self.archive.absorb_legacy("articles")
             
     async def get_existing_urls(self) -> Set[str]:
-        if not os.path.exists(self.db_path):
-            return set()
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute('SELECT url FROM articles') as cursor:
-                rows = await cursor.fetchall()
-                logger.info(f"Loaded {len(rows)} existing URLs.")
-                return {row[0] for row in rows}
+        """Load already scraped URLs to avoid duplication."""
+        urls = self.archive.urls()
+        if self.frontier.is_empty():
+            self.frontier.add(urls, done=True)
+        logger.info(f"Loaded {len(urls)} existing URLs.")
+        return urls
 
-    async def fetch_page(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
-        try:
-            async with session.get(url, timeout=30) as response:
-                if response.status == 200:
-                    return await response.text()
-                else:
-                    logger.warning(f"Failed to fetch {url}: Status {response.status}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {e}")
-            return None
+    async def fetch_page(self, session: aiohttp.ClientSession, url: str) -> FetchResult:
+        """Fetch page HTML, retrying transient errors with backoff (and Retry-After)."""
+        result = await fetch_with_retry(session, url, timeout=30)
+        if not result.ok:
+            logger.warning(f"Failed to fetch {url}: {result.outcome} ({result.describe()}, {result.attempts} attempts)")
+        return result
 
     async def save_article(self, url: str, html: str):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                INSERT OR IGNORE INTO articles (url, html, scraped_at)
-                VALUES (?, ?, ?)
-            ''', (url, html, datetime.now().isoformat()))
-            await db.commit()
+        """Queue raw HTML for the archive (compressed, written in batches)."""
+        self.archive.add(url, html)
 
     async def crawl_blog_pages(self, session: aiohttp.ClientSession, max_pages: int = 5):
         """Crawl the main blog pagination."""
@@ -77,11 +71,11 @@ class AbdurRahmanScraper:
                 url = f"{BASE_URL}/page/{page_num}/"
             
             logger.info(f"📄 Scanning Page {page_num}: {url}")
-            html = await self.fetch_page(session, url)
-            if not html:
+            result = await self.fetch_page(session, url)
+            if not result.ok:
                 break
             
-            soup = BeautifulSoup(html, 'html.parser')
+            soup = BeautifulSoup(result.text, 'html.parser')
             article_urls = set()
             
             # Standard WP: <article ...> <h2 class="entry-title"><a href="...">
@@ -98,30 +92,83 @@ class AbdurRahmanScraper:
                 # Actually WP might return 404 if page out of range, handled by fetch_page returning None
             
             logger.info(f"   ✅ Found {len(article_urls)} new articles. Downloading...")
-            
-            for art_url in article_urls:
-                if art_url in self.scraped_urls:
-                    continue
-                
-                print(f"      📥 Downloading: {art_url.split('/')[-2]}")
-                art_html = await self.fetch_page(session, art_url)
-                if art_html:
-                    await self.save_article(art_url, art_html)
-                    self.scraped_urls.add(art_url)
-                await asyncio.sleep(0.5)
-            
+            self.frontier.add(article_urls, meta=url)
+            await self.download_pending(session)
             await asyncio.sleep(1)
 
+    async def discover_from_sitemap(self, session: aiohttp.ClientSession, since) -> bool:
+        """
+        Queues new or changed article URLs from the WP post sitemaps.
+        Returns False when the site has no usable sitemap.
+        """
+        sitemap = SitemapDiscovery(BASE_URL, aiohttp_fetcher(session), include=WP_POSTS)
+        queued = 0
+        async for url, lastmod in sitemap.discover(since=since):
+            changed = since is not None and lastmod is not None and lastmod > since
+            # Changed articles are re-downloaded over the stored copy
+            if changed:
+                self.frontier.add([url], meta="sitemap", requeue=True)
+                queued += 1
+            elif url not in self.scraped_urls:
+                queued += self.frontier.add([url], meta="sitemap")
+        if sitemap.found:
+            logger.info(f"🗺️  Sitemap: {queued} new/changed articles ({sitemap.stats['unchanged']} unchanged)")
+        # A failed child sitemap must be read again from the old cursor
+        self.sitemap_complete = sitemap.complete
+        return sitemap.found
+
+    async def download_pending(self, session: aiohttp.ClientSession):
+        """Downloads article URLs leased from the frontier until none are eligible."""
+        while True:
+            leased = self.frontier.lease(self.concurrency)
+            if not leased:
+                return
+            for art_url, _ in leased:
+                print(f"      📥 Downloading: {art_url.rstrip('/').split('/')[-1]}")
+                try:
+                    result = await self.fetch_page(session, art_url)
+                    if result.ok:
+                        await self.save_article(art_url, result.text)
+                        self.scraped_urls.add(art_url)
+                        self.frontier.ack(art_url)
+                    else:
+                        # Transient failures come back later; the rest are dead-lettered
+                        self.frontier.fail(art_url, result.describe(), retry_in=result.retry_in, outcome=result.outcome)
+                except Exception as e:
+                    logger.error(f"Error saving {art_url}: {e}")
+                    self.frontier.fail(art_url, f"{type(e).__name__}: {e}", retry_in=60, outcome=TRANSIENT)
+                await asyncio.sleep(0.5)
+
     async def run(self):
         print("📚 ABDURRAHMAN.ORG CONTENT SCRAPER")
         print("==================================")
         
         await self.init_db()
         self.scraped_urls = await self.get_existing_urls()
+        recovered = self.frontier.recover()
+        pending = self.frontier.counts()["pending"]
         
-        connector = aiohttp.TCPConnector(limit=self.concurrency)
-        async with aiohttp.ClientSession(connector=connector) as session:
-            await self.crawl_blog_pages(session, max_pages=3) # Limit for initial run
+        try:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            async with aiohttp.ClientSession(connector=connector) as session:
+                if pending:
+                    # A killed run's backlog downloads before anything is re-discovered
+                    logger.info(f"♻️  Resuming {pending} queued articles ({recovered} were in flight)")
+                    await self.download_pending(session)
+                last_run = load_last_run(self.db_path, "abdurrahman")
+                run_started = datetime.now(timezone.utc)
+                if not await self.discover_from_sitemap(session, since=last_run):
+                    logger.info("⚠️ No usable sitemap. Falling back to blog pagination.")
+                    await self.crawl_blog_pages(session, max_pages=3) # Limit for initial run
+                await self.download_pending(session)
+                if self.sitemap_complete:
+                    save_last_run(self.db_path, "abdurrahman", run_started)
+                else:
+                    logger.info("⚠️ Sitemap not read in full; discovery cursor left unchanged")
+        finally:
+            # Flush pages still buffered for the archive, then mark them done
+            self.frontier.close()
+            self.archive.close()
 
         print("\n🎉 SCRAPE COMPLETE!")
 
@@ -129,6 +176,9 @@ def main():
     import sys
     # Initialize DB path in current directory
     db_path = os.path.join(os.path.dirname(__file__), "data.db")
+    if sys.argv[1:2] == ["retry-failed"]:
+        retry_failed_command(db_path, "abdurrahman", sys.argv[2:])
+        return
     
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
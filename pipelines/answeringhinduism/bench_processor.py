@@ -0,0 +1,117 @@
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+
+from processor import (ContentProcessor, CHRISTIAN_KEYWORDS, HINDU_REFERENCE_PATTERNS,
+                       REASONING_KEYWORDS)
+
+class ReferenceProcessor(ContentProcessor):
+    """Per-keyword matching as it was before ParagraphMatcher; kept as the correctness/speed baseline."""
+
+    def has_christian_dependency(self, text):
+        text_lower = text.lower()
+        for pattern in CHRISTIAN_KEYWORDS:
+            if re.search(pattern, text_lower):
+                return True
+        return False
+
+    def extract_hindu_references(self, text):
+        refs = []
+        for pattern in HINDU_REFERENCE_PATTERNS:
+            refs.extend(re.findall(pattern, text, re.IGNORECASE))
+        return list(set(refs))
+
+    def detect_reasoning_type(self, text):
+        text_lower = text.lower()
+        scores = {rtype: sum(1 for kw in keywords if kw in text_lower)
+                  for rtype, keywords in REASONING_KEYWORDS.items()}
+        if max(scores.values()) == 0:
+            return "textual"
+        return max(scores, key=scores.get)
+
+    def split_into_units(self, content, title):
+        units = []
+        current_topic = title
+        for para in re.split(r'\n\s*\n|\(\d+\)\s*', content):
+            para = para.strip()
+            if len(para) < 50:
+                continue
+            header_match = re.match(r'^[\(\d\)]*\s*([A-Z][^.!?]*(?:ism|women|marriage|education|caste|varna))', para, re.IGNORECASE)
+            if header_match:
+                current_topic = header_match.group(1).strip()
+            is_dependent = self.has_christian_dependency(para)
+            if is_dependent:
+                cleaned_para = self._strip_christian_premise(para)
+                if cleaned_para != para and not self.has_christian_dependency(cleaned_para):
+                    para = cleaned_para
+                    is_dependent = False
+            refs = self.extract_hindu_references(para)
+            term_match = any(kw in para.lower() for kw in ['manu', 'veda', 'scripture', 'dharma', 'caste', 'brahmin'])
+            if refs or term_match:
+                units.append({
+                    'topic': current_topic[:100],
+                    'claim': self._extract_claim(para),
+                    'source_excerpt': para[:1000],
+                    'hindu_reference': ', '.join(refs) if refs else None,
+                    'reasoning_type': self.detect_reasoning_type(para),
+                    'dependency_on_christianity': is_dependent,
+                    'retain': not is_dependent,
+                })
+        return units
+
+def load_articles(db_path, export_path):
+    """Stored articles from data.db; falls back to rebuilding them from the last export."""
+    try:
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute('SELECT title, raw_content FROM articles WHERE raw_content IS NOT NULL').fetchall()
+        conn.close()
+        if rows:
+            return rows, "data.db"
+    except sqlite3.DatabaseError:
+        pass
+
+    with open(export_path, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    by_url = {}
+    for item in items:
+        title, paras = by_url.setdefault(item['source_url'], (item['article_title'], []))
+        paras.append(item['source_excerpt'])
+    return [(title, "\n\n".join(paras)) for title, paras in by_url.values()], os.path.basename(export_path)
+
+def normalise(units):
+    # The reference joined references in set order; compare them as sets
+    return [dict(u, hindu_reference=sorted((u['hindu_reference'] or '').split(', '))) for u in units]
+
+def bench(repeat=20):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    articles, source = load_articles(os.path.join(base_dir, "data.db"),
+                                     os.path.join(base_dir, "output", "criticisms.json"))
+    chars = sum(len(content) for _, content in articles)
+    print(f"🧪 Processor benchmark: {len(articles)} articles ({chars / 1e6:.2f}M chars) from {source}, x{repeat}")
+
+    reference = ReferenceProcessor(None)
+    current = ContentProcessor(None)
+
+    timings = {}
+    results = {}
+    for name, proc in (("reference", reference), ("matcher", current)):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            out = [proc.split_into_units(content, title) for title, content in articles]
+        timings[name] = time.perf_counter() - t0
+        results[name] = out
+
+    match = all(normalise(a) == normalise(b) for a, b in zip(results["reference"], results["matcher"]))
+    units = sum(len(u) for u in results["matcher"])
+    for name, secs in timings.items():
+        print(f"  {name:<10} {secs:.3f}s  ({len(articles) * repeat / secs:,.0f} articles/s)")
+    print(f"  speedup: {timings['reference'] / timings['matcher']:.1f}x | units per pass: {units}")
+    print(f"  {'✅' if match else '❌'} Output identical to reference: {match}")
+    return match
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    sys.exit(0 if bench(n) else 1)
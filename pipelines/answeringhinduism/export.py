@@ -9,7 +9,65 @@ import sqlite3
 import os
 import json
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+# Mapping URLs to granular categories if database category is generic
+# (Since we scraped everything as 'hinduism' mostly)
+CATEGORY_MAP = {
+    'brahmin': 'caste_system',
+    'caste': 'caste_system',
+    'varna': 'caste_system',
+    'manusmriti': 'manusmriti',
+    'women': 'women_rights',
+    'marriage': 'social_ethics',
+    'intoxicant': 'dietary_laws',
+    'meat': 'dietary_laws',
+    'panini': 'history',
+    'history': 'history',
+    'vedic-mathematics': 'vedic_science',
+    'astrology': 'vedic_science',
+    'science': 'vedic_science',
+    'critical-analysis': 'scripture_analysis',
+    'predestination': 'philosophy',
+}
+CATEGORY_KEYS = list(CATEGORY_MAP.items())
+
+# Field order of each output format (matches the per-format exporters)
+JSON_FIELDS = ["topic", "claim", "source_excerpt", "hindu_reference", "reasoning_type",
+               "dependency_on_christianity", "retain", "source_url", "article_title"]
+JSONL_FIELDS = ["topic", "claim", "source_excerpt", "hindu_reference", "reasoning_type"]
+CATEGORY_FIELDS = ["topic", "claim", "source_excerpt", "hindu_reference", "reasoning_type", "article_title"]
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _first_key(text: str) -> Optional[int]:
+    """Index of the first CATEGORY_MAP key contained in text."""
+    for i, (key, _) in enumerate(CATEGORY_KEYS):
+        if key in text:
+            return i
+    return None
+
+
+class StreamingJsonArray:
+    """
+    Writes a JSON array element by element, byte-identical to
+    json.dump(items, f, indent=2, ensure_ascii=False) for flat records,
+    from pre-encoded field values.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.f = open(path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, fields: List[str], encoded: Dict[str, str]):
+        body = ",\n".join(f'    "{name}": {encoded[name]}' for name in fields)
+        self.f.write(("[\n" if not self.count else ",\n") + "  {\n" + body + "\n  }")
+        self.count += 1
+
+    def close(self):
+        self.f.write("\n]" if self.count else "[]")
+        self.f.close()
 
 
 class Exporter:
@@ -17,6 +75,80 @@ class Exporter:
         self.db_path = db_path
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
+        self._url_category: Dict[int, Optional[int]] = {}
+        self._topic_category: Dict[str, Optional[int]] = {}
+    
+    def category_for(self, article_id: int, url: str, topic: str) -> str:
+        """
+        Same result as checking CATEGORY_MAP in order against url and topic:
+        the earliest key matching either wins. The URL side is cached per
+        article and the topic side per distinct topic.
+        """
+        if article_id not in self._url_category:
+            self._url_category[article_id] = _first_key(url.lower())
+        if topic not in self._topic_category:
+            self._topic_category[topic] = _first_key(topic.lower())
+        hits = [i for i in (self._url_category[article_id], self._topic_category[topic]) if i is not None]
+        return CATEGORY_KEYS[min(hits)][1] if hits else "general_criticism"
+    
+    def export_all(self, json_name: str = "criticisms.json", jsonl_name: str = "criticisms.jsonl",
+                   fetch_size: int = 500) -> Dict[str, int]:
+        """
+        Writes the combined JSON, the JSONL and every category file from one
+        ordered query in a single streaming pass. Each field is JSON-encoded
+        once and reused by all formats, and only open file handles are held
+        in memory.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute('''
+            SELECT c.topic, c.claim, c.source_excerpt, c.hindu_reference, c.reasoning_type,
+                   c.dependency_on_christianity, c.retain, a.id, a.url, a.title
+            FROM criticisms c
+            JOIN articles a ON c.article_id = a.id
+            WHERE c.retain = 1
+            ORDER BY a.category, c.id
+        ''')
+        
+        combined = StreamingJsonArray(os.path.join(self.output_dir, json_name))
+        jsonl = open(os.path.join(self.output_dir, jsonl_name), 'w', encoding='utf-8')
+        categories: Dict[str, StreamingJsonArray] = {}
+        
+        try:
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                for (topic, claim, excerpt, ref, rtype, dependent, retain,
+                     article_id, url, title) in rows:
+                    encoded = {
+                        "topic": _encode(topic),
+                        "claim": _encode(claim),
+                        "source_excerpt": _encode(excerpt),
+                        "hindu_reference": _encode(ref),
+                        "reasoning_type": _encode(rtype),
+                        "dependency_on_christianity": _encode(bool(dependent)),
+                        "retain": _encode(bool(retain)),
+                        "source_url": _encode(url),
+                        "article_title": _encode(title),
+                    }
+                    combined.write(JSON_FIELDS, encoded)
+                    jsonl.write("{" + ", ".join(f'"{name}": {encoded[name]}' for name in JSONL_FIELDS) + "}\n")
+                    
+                    category = self.category_for(article_id, url, topic)
+                    if category not in categories:
+                        categories[category] = StreamingJsonArray(os.path.join(self.output_dir, f"{category}.json"))
+                    categories[category].write(CATEGORY_FIELDS, encoded)
+        finally:
+            combined.close()
+            jsonl.close()
+            for writer in categories.values():
+                writer.close()
+            conn.close()
+        
+        print(f"✅ Exported {combined.count} criticisms to {combined.path} and {jsonl.name}")
+        for category, writer in categories.items():
+            print(f"✅ Exported {writer.count} items to {writer.path}")
+        return {category: writer.count for category, writer in categories.items()}
     
     def export_json(self, filename: str = "criticisms.json"):
         """Export all retained criticisms to a JSON file."""
@@ -93,25 +225,7 @@ class Exporter:
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
         
-        # Mapping URLs to granular categories if database category is generic
-        # (Since we scraped everything as 'hinduism' mostly)
-        category_map = {
-            'brahmin': 'caste_system',
-            'caste': 'caste_system',
-            'varna': 'caste_system',
-            'manusmriti': 'manusmriti',
-            'women': 'women_rights',
-            'marriage': 'social_ethics',
-            'intoxicant': 'dietary_laws',
-            'meat': 'dietary_laws',
-            'panini': 'history',
-            'history': 'history',
-            'vedic-mathematics': 'vedic_science',
-            'astrology': 'vedic_science',
-            'science': 'vedic_science',
-            'critical-analysis': 'scripture_analysis',
-            'predestination': 'philosophy',
-        }
+        category_map = CATEGORY_MAP
         
         c.execute('''
             SELECT c.*, a.url as source_url, a.title as article_title
@@ -163,9 +277,7 @@ def main():
     output_dir = os.path.join(base_dir, "output")
     
     exporter = Exporter(db_path, output_dir)
-    exporter.export_json()
-    exporter.export_jsonl()
-    exporter.export_by_category()
+    exporter.export_all()
     
     print("\n🎉 EXPORT COMPLETE!")
 
@@ -6,10 +6,14 @@ Processes raw article content and extracts structured criticisms.
 Filters out content dependent on Christian theology.
 """
 
+import argparse
 import sqlite3
 import os
 import re
 import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Optional
 from datetime import datetime
 
@@ -48,45 +52,91 @@ REASONING_KEYWORDS = {
     'logical': ['contradiction', 'inconsistent', 'fallacy', 'absurd', 'impossible'],
 }
 
+# A paragraph mentioning any of these is kept even without a parsed reference
+TERM_KEYWORDS = ['manu', 'veda', 'scripture', 'dharma', 'caste', 'brahmin']
+
+CLAIM_MARKERS = ['shows', 'proves', 'indicates', 'demonstrates', 'reveals',
+                 'says', 'states', 'declares', 'instructs', 'ordains',
+                 'ordained', 'assigned', 'considered', 'treated']
+
+PARAGRAPH_SPLIT = re.compile(r'\n\s*\n|\(\d+\)\s*')
+SECTION_HEADER = re.compile(r'^[\(\d\)]*\s*([A-Z][^.!?]*(?:ism|women|marriage|education|caste|varna))', re.IGNORECASE)
+
+
+class ParagraphMatcher:
+    """
+    Compiled form of the keyword/pattern lists above, applied in one pass per
+    paragraph (the paragraph is lowercased once and shared by every check):
+    - Christian keywords: a single alternation instead of one search each.
+    - Scripture references: each pattern only runs when its literal stem
+      (e.g. "veda", "gita") occurs; most paragraphs skip all twelve.
+    - Reasoning/term keywords: plain substring tests, which beat a regex
+      scan for short literal lists.
+    """
+    def __init__(self):
+        self.christian = re.compile('|'.join(CHRISTIAN_KEYWORDS))
+        self.references = []
+        for pattern in HINDU_REFERENCE_PATTERNS:
+            name = pattern[1:pattern.index(r'\s*[')]
+            stem = max(name.split(r'\s*'), key=len).lower()
+            self.references.append((stem, re.compile(pattern, re.IGNORECASE)))
+        self.reasoning = list(REASONING_KEYWORDS.items())
+
+    def is_christian(self, text_lower: str) -> bool:
+        return self.christian.search(text_lower) is not None
+
+    def find_references(self, text: str, text_lower: str) -> List[str]:
+        refs = []
+        for stem, pattern in self.references:
+            if stem in text_lower:
+                refs.extend(pattern.findall(text))
+        # First-seen order keeps the joined hindu_reference stable between runs
+        return list(dict.fromkeys(refs))
+
+    def reasoning_type(self, text_lower: str) -> str:
+        best, best_score = "textual", 0  # Default
+        for rtype, keywords in self.reasoning:
+            score = sum(1 for kw in keywords if kw in text_lower)
+            if score > best_score:
+                best, best_score = rtype, score
+        return best
+
+    def scan(self, text: str) -> Dict:
+        text_lower = text.lower()
+        return {
+            'dependent': self.is_christian(text_lower),
+            'refs': self.find_references(text, text_lower),
+            'term_match': any(kw in text_lower for kw in TERM_KEYWORDS),
+            'reasoning_type': self.reasoning_type(text_lower),
+        }
+
+
+MATCHER = ParagraphMatcher()
+
 
 class ContentProcessor:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self.matcher = MATCHER
     
     def has_christian_dependency(self, text: str) -> bool:
         """Check if text contains Christian theology references."""
-        text_lower = text.lower()
-        for pattern in CHRISTIAN_KEYWORDS:
-            if re.search(pattern, text_lower):
-                return True
-        return False
+        return self.matcher.is_christian(text.lower())
     
     def extract_hindu_references(self, text: str) -> List[str]:
         """Extract Hindu scripture references from text."""
-        refs = []
-        for pattern in HINDU_REFERENCE_PATTERNS:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            refs.extend(matches)
-        return list(set(refs))
+        return self.matcher.find_references(text, text.lower())
     
     def detect_reasoning_type(self, text: str) -> str:
         """Detect the type of reasoning used in the criticism."""
-        text_lower = text.lower()
-        scores = {}
-        for rtype, keywords in REASONING_KEYWORDS.items():
-            score = sum(1 for kw in keywords if kw in text_lower)
-            scores[rtype] = score
-        
-        if max(scores.values()) == 0:
-            return "textual"  # Default
-        return max(scores, key=scores.get)
+        return self.matcher.reasoning_type(text.lower())
     
     def split_into_units(self, content: str, title: str) -> List[Dict]:
         """Split article content into discrete criticism units."""
         units = []
         
         # Split by paragraph breaks or numbered sections
-        paragraphs = re.split(r'\n\s*\n|\(\d+\)\s*', content)
+        paragraphs = PARAGRAPH_SPLIT.split(content)
         
         current_topic = title
         for para in paragraphs:
@@ -95,34 +145,35 @@ class ContentProcessor:
                 continue
             
             # Check for section headers
-            header_match = re.match(r'^[\(\d\)]*\s*([A-Z][^.!?]*(?:ism|women|marriage|education|caste|varna))', para, re.IGNORECASE)
+            header_match = SECTION_HEADER.match(para)
             if header_match:
                 current_topic = header_match.group(1).strip()
             
             # STRICT FILTERING LOGIC
             # 1. Premise Check: Flag if paragraph starts with comparative theology
-            is_dependent = self.has_christian_dependency(para)
+            scan = self.matcher.scan(para)
+            is_dependent = scan['dependent']
             
             # 2. Stripping: Try to remove Christian comparisons if present
             if is_dependent:
                 cleaned_para = self._strip_christian_premise(para)
                 if cleaned_para != para:
                     # Re-check dependency on cleaned text
-                    if not self.has_christian_dependency(cleaned_para):
-                        para = cleaned_para
+                    cleaned_scan = self.matcher.scan(cleaned_para)
+                    if not cleaned_scan['dependent']:
+                        para, scan = cleaned_para, cleaned_scan
                         is_dependent = False
             
             # Extract criticism claims from paragraphs with scripture quotes
-            refs = self.extract_hindu_references(para)
-            term_match = any(kw in para.lower() for kw in ['manu', 'veda', 'scripture', 'dharma', 'caste', 'brahmin'])
+            refs = scan['refs']
             
-            if refs or term_match:
+            if refs or scan['term_match']:
                 unit = {
                     'topic': current_topic[:100],
                     'claim': self._extract_claim(para),
                     'source_excerpt': para[:1000],  # Increased limit
                     'hindu_reference': ', '.join(refs) if refs else None,
-                    'reasoning_type': self.detect_reasoning_type(para),
+                    'reasoning_type': scan['reasoning_type'],
                     'dependency_on_christianity': is_dependent,
                 }
                 unit['retain'] = not unit['dependency_on_christianity']
@@ -158,11 +209,10 @@ class ContentProcessor:
         sentences = re.split(r'[.!?]', text)
         for sent in sentences:
             sent = sent.strip()
-            if len(sent) > 30 and any(kw in sent.lower() for kw in 
-                ['shows', 'proves', 'indicates', 'demonstrates', 'reveals',
-                 'says', 'states', 'declares', 'instructs', 'ordains',
-                 'ordained', 'assigned', 'considered', 'treated']):
-                return sent[:200]
+            if len(sent) > 30:
+                sent_lower = sent.lower()
+                if any(kw in sent_lower for kw in CLAIM_MARKERS):
+                    return sent[:200]
         return sentences[0][:200] if sentences else text[:200]
     
     def process_article(self, article_id: int, url: str, title: str, content: str) -> List[Dict]:
@@ -176,64 +226,103 @@ class ContentProcessor:
         
         return units
     
-    def process_all(self):
-        """Process all articles in the database."""
+    def process_batch(self, rows) -> List[List[Dict]]:
+        """Units for each (id, url, title, raw_content) row, in row order."""
+        return [self.process_article(aid, url, title, content or '') for aid, url, title, content in rows]
+
+    def process_all(self, workers: int = 1, batch_size: int = 50):
+        """
+        Process all articles in the database.
+        Articles are read in id batches; with workers > 1 the batches are
+        processed in a process pool. Each batch's output replaces whatever
+        earlier runs stored for those articles in one transaction, so reruns
+        (and interrupted runs) never duplicate criticisms.
+        """
         conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_criticisms_article ON criticisms(article_id)")
         
-        # Get all articles
-        c.execute('SELECT id, url, title, raw_content FROM articles')
-        articles = c.fetchall()
+        ids = [row[0] for row in conn.execute('SELECT id FROM articles ORDER BY id')]
+        batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
         
-        all_units = []
-        retained = 0
-        discarded = 0
+        def load(batch_ids):
+            return conn.execute(
+                f"SELECT id, url, title, raw_content FROM articles WHERE id IN ({','.join('?' * len(batch_ids))}) ORDER BY id",
+                batch_ids
+            ).fetchall()
         
-        print(f"🔬 Processing {len(articles)} articles...")
+        print(f"🔬 Processing {len(ids)} articles ({workers} worker{'s' if workers > 1 else ''})...")
         
-        for article in articles:
-            units = self.process_article(
-                article['id'], 
-                article['url'], 
-                article['title'], 
-                article['raw_content']
-            )
-            
+        totals = {"units": 0, "retained": 0, "discarded": 0}
+        start = time.perf_counter()
+        
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Bounded read-ahead; results are written in submission order
+                pending = deque()
+                for batch_ids in batches:
+                    pending.append((batch_ids, pool.submit(_process_batch, load(batch_ids))))
+                    if len(pending) >= workers * 2:
+                        done_ids, future = pending.popleft()
+                        self._save_batch(conn, done_ids, future.result(), totals)
+                while pending:
+                    done_ids, future = pending.popleft()
+                    self._save_batch(conn, done_ids, future.result(), totals)
+        else:
+            for batch_ids in batches:
+                self._save_batch(conn, batch_ids, self.process_batch(load(batch_ids)), totals)
+        
+        conn.close()
+        
+        elapsed = time.perf_counter() - start
+        print(f"✅ Processed {totals['units']} criticism units in {elapsed:.1f}s")
+        print(f"   📗 Retained: {totals['retained']}")
+        print(f"   📕 Discarded (Christian dependency): {totals['discarded']}")
+        
+        return totals
+
+    def _save_batch(self, conn, article_ids, results, totals):
+        rows = []
+        for units in results:
             for unit in units:
                 if unit['retain']:
-                    retained += 1
+                    totals['retained'] += 1
                 else:
-                    discarded += 1
-                all_units.append(unit)
-                
-                # Save to database
-                c.execute('''
-                    INSERT INTO criticisms 
-                    (article_id, topic, claim, source_excerpt, hindu_reference, 
-                     reasoning_type, dependency_on_christianity, retain)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                    totals['discarded'] += 1
+                rows.append((
                     unit['article_id'], unit['topic'], unit['claim'],
                     unit['source_excerpt'], unit['hindu_reference'],
                     unit['reasoning_type'], 1 if unit['dependency_on_christianity'] else 0,
                     1 if unit['retain'] else 0
                 ))
+        totals['units'] += len(rows)
         
-        conn.commit()
-        conn.close()
-        
-        print(f"✅ Processed {len(all_units)} criticism units")
-        print(f"   📗 Retained: {retained}")
-        print(f"   📕 Discarded (Christian dependency): {discarded}")
-        
-        return all_units
+        with conn:
+            conn.execute(
+                f"DELETE FROM criticisms WHERE article_id IN ({','.join('?' * len(article_ids))})", article_ids
+            )
+            conn.executemany('''
+                INSERT INTO criticisms 
+                (article_id, topic, claim, source_excerpt, hindu_reference, 
+                 reasoning_type, dependency_on_christianity, retain)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+
+
+def _process_batch(rows):
+    """Process-pool entry point (matchers are compiled once per worker at import)."""
+    return ContentProcessor(None).process_batch(rows)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Extract criticism units from scraped articles")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = run inline)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Articles per batch/transaction")
+    args = parser.parse_args()
+    
     db_path = os.path.join(os.path.dirname(__file__), "data.db")
     processor = ContentProcessor(db_path)
-    processor.process_all()
+    processor.process_all(workers=args.workers, batch_size=args.batch_size)
 
 
 if __name__ == "__main__":
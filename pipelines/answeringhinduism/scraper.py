@@ -14,10 +14,15 @@ import re
 import json
 import time
 import logging
-from datetime import datetime
+import sys
+from datetime import datetime, timezone
 from bs4 import BeautifulSoup
 from typing import List, Dict, Optional, Set
 
+# Add shared modules to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from discovery.sitemap import SitemapDiscovery, aiohttp_fetcher, load_last_run, save_last_run, WP_POSTS
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("AnsweringHinduism")
 
@@ -45,6 +50,9 @@ class AnsweringHinduismScraper:
         self.db_path = db_path
         self.concurrency = 5
         self.scraped_urls: Set[str] = set()
+        # URLs whose sitemap lastmod is newer than our last run (re-fetched even if stored)
+        self.changed_urls: Set[str] = set()
+        self.sitemap_complete = False
         
     async def init_db(self):
         async with aiosqlite.connect(self.db_path) as db:
@@ -95,6 +103,29 @@ class AnsweringHinduismScraper:
         return False
     
     async def discover_urls(self, session: aiohttp.ClientSession) -> List[str]:
+        """Sitemap first (only entries changed since the last run); category pagination as fallback."""
+        last_run = load_last_run(self.db_path, "answeringhinduism")
+        sitemap = SitemapDiscovery(BASE_URL, aiohttp_fetcher(session), include=WP_POSTS)
+        
+        discovered = set()
+        async for url, lastmod in sitemap.discover(since=last_run):
+            if url.startswith(BASE_URL) and self.should_scrape(url):
+                clean_url = url.split('#')[0].split('?')[0]
+                discovered.add(clean_url)
+                if last_run and lastmod and lastmod > last_run:
+                    self.changed_urls.add(clean_url)
+        
+        # A failed child sitemap must be read again from the old cursor
+        self.sitemap_complete = sitemap.complete
+        if sitemap.found:
+            print(f"🗺️  Sitemap: {len(discovered)} new/changed articles "
+                  f"({sitemap.stats['unchanged']} unchanged since {last_run or 'never'})")
+            return list(discovered)
+        
+        print("⚠️ No usable sitemap. Falling back to category pagination.")
+        return await self.discover_urls_from_category(session)
+    
+    async def discover_urls_from_category(self, session: aiohttp.ClientSession) -> List[str]:
         """Crawl all pages under the Hinduism category using brute-force pagination."""
         discovered = set()
         base_category = f"{BASE_URL}/category/hinduism/"
@@ -213,29 +244,38 @@ class AnsweringHinduismScraper:
         
         await self.init_db()
         existing = await self.get_existing_urls()
+        run_started = datetime.now(timezone.utc)
         
         connector = aiohttp.TCPConnector(limit=self.concurrency)
         async with aiohttp.ClientSession(connector=connector) as session:
             # Discover URLs
             print("🔍 Discovering article URLs...")
             urls = await self.discover_urls(session)
-            new_urls = [u for u in urls if u not in existing]
+            new_urls = [u for u in urls if u not in existing or u in self.changed_urls]
             
             print(f"📊 Found {len(urls)} total, {len(new_urls)} new articles")
-            
             if not new_urls:
                 print("✨ All articles already scraped!")
-                return
             
             # Fetch articles
+            failed = 0
             for i, url in enumerate(new_urls):
                 print(f"📥 [{i+1}/{len(new_urls)}] Fetching: {url}")
                 article = await self.fetch_article(session, url)
                 if article:
                     await self.save_article(article)
                     print(f"   ✅ Saved: {article['title'][:50]}...")
+                else:
+                    failed += 1
                 await asyncio.sleep(1)  # Be polite
         
+        # Next run only needs sitemap entries modified after this one started, provided
+        # the sitemap was read in full and no article is left to retry from it
+        if self.sitemap_complete and not failed:
+            save_last_run(self.db_path, "answeringhinduism", run_started)
+        else:
+            print(f"⚠️ {failed} articles failed or the sitemap was not read in full; "
+                  f"discovery cursor left unchanged so they are found again")
         print("\n🎉 SCRAPING COMPLETE!")
 
 
@@ -12,11 +12,15 @@ import hashlib
 import re
 import html
 import os
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, List, Set, Optional, Generator
 from bs4 import BeautifulSoup
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from profiling.stages import PROFILER, add_profile_arguments, enable_from_args, profiled
+
 
 class DataSeparator:
     """Separates and cleans Islamic data for RAG."""
@@ -42,6 +46,7 @@ class DataSeparator:
     # =========================================================================
     
     @staticmethod
+    @profiled('clean_text')
     def clean_text(text: str) -> str:
         """Clean text without altering meaning."""
         if not text:
@@ -76,6 +81,7 @@ class DataSeparator:
         return bool(re.search(r'<[a-zA-Z][^>]*>', text))
     
     @staticmethod
+    @profiled('hash')
     def compute_hash(text: str) -> str:
         """Compute normalized text hash for deduplication."""
         if not text:
@@ -276,13 +282,15 @@ class DataSeparator:
             source = self.detect_source(record)
             
             if source == 'islamqa':
-                transformed = self.transform_islamqa(record)
+                with PROFILER.stage('transform', group='islamqa'):
+                    transformed = self.transform_islamqa(record)
                 if transformed:
                     yield ('islamqa', transformed)
                     self.stats["islamqa_records"] += 1
             
             elif source == 'sunnah':
-                transformed = self.transform_sunnah(record)
+                with PROFILER.stage('transform', group='sunnah'):
+                    transformed = self.transform_sunnah(record)
                 if transformed:
                     yield ('sunnah', transformed)
                     self.stats["sunnah_records"] += 1
@@ -311,12 +319,13 @@ class DataSeparator:
                     continue
                 
                 for source_type, record in self.process_database(db_path):
-                    if source_type == 'islamqa':
-                        islamqa_file.write(json.dumps(record, ensure_ascii=False) + '\n')
-                    elif source_type == 'sunnah':
-                        sunnah_file.write(json.dumps(record, ensure_ascii=False) + '\n')
-                    else:
-                        unclassified_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    with PROFILER.stage('write', group=source_type):
+                        if source_type == 'islamqa':
+                            islamqa_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+                        elif source_type == 'sunnah':
+                            sunnah_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+                        else:
+                            unclassified_file.write(json.dumps(record, ensure_ascii=False) + '\n')
         
         finally:
             islamqa_file.close()
@@ -331,7 +340,8 @@ class DataSeparator:
             json.dump(self.stats, f, indent=2)
         
         # Generate additional formats (RAG-ready)
-        self._generate_additional_formats()
+        with PROFILER.stage('additional_formats'):
+            self._generate_additional_formats()
         
         # Print summary
         self._print_summary()
@@ -426,8 +436,10 @@ Examples:
     parser.add_argument('--db', type=str, help='Specific database to process')
     parser.add_argument('--all', action='store_true', help='Process all .db files')
     parser.add_argument('--output', type=str, default='output', help='Output directory')
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
+    enable_from_args(args)
     
     args = parser.parse_args()
     
@@ -9,7 +9,6 @@ Max speed. System stability. Accurate counting.
 import asyncio
 import aiohttp
 import aiosqlite
-import psutil
 import time
 import sys
 import os
@@ -19,7 +18,13 @@ import html
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple, Set
+from typing import Dict, Any, List, Optional, Set
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from profiling.stages import PROFILER, add_profile_arguments, enable_from_args
+from system_monitor.governor import ResourceGovernor
+from progress.frontier import Frontier, frontier_path, retry_failed_command
+from throttle.retry import FetchResult, fetch_with_retry, TRANSIENT, PARSE_FAILURE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -29,45 +34,8 @@ logger = logging.getLogger(__name__)
 # 1. SYSTEM MONITORING & SAFETY
 # =============================================================================
 
-class SystemMonitor:
-    """Monitors system resources to prevent crashes."""
-    
-    def __init__(self, cpu_limit=90, ram_limit=85):
-        self.cpu_limit = cpu_limit
-        self.ram_limit = ram_limit
-        self.paused = False
-    
-    def check_health(self) -> Dict[str, Any]:
-        """Check current system health."""
-        cpu = psutil.cpu_percent(interval=None)
-        ram = psutil.virtual_memory().percent
-        disk = psutil.disk_usage('.').percent
-        
-        status = {
-            "cpu": cpu,
-            "ram": ram,
-            "disk": disk,
-            "safe": True
-        }
-        
-        if cpu > self.cpu_limit or ram > self.ram_limit:
-            status["safe"] = False
-        
-        return status
-    
-    async def throttle_if_needed(self):
-        """Pause if system is overloaded."""
-        while True:
-            health = self.check_health()
-            if health["safe"]:
-                if self.paused:
-                    logger.info("✅ System recovered. Resuming...")
-                    self.paused = False
-                return
-            
-            self.paused = True
-            logger.warning(f"⚠️ System Overload: CPU {health['cpu']}% | RAM {health['ram']}%. Throttling...")
-            await asyncio.sleep(2)  # Wait for recovery
+# Sampling and worker permits live in shared/system_monitor/governor.py:
+# one background sampler per run instead of psutil calls on every URL.
 
 # =============================================================================
 # 2. FORMAT-AGNOSTIC DATA HANDLER
@@ -150,16 +118,20 @@ class DataHandler:
 class MaxSpeedScraper:
     """Asyncio-based high-throughput scraper."""
     
-    def __init__(self, start_id: int, end_id: int, db_path: str = "data.db"):
+    def __init__(self, start_id: int, end_id: int, db_path: str = "data.db",
+                 base_url: str = "https://islamqa.info"):
         self.start_id = start_id
         self.end_id = end_id
         self.db_path = db_path
-        self.monitor = SystemMonitor()
+        self.base_url = base_url  # Overridden by the offline benchmarks
+        self.governor: Optional[ResourceGovernor] = None  # Sized from concurrency in run()
+        self.frontier: Optional[Frontier] = None  # Opened in run()
         self.handler = DataHandler(db_path)
         
         # Performance Tuning
         self.concurrency = 24  # Base concurrency
         self.batch_size = 50   # Flush to disk every N items
+        self.retry_horizon = 120  # Wait in-run for deferred retries due within this many seconds
         
         # State
         self.total_items = end_id - start_id + 1
@@ -169,14 +141,10 @@ class MaxSpeedScraper:
         self.start_time = time.time()
         self.visited = set()
     
-    async def fetch(self, session: aiohttp.ClientSession, url: str) -> Tuple[str, Optional[str]]:
-        try:
-            async with session.get(url, timeout=30) as response:
-                if response.status == 200:
-                    return url, await response.text()
-                return url, None # Handle 404/others
-        except Exception:
-            return url, None
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> FetchResult:
+        # Transient errors are retried with backoff (and Retry-After) before giving up
+        async with PROFILER.stage('fetch', group='islamqa'):
+            return await fetch_with_retry(session, url, timeout=30)
 
     def parse(self, html_content: str, url: str) -> Optional[Dict[str, Any]]:
         if not html_content:
@@ -238,24 +206,36 @@ class MaxSpeedScraper:
                 return
 
             try:
-                # Flow Control (silent unless critical)
-                health = self.monitor.check_health()
-                if not health["safe"]:
-                    await self.monitor.throttle_if_needed()
+                # Flow control: under pressure the governor hands out fewer permits,
+                # so some workers wait here while the rest keep going
+                async with PROFILER.stage('permit', group='islamqa'):
+                    await self.governor.acquire()
+                try:
+                    result = await self.fetch(session, url)
+                    data = None
+                    if result.ok:
+                        with PROFILER.stage('parse', group='islamqa'):
+                            data = self.parse(result.text, url)
+                finally:
+                    self.governor.release()
                 
-                # Scraping
-                _, content = await self.fetch(session, url)
-                
-                if content:
-                    data = self.parse(content, url)
-                    if data:
-                        results.append(data)
-                        self.success_count += 1
-                        # LIVE OUTPUT: Print question immediately
-                        q_preview = data['question'][:80] + "..." if len(data['question']) > 80 else data['question']
-                        # Clear line to prevent progress bar conflict, print question, then assume progress bar redraws
-                        sys.stdout.write(f"\r\033[K✅ [{data['id']}] {q_preview}\n")
-                        sys.stdout.flush()
+                if result.outcome == TRANSIENT:
+                    # Back to the frontier for a later attempt; not counted as processed yet
+                    self.error_count += 1
+                    self.frontier.fail(url, result.describe(), retry_in=result.retry_in, outcome=TRANSIENT)
+                    continue
+                if not data:
+                    # Missing IDs (404), blocks and unparseable pages are dead-lettered
+                    outcome = PARSE_FAILURE if result.ok else result.outcome
+                    self.frontier.fail(url, "unparseable page" if result.ok else result.describe(), outcome=outcome)
+                else:
+                    results.append(data)
+                    self.success_count += 1
+                    # LIVE OUTPUT: Print question immediately
+                    q_preview = data['question'][:80] + "..." if len(data['question']) > 80 else data['question']
+                    # Clear line to prevent progress bar conflict, print question, then assume progress bar redraws
+                    sys.stdout.write(f"\r\033[K✅ [{data['id']}] {q_preview}\n")
+                    sys.stdout.flush()
                 
                 self.processed += 1
                 
@@ -263,16 +243,52 @@ class MaxSpeedScraper:
                 if len(results) >= self.batch_size:
                     batch = results[:]
                     results.clear()
-                    await self.handler.save_batch(batch)
+                    async with PROFILER.stage('save_batch', group='islamqa'):
+                        await self.handler.save_batch(batch)
+                    self.ack(batch)
                     # self.print_progress() # Reduced spam, only question text is prioritized
                 elif self.processed % 50 == 0:
                      self.print_progress() # Show stats line every 50 items
                     
             except Exception as e:
                 self.error_count += 1
+                self.frontier.fail(url, f"{type(e).__name__}: {e}", retry_in=60, outcome=TRANSIENT)
             finally:
                 queue.task_done()
 
+    def ack(self, batch: List[Dict[str, Any]]):
+        """Mark saved items done in the frontier (only ever after save_batch)."""
+        for item in batch:
+            self.frontier.ack(item['url'])
+
+    async def feed(self, queue: asyncio.Queue):
+        """
+        Keeps the worker queue topped up from the frontier. Once nothing is
+        eligible it waits for the queue to drain and for deferred retries due
+        within retry_horizon; later ones are left for the next run.
+        """
+        while True:
+            if queue.qsize() < self.concurrency:
+                leased = self.frontier.lease(self.batch_size)
+                if not leased:
+                    await queue.join()
+                    self.frontier.flush()
+                    wait = self.frontier.next_eligible_in()
+                    if wait is None or wait > self.retry_horizon:
+                        return
+                    await asyncio.sleep(wait)
+                    continue
+                for url, _ in leased:
+                    queue.put_nowait(url)
+            await asyncio.sleep(0.05)
+
+    def report_dead_letters(self):
+        self.frontier.flush()
+        dead = self.frontier.dead_letters()
+        if any(outcome != "not_found" for outcome in dead):
+            print("\n🪦 Dead letters: " + ", ".join(f"{k} {v}" for k, v in sorted(dead.items())))
+            print("   Requeue with: python scraper.py retry-failed [OUTCOME ...|all]")
+
     def print_progress(self):
         elapsed = time.time() - self.start_time
         speed = self.processed / (elapsed / 60) if elapsed > 0 else 0
@@ -284,7 +300,8 @@ class MaxSpeedScraper:
             f"\r🚀 {speed:.0f} item/min | "
             f"Done: {self.success_count} | "
             f"Rem: {remaining} | "
-            f"ETA: {eta:.1f}m"
+            f"ETA: {eta:.1f}m | "
+            f"Workers: {self.governor.in_use}/{self.governor.permits}"
         )
         sys.stdout.flush()
 
@@ -295,48 +312,52 @@ class MaxSpeedScraper:
         
         await self.handler.init_db()
         
-        # Check resume
-        existing_urls = await self.handler.get_existing_urls()
-        
-        # Create Queue
-        queue = asyncio.Queue()
-        queued_count = 0
-        
-        for i in range(self.start_id, self.end_id + 1):
-            url = f"https://islamqa.info/en/answers/{i}"
-            if url not in existing_urls:
-                queue.put_nowait(url)
-                queued_count += 1
-            else:
-                self.processed += 1 # Already done
-                self.success_count += 1
+        # Resume from the durable frontier: URLs left in flight by a killed run go
+        # back to pending, and IDs already done are never fetched again
+        self.frontier = Frontier(frontier_path(self.db_path), site="islamqa_en")
+        if self.frontier.is_empty():
+            self.frontier.add(await self.handler.get_existing_urls(), done=True)
+        recovered = self.frontier.recover()
+        if recovered:
+            print(f"♻️  {recovered} URLs left in flight by the last run are queued again")
+        self.frontier.add(f"{self.base_url}/en/answers/{i}" for i in range(self.start_id, self.end_id + 1))
         
+        queued_count = self.frontier.counts()["pending"]
         self.total_to_process = queued_count
+        self.total_items = queued_count
         
         if queued_count == 0:
             print("✨ Nothing new to scrape!")
+            self.frontier.close()
             return
 
         # Workers
         connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
         timeout = aiohttp.ClientTimeout(total=45)
         
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        self.governor = ResourceGovernor(max_permits=self.concurrency, cpu_limit=90)
+        async with self.governor, aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            queue = asyncio.Queue()
             results = []
             workers = [
                 asyncio.create_task(self.worker(f"w-{i}", queue, session, results))
                 for i in range(self.concurrency)
             ]
             
-            await queue.join()
-            
-            # Cancel workers
-            for w in workers:
-                w.cancel()
-            
-            # Save final
-            if results:
-                await self.handler.save_batch(results)
+            try:
+                await self.feed(queue)
+                await queue.join()
+            finally:
+                # Cancel workers
+                for w in workers:
+                    w.cancel()
+                
+                # Save final
+                if results:
+                    await self.handler.save_batch(results)
+                    self.ack(results)
+                self.report_dead_letters()
+                self.frontier.close()
         
         print("\n\n🎉 COMPLETE!")
 
@@ -345,14 +366,25 @@ class MaxSpeedScraper:
 # =============================================================================
 
 def main():
+    # --profile flags are parsed here; the positional arguments stay in sys.argv
+    import argparse
+    profile_parser = argparse.ArgumentParser(add_help=False)
+    add_profile_arguments(profile_parser)
+    profile_args, sys.argv[1:] = profile_parser.parse_known_args()
+    enable_from_args(profile_args)
+
+    db_path = os.path.join(os.path.dirname(__file__), "data.db")
+    if sys.argv[1:2] == ["retry-failed"]:
+        retry_failed_command(db_path, "islamqa_en", sys.argv[2:])
+        return
+
     if len(sys.argv) < 3:
-        print("Usage: python max_throughput.py <START_ID|auto> <END_ID|+COUNT>")
+        print("Usage: python max_throughput.py <START_ID|auto> <END_ID|+COUNT> [--profile]")
         print("Examples:")
         print("  python max_throughput.py 200000 210000")
         print("  python max_throughput.py auto +10000")
+        print("  python max_throughput.py retry-failed [transient|blocked|parse_failure|not_found|all]")
         return
-
-    db_path = os.path.join(os.path.dirname(__file__), "data.db")
     
     # Handle Start ID
     if sys.argv[1].lower() == 'auto':
@@ -8,7 +8,6 @@ Optimized for Arabic RTL content and direct database storage.
 import asyncio
 import aiohttp
 import aiosqlite
-import psutil
 import time
 import sys
 import os
@@ -18,7 +17,12 @@ import html
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple, Set
+from typing import Dict, Any, List, Optional, Set
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from system_monitor.governor import ResourceGovernor
+from progress.frontier import Frontier, frontier_path, retry_failed_command
+from throttle.retry import FetchResult, fetch_with_retry, TRANSIENT, PARSE_FAILURE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -28,32 +32,7 @@ logger = logging.getLogger("IslamQA_AR")
 # 1. SYSTEM MONITORING & SAFETY
 # =============================================================================
 
-class SystemMonitor:
-    def __init__(self, cpu_limit=90, ram_limit=85):
-        self.cpu_limit = cpu_limit
-        self.ram_limit = ram_limit
-        self.paused = False
-    
-    def check_health(self) -> Dict[str, Any]:
-        cpu = psutil.cpu_percent(interval=None)
-        ram = psutil.virtual_memory().percent
-        status = {"cpu": cpu, "ram": ram, "safe": True}
-        if cpu > self.cpu_limit or ram > self.ram_limit:
-            status["safe"] = False
-        return status
-    
-    async def throttle_if_needed(self):
-        while True:
-            health = self.check_health()
-            if health["safe"]:
-                if self.paused:
-                    logger.info("✅ System recovered. Resuming...")
-                    self.paused = False
-                return
-            if not self.paused:
-                logger.warning(f"⚠️ System Overload (CPU {health['cpu']}%). Throttling...")
-            self.paused = True
-            await asyncio.sleep(5) # Increase sleep to 5s to allow cooling
+# Sampling and worker permits: shared/system_monitor/governor.py
 
 # =============================================================================
 # 2. DATA HANDLER
@@ -103,27 +82,25 @@ class DataHandler:
 # =============================================================================
 
 class ArabicScraper:
-    def __init__(self, start_id: int, end_id: int, db_path: str):
+    def __init__(self, start_id: int, end_id: int, db_path: str,
+                 base_url: str = "https://islamqa.info"):
         self.start_id = start_id
         self.end_id = end_id
         self.db_path = db_path
-        self.monitor = SystemMonitor(cpu_limit=95)
+        self.base_url = base_url  # Overridden by the offline benchmarks
+        self.governor: Optional[ResourceGovernor] = None  # Sized from concurrency in run()
+        self.frontier: Optional[Frontier] = None  # Opened in run()
         self.handler = DataHandler(db_path)
         self.concurrency = 50
         self.batch_size = 100
+        self.retry_horizon = 120  # Wait in-run for deferred retries due within this many seconds
         self.processed = 0
         self.success_count = 0
         self.start_time = time.time()
         self.total_range = end_id - start_id + 1
 
-    async def fetch(self, session: aiohttp.ClientSession, url: str) -> Tuple[str, Optional[str]]:
-        try:
-            async with session.get(url, timeout=30) as response:
-                if response.status == 200:
-                    return url, await response.text()
-                return url, None
-        except Exception:
-            return url, None
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> FetchResult:
+        return await fetch_with_retry(session, url, timeout=30)
 
     def parse(self, html_content: str, url: str) -> Optional[Dict[str, Any]]:
         try:
@@ -162,64 +139,101 @@ class ArabicScraper:
         while True:
             url = await queue.get()
             try:
-                await self.monitor.throttle_if_needed()
-                _, content = await self.fetch(session, url)
-                if content:
-                    data = self.parse(content, url)
-                    if data:
-                        results.append(data)
-                        self.success_count += 1
-                        q_preview = data['question'][:60] + "..." if len(data['question']) > 60 else data['question']
-                        sys.stdout.write(f"\r\033[K✅ [AR_{data['id'][3:]}] {q_preview}\n")
-                        sys.stdout.flush()
+                async with self.governor.permit():
+                    result = await self.fetch(session, url)
+                    data = self.parse(result.text, url) if result.ok else None
+                if result.outcome == TRANSIENT:
+                    # Retried later through the frontier, so not counted as processed yet
+                    self.frontier.fail(url, result.describe(), retry_in=result.retry_in, outcome=TRANSIENT)
+                    continue
+                if not data:
+                    outcome = PARSE_FAILURE if result.ok else result.outcome
+                    self.frontier.fail(url, "unparseable page" if result.ok else result.describe(), outcome=outcome)
+                else:
+                    results.append(data)
+                    self.success_count += 1
+                    q_preview = data['question'][:60] + "..." if len(data['question']) > 60 else data['question']
+                    sys.stdout.write(f"\r\033[K✅ [AR_{data['id'][3:]}] {q_preview}\n")
+                    sys.stdout.flush()
                 
                 self.processed += 1
                 if len(results) >= self.batch_size:
                     batch = results[:]
                     results.clear()
                     await self.handler.save_batch(batch)
+                    self.ack(batch)
                 elif self.processed % 50 == 0:
                     self.print_progress()
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Worker error: {e}")
+                self.frontier.fail(url, f"{type(e).__name__}: {e}", retry_in=60, outcome=TRANSIENT)
             finally:
                 queue.task_done()
 
+    def ack(self, batch: List[Dict[str, Any]]):
+        """Mark saved items done in the frontier (only ever after save_batch)."""
+        for item in batch:
+            self.frontier.ack(item['url'])
+
+    async def feed(self, queue: asyncio.Queue):
+        """
+        Keeps the worker queue topped up from the frontier, then waits for
+        deferred retries due within retry_horizon before returning.
+        """
+        while True:
+            if queue.qsize() < self.concurrency:
+                leased = self.frontier.lease(self.batch_size)
+                if not leased:
+                    await queue.join()
+                    self.frontier.flush()
+                    wait = self.frontier.next_eligible_in()
+                    if wait is None or wait > self.retry_horizon:
+                        return
+                    await asyncio.sleep(wait)
+                    continue
+                for url, _ in leased:
+                    queue.put_nowait(url)
+            await asyncio.sleep(0.05)
+
     def print_progress(self):
         elapsed = time.time() - self.start_time
         speed = self.processed / (elapsed / 60) if elapsed > 0 else 0
         rem = self.total_range - self.processed
         eta = rem / speed if speed > 0 else 0
-        sys.stdout.write(f"\r🚀 Arabic: {speed:.0f} p/m | Done: {self.success_count} | Rem: {rem} | ETA: {eta:.1f}m")
+        sys.stdout.write(f"\r🚀 Arabic: {speed:.0f} p/m | Done: {self.success_count} | Rem: {rem} | ETA: {eta:.1f}m"
+                         f" | Workers: {self.governor.in_use}/{self.governor.permits}")
         sys.stdout.flush()
 
     async def run(self):
         print(f"🔥 ARABIC SCRAPER | Range: {self.start_id} to {self.end_id}")
         await self.handler.init_db()
-        existing_urls = await self.handler.get_existing_urls()
-        
-        queue = asyncio.Queue()
-        queued = 0
-        for i in range(self.start_id, self.end_id + 1):
-            url = f"https://islamqa.info/ar/answers/{i}"
-            if url not in existing_urls:
-                queue.put_nowait(url)
-                queued += 1
-            else:
-                self.processed += 1
-                self.success_count += 1
+        # Durable frontier (shared/progress/frontier.py): a killed run's in-flight
+        # URLs are queued again and finished IDs are never recomputed
+        self.frontier = Frontier(frontier_path(self.db_path), site="islamqa_ar")
+        if self.frontier.is_empty():
+            self.frontier.add(await self.handler.get_existing_urls(), done=True)
+        recovered = self.frontier.recover()
+        if recovered:
+            print(f"♻️  {recovered} URLs left in flight by the last run are queued again")
+        self.frontier.add(f"{self.base_url}/ar/answers/{i}" for i in range(self.start_id, self.end_id + 1))
         
+        queued = self.frontier.counts()["pending"]
+        self.total_range = queued
         if queued == 0:
             print("✨ Arabic database is already up to date for this range.")
+            self.frontier.close()
             return
 
         connector = aiohttp.TCPConnector(limit=self.concurrency)
-        async with aiohttp.ClientSession(connector=connector) as session:
+        self.governor = ResourceGovernor(max_permits=self.concurrency, cpu_limit=95)
+        async with self.governor, aiohttp.ClientSession(connector=connector) as session:
+            queue = asyncio.Queue()
             results = []
             workers = [asyncio.create_task(self.worker(queue, session, results)) for _ in range(self.concurrency)]
             try:
+                await self.feed(queue)
                 await queue.join()
             except asyncio.CancelledError:
                 logger.info("🛑 Cancellation received. Wrapping up...")
@@ -228,14 +242,25 @@ class ArabicScraper:
                 if results: 
                     print(f"\n💾 Saving final batch of {len(results)} records...")
                     await self.handler.save_batch(results)
+                    self.ack(results)
+                self.frontier.flush()
+                dead = self.frontier.dead_letters()
+                self.frontier.close()
+        if any(outcome != "not_found" for outcome in dead):
+            print("\n🪦 Dead letters: " + ", ".join(f"{k} {v}" for k, v in sorted(dead.items())))
+            print("   Requeue with: python scraper.py retry-failed [OUTCOME ...|all]")
         print("\n\n🎉 ARABIC EXTRACTION PHASE COMPLETE!")
 
 def main():
+    db_path = os.path.join(os.path.dirname(__file__), "data.db")
+    if sys.argv[1:2] == ["retry-failed"]:
+        retry_failed_command(db_path, "islamqa_ar", sys.argv[2:])
+        return
+
     if len(sys.argv) < 3:
         print("Usage: python scraper.py <START_ID|auto> <END_ID|+COUNT>")
+        print("       python scraper.py retry-failed [transient|blocked|parse_failure|not_found|all]")
         return
-
-    db_path = os.path.join(os.path.dirname(__file__), "data.db")
     
     if sys.argv[1].lower() == 'auto':
         if not os.path.exists(db_path):
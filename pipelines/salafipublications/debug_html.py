@@ -1,10 +1,13 @@
-import sqlite3
+import os
+import sys
 from bs4 import BeautifulSoup
 
-conn = sqlite3.connect('pipelines/salafipublications/data.db')
-c = conn.cursor()
-c.execute("SELECT url, html FROM products LIMIT 1")
-row = c.fetchone()
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from archive.page_archive import PageArchive
+
+archive = PageArchive('pipelines/salafipublications/data.db', site="salafipublications")
+archive.absorb_legacy("products", meta_columns=['category_url'])
+row = next(archive.iter_pages(), None)
 if row:
     print(f"URL: {row[0]}")
     soup = BeautifulSoup(row[1], 'html.parser')
@@ -24,4 +27,4 @@ if row:
     print(soup.select_one('.woocommerce-product-details__short-description').get_text()[:200] if soup.select_one('.woocommerce-product-details__short-description') else "Not Found")
 else:
     print("No data")
-conn.close()
+archive.close()
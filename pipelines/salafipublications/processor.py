@@ -1,10 +1,14 @@
-import sqlite3
+import sys
 import json
 import re
 import os
 from bs4 import BeautifulSoup
 from typing import Dict, Optional
 
+# Add shared modules to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from archive.page_archive import PageArchive
+
 class SalafiProcessor:
     def __init__(self, db_path: str, output_path: str):
         self.db_path = db_path
@@ -91,20 +95,17 @@ class SalafiProcessor:
 
     def run(self):
         print("⚙️ PROCESSING SALAFI METADATA...")
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        
-        c.execute("SELECT url, html, category_url FROM products WHERE html IS NOT NULL")
-        rows = c.fetchall()
+        # Stream pages from the compressed archive instead of loading every HTML blob
+        archive = PageArchive(self.db_path, site="salafipublications")
+        archive.absorb_legacy("products", meta_columns=['category_url'])
         
         processed_data = []
-        for row in rows:
-            meta = self.extract_metadata(row['html'], row['url'])
+        for url, html, _ in archive.iter_pages():
+            meta = self.extract_metadata(html, url)
             if meta['title']:
                 processed_data.append(meta)
         
-        conn.close()
+        archive.close()
         
         with open(self.output_path, 'w', encoding='utf-8') as f:
             json.dump(processed_data, f, indent=2, ensure_ascii=False)
@@ -8,14 +8,22 @@ Crawls book metadata. Strictly ignores content.
 
 import asyncio
 import aiohttp
-import aiosqlite
 import os
 import re
+import sys
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from bs4 import BeautifulSoup
 from typing import Set, Optional
 
+# Add shared modules to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from archive.page_archive import PageArchive
+from throttle.host_limiter import HostRateLimiter
+from progress.frontier import Frontier, frontier_path, retry_failed_command
+from throttle.retry import FetchResult, fetch_with_retry, TRANSIENT
+from discovery.sitemap import SitemapDiscovery, aiohttp_fetcher, load_last_run, save_last_run, WC_PRODUCTS
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("SalafiScraper")
 
@@ -35,55 +43,48 @@ CATEGORIES = [
     f"{BASE_URL}/product-category/children/",
 ]
 
+# Politeness budget for the bookstore host (shared by listing and product pages)
+REQUESTS_PER_SECOND = 2.0
+# Deferred retries due within this many seconds are waited for before the run ends
+RETRY_HORIZON = 120
+
 class SalafiScraper:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, rate: float = REQUESTS_PER_SECOND):
         self.db_path = db_path
         self.concurrency = 5
         self.scraped_urls: Set[str] = set()
+        self.frontier: Optional[Frontier] = None
+        self.sitemap_complete = False
+        self.limiter = HostRateLimiter(rate=rate, max_concurrency=self.concurrency)
+        self.product_queue: Optional[asyncio.Queue] = None
         
     async def init_db(self):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS products (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT UNIQUE,
-                    html TEXT,
-                    scraped_at TEXT,
-                    category_url TEXT
-                )
-            ''')
-            await db.commit()
+        """Open the compressed raw-page archive (migrating old uncompressed rows)."""
+        self.archive = PageArchive(self.db_path, site="salafipublications")
+        # Product URLs to download live in the durable frontier; acks wait for the archive flush
+        self.frontier = Frontier(frontier_path(self.db_path), site="salafipublications", before_flush=self.archive.flush)
+        self.archive.absorb_legacy("products", meta_columns=['category_url'])
             
     async def get_existing_urls(self) -> Set[str]:
-        if not os.path.exists(self.db_path):
-            return set()
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute('SELECT url FROM products') as cursor:
-                rows = await cursor.fetchall()
-                logger.info(f"Loaded {len(rows)} existing URLs.")
-                return {row[0] for row in rows}
-
-    async def fetch_page(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
-        try:
-            # Add User-Agent to avoid 403 blocks (just in case)
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            async with session.get(url, headers=headers, timeout=30) as response:
-                if response.status == 200:
-                    return await response.text()
-                else:
-                    logger.warning(f"Failed to fetch {url}: Status {response.status}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {e}")
-            return None
+        """Load already scraped URLs to avoid duplication."""
+        urls = self.archive.urls()
+        if self.frontier.is_empty():
+            self.frontier.add(urls, done=True)
+        logger.info(f"Loaded {len(urls)} existing URLs.")
+        return urls
+
+    async def fetch_page(self, session: aiohttp.ClientSession, url: str) -> FetchResult:
+        """Fetch page HTML within the per-host rate, retrying transient errors with backoff."""
+        # Add User-Agent to avoid 403 blocks (just in case)
+        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+        result = await fetch_with_retry(session, url, limiter=self.limiter, headers=headers, timeout=30)
+        if not result.ok:
+            logger.warning(f"Failed to fetch {url}: {result.outcome} ({result.describe()}, {result.attempts} attempts)")
+        return result
 
     async def save_product(self, url: str, html: str, category_url: str):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                INSERT OR IGNORE INTO products (url, html, scraped_at, category_url)
-                VALUES (?, ?, ?, ?)
-            ''', (url, html, datetime.now().isoformat(), category_url))
-            await db.commit()
+        """Queue raw HTML for the archive (compressed, written in batches)."""
+        self.archive.add(url, html, category_url=category_url)
 
     async def process_category(self, session: aiohttp.ClientSession, category_url: str):
         logger.info(f"📂 Scanning Category: {category_url}")
@@ -97,11 +98,11 @@ class SalafiScraper:
                 url = footer_url = f"{category_url.rstrip('/')}/page/{page_num}/"
             
             logger.info(f"   📄 Page {page_num}...")
-            html = await self.fetch_page(session, url)
-            if not html:
+            result = await self.fetch_page(session, url)
+            if not result.ok:
                 break
             
-            soup = BeautifulSoup(html, 'html.parser')
+            soup = BeautifulSoup(result.text, 'html.parser')
             found_urls = set()
             
             # Selector strategies
@@ -128,21 +129,81 @@ class SalafiScraper:
                 # If truly empty
                 break
 
-            logger.info(f"   ✅ Found {len(found_urls)} new products on page {page_num}. Downloading...")
+            logger.info(f"   ✅ Found {len(found_urls)} new products on page {page_num}. Queued for download.")
             
-            for prod_url in found_urls:
-                if prod_url in self.scraped_urls:
-                    continue
-                    
+            # Hand products to the download workers; discovery moves straight on
+            self.frontier.add(found_urls, meta=category_url)
+
+            page_num += 1
+
+    async def discover_from_sitemap(self, session: aiohttp.ClientSession, since) -> bool:
+        """
+        Queues new or changed product URLs from the WooCommerce product sitemaps.
+        Returns False when the site has no usable sitemap.
+        """
+        sitemap = SitemapDiscovery(BASE_URL, aiohttp_fetcher(session, self.limiter), include=WC_PRODUCTS)
+        queued = 0
+        async for url, lastmod in sitemap.discover(since=since):
+            changed = since is not None and lastmod is not None and lastmod > since
+            # Changed products are re-downloaded over the stored copy
+            if changed:
+                self.frontier.add([url], meta="sitemap", requeue=True)
+                queued += 1
+            elif url not in self.scraped_urls:
+                queued += self.frontier.add([url], meta="sitemap")
+        if sitemap.found:
+            logger.info(f"🗺️  Sitemap: {queued} new/changed products ({sitemap.stats['unchanged']} unchanged)")
+        # A failed child sitemap must be read again from the old cursor
+        self.sitemap_complete = sitemap.complete
+        return sitemap.found
+
+    async def product_worker(self, session: aiohttp.ClientSession):
+        """Downloads queued product pages; the limiter keeps the host rate."""
+        while True:
+            prod_url, category_url = await self.product_queue.get()
+            try:
                 print(f"      📦 Downloading: {prod_url.split('/')[-2]}")
-                prod_html = await self.fetch_page(session, prod_url)
-                if prod_html:
-                    await self.save_product(prod_url, prod_html, category_url)
+                result = await self.fetch_page(session, prod_url)
+                if result.ok:
+                    await self.save_product(prod_url, result.text, category_url)
                     self.scraped_urls.add(prod_url)
-                await asyncio.sleep(0.5)
+                    self.frontier.ack(prod_url)
+                else:
+                    # Transient failures come back later; the rest are dead-lettered
+                    self.frontier.fail(prod_url, result.describe(), retry_in=result.retry_in, outcome=result.outcome)
+            except Exception as e:
+                logger.error(f"Error saving {prod_url}: {e}")
+                self.frontier.fail(prod_url, f"{type(e).__name__}: {e}", retry_in=60, outcome=TRANSIENT)
+            finally:
+                self.product_queue.task_done()
 
-            page_num += 1
-            await asyncio.sleep(1)
+    async def discover(self, session: aiohttp.ClientSession, since):
+        if not await self.discover_from_sitemap(session, since=since):
+            logger.info("⚠️ No usable sitemap. Falling back to category pagination.")
+            await asyncio.gather(*(self.process_category(session, category) for category in CATEGORIES))
+
+    async def feed(self, discovery: asyncio.Task):
+        """
+        Leases product URLs from the frontier to the workers while discovery
+        runs, until discovery is done and nothing eligible is left.
+        """
+        try:
+            while True:
+                if self.product_queue.qsize() < self.concurrency:
+                    leased = self.frontier.lease(self.concurrency * 2)
+                    for prod_url, category_url in leased:
+                        self.product_queue.put_nowait((prod_url, category_url))
+                    if not leased and discovery.done():
+                        # Drain, then wait for deferred retries that are due soon
+                        await self.product_queue.join()
+                        self.frontier.flush()
+                        wait = self.frontier.next_eligible_in()
+                        if wait is None or wait > RETRY_HORIZON:
+                            return await discovery
+                        await asyncio.sleep(wait)
+                await asyncio.sleep(0.1)
+        finally:
+            discovery.cancel()
 
     async def run(self):
         print("📚 SALAFI PUBLICATIONS METADATA SCRAPER")
@@ -150,17 +211,45 @@ class SalafiScraper:
         
         await self.init_db()
         self.scraped_urls = await self.get_existing_urls()
+        recovered = self.frontier.recover()
+        pending = self.frontier.counts()["pending"]
+        if pending:
+            # A killed run's backlog downloads straight away, alongside discovery
+            logger.info(f"♻️  Resuming {pending} queued products ({recovered} were in flight)")
         
-        connector = aiohttp.TCPConnector(limit=self.concurrency)
-        async with aiohttp.ClientSession(connector=connector) as session:
-            for category in CATEGORIES:
-                await self.process_category(session, category)
+        try:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            async with aiohttp.ClientSession(connector=connector) as session:
+                # Category pagination and product downloads run as one pipeline
+                self.product_queue = asyncio.Queue()
+                workers = [asyncio.create_task(self.product_worker(session)) for _ in range(self.concurrency)]
+                last_run = load_last_run(self.db_path, "salafipublications")
+                run_started = datetime.now(timezone.utc)
+                try:
+                    await self.feed(asyncio.create_task(self.discover(session, last_run)))
+                    await self.product_queue.join()
+                    if self.sitemap_complete:
+                        save_last_run(self.db_path, "salafipublications", run_started)
+                    else:
+                        logger.info("⚠️ Sitemap not read in full; discovery cursor left unchanged")
+                finally:
+                    # Stop workers before the frontier closes, even when the run is interrupted
+                    for w in workers:
+                        w.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            # Flush pages still buffered for the archive, then mark them done
+            self.frontier.close()
+            self.archive.close()
 
         print("\n🎉 SCRAPE COMPLETE!")
 
 def main():
     import sys
     db_path = os.path.join(os.path.dirname(__file__), "data.db")
+    if sys.argv[1:2] == ["retry-failed"]:
+        retry_failed_command(db_path, "salafipublications", sys.argv[2:])
+        return
     
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
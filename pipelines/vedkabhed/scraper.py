@@ -1,8 +1,9 @@
+import argparse
 import asyncio
 import os
-import json
 import logging
 import sys
+import aiohttp
 from datetime import datetime
 from pathlib import Path
 from playwright.async_api import async_playwright
@@ -11,19 +12,29 @@ from bs4 import BeautifulSoup
 
 # Add shared modules to path
 sys.path.append(os.path.join(os.getcwd(), 'shared'))
+from discovery.sitemap import SitemapDiscovery, WP_POSTS
+from throttle.host_limiter import HostRateLimiter
+from progress.state_journal import StateJournal, JsonlWriter
+from progress.frontier import Frontier, frontier_path, retry_failed_command
 try:
     from cleaners.text_cleaner import clean_text
-    from system_monitor.monitor import ResourceMonitor
+    from system_monitor.governor import ResourceGovernor
 except ImportError as e:
     print(f"Import Error: {e}")
     def clean_text(text): return text.strip()
-    class ResourceMonitor:
-        def check(self): pass
-        def get_stats(self): return "CPU: ? | RAM: ?"
+    class ResourceGovernor:
+        def __init__(self, max_permits, **kwargs): self.semaphore = asyncio.Semaphore(max_permits)
+        async def __aenter__(self): return self
+        async def __aexit__(self, *exc): return False
+        def permit(self): return self.semaphore
+        def get_stats(self): return "CPU: ? | RSS: ?"
 
 # Configuration
 OUTPUT_DIR = Path("pipelines/vedkabhed/output")
+FRONTIER_DB = frontier_path("pipelines/vedkabhed/data.db")
+# Resume state of earlier versions; imported into the frontier once
 STATE_FILE = Path("pipelines/vedkabhed/state.json")
+JOURNAL_FILE = Path("pipelines/vedkabhed/state.journal")
 BASE_URL = "https://vedkabhed.com"
 
 # Exact Categories from Meta Prompt
@@ -34,39 +45,96 @@ TARGET_CATEGORIES = [
     "Comments", "List of all Rebuttals"
 ]
 
+# Tabs sharing the verified browser context
+POOL_SIZE = 3
+# Not needed to parse posts (image URLs are read from the HTML)
+BLOCKED_RESOURCES = {"image", "font", "media"}
+# HTTP fast path: politeness budget and how many challenged responses in a row disable it
+HTTP_RATE = 2.0
+HTTP_MAX_MISSES = 5
+CHALLENGE_MARKERS = ("Just a moment", "cf-chl", "challenge-platform")
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s', datefmt='%H:%M:%S')
 logger = logging.getLogger("VedkaBhed")
 
+def is_category_url(url):
+    return "/category/" in url or "/list-of-all" in url
+
+def is_challenge(title):
+    return "Just a moment" in title or "Cloudflare" in title
+
+def is_challenge_html(status, html):
+    return status in (403, 429, 503) or any(m in html[:20000] for m in CHALLENGE_MARKERS)
+
+class ChallengeDetected(Exception):
+    pass
+
+def queue_priority(url, category):
+    """
+    Frontier lease order: TARGET_CATEGORIES order (unknown categories last),
+    and inside a category its listing pages before its posts, so discovery
+    keeps ahead of the workers.
+    """
+    wanted = (category or "").strip().lower()
+    level = next((i for i, name in enumerate(TARGET_CATEGORIES) if name.lower() == wanted), len(TARGET_CATEGORIES))
+    return level * 2 + (0 if is_category_url(url) else 1)
+
 class VedkaBhedScraper:
-    def __init__(self):
-        self.visited_urls = set()
-        self.post_queue = [] # [(url, category), ...]
+    def __init__(self, pool_size=POOL_SIZE, http_fast_path=True):
+        self.pool_size = pool_size
+        self.in_flight = 0
+        self.processed_in_session = 0
+        self.cleared = None # asyncio.Event, set while no tab is facing a challenge
+        self.http_fast_path = http_fast_path
+        self.http = None # aiohttp session carrying the browser's clearance cookies
+        self.http_misses = 0
+        self.limiter = HostRateLimiter(rate=HTTP_RATE, max_concurrency=pool_size)
         self.stats = {
             "total_posts": 0,
             "processed": 0,
             "remaining": 0,
+            "http_fetches": 0,
+            "browser_fetches": 0,
             "start_time": time.time()
         }
-        self.monitor = ResourceMonitor()
+        self.governor = ResourceGovernor(max_permits=pool_size)
         self.load_state()
 
     def load_state(self):
-        if STATE_FILE.exists():
-            try:
-                with open(STATE_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.visited_urls = set(data.get("visited", []))
-                    self.stats["processed"] = len(self.visited_urls)
-            except Exception as e:
-                logger.error(f"State load error: {e}")
         OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        self.output = JsonlWriter(OUTPUT_DIR / "vedkabhed_data.jsonl")
+        # Acks are committed only once the records they refer to are fsynced
+        self.frontier = Frontier(FRONTIER_DB, site="vedkabhed", before_flush=self.output.sync)
+        if self.frontier.is_empty():
+            self.import_journal()
+        recovered = self.frontier.recover()
+        if recovered:
+            logger.info(f"♻️ Recovered {recovered} in-flight URLs from an interrupted run")
+        self.stats["processed"] = self.frontier.counts()["done"]
+
+    def import_journal(self):
+        """Seeds the frontier from the state.json/state.journal of earlier versions."""
+        if not (STATE_FILE.exists() or JOURNAL_FILE.exists()):
+            return
+        journal = StateJournal(STATE_FILE, JOURNAL_FILE)
+        try:
+            journal.load()
+        except Exception as e:
+            logger.error(f"State load error: {e}")
+            return
+        self.frontier.add(journal.visited, done=True)
+        for url, category in journal.queued.items():
+            self.frontier.add([url], meta=category, priority=queue_priority(url, category))
+        journal.close()
+        logger.info(f"📥 Imported {len(journal.visited)} visited / {len(journal.queued)} queued URLs from {STATE_FILE.name}")
 
     def save_state(self):
-        with open(STATE_FILE, 'w', encoding='utf-8') as f:
-            json.dump({
-                "visited": list(self.visited_urls),
-                "stats": self.stats
-            }, f, indent=2)
+        """Checkpoint: records first (before_flush), then the acks that refer to them."""
+        self.frontier.flush()
+
+    def close_state(self):
+        self.frontier.close()
+        self.output.close()
 
     async def run(self):
         async with async_playwright() as p:
@@ -107,138 +175,217 @@ class VedkaBhedScraper:
             await page.goto(BASE_URL)
             
             # Wait for manual solve
-            while True:
-                title = await page.title()
-                if "Just a moment" not in title and "Cloudflare" not in title:
-                    logger.info("✅ Site content detected! Automation starting...")
-                    break
-                logger.info("⌛ Waiting for manual verification in browser...")
-                await asyncio.sleep(5)
+            await self.wait_for_clearance(page)
+            logger.info("✅ Site content detected! Automation starting...")
+            self.cleared = asyncio.Event()
+            self.cleared.set()
+            if self.http_fast_path:
+                await self.open_http_session(context, page)
             
             # Small delay to let page settle
             await asyncio.sleep(2)
             
-            # Phase 1: Category & Post Discovery
-            await self.discover_content(page)
+            # Phase 1: Category & Post Discovery (an interrupted run resumes from the frontier)
+            pending = self.frontier.counts()["pending"]
+            if pending:
+                logger.info(f"♻️ Resuming {pending} queued URLs from the frontier (discovery skipped)")
+            else:
+                await self.discover_content(page)
             
             # Phase 2: Processing
-            self.stats["total_posts"] = len(self.post_queue) + len(self.visited_urls)
-            self.stats["remaining"] = len(self.post_queue)
+            counts = self.frontier.counts()
+            self.stats["total_posts"] = counts["pending"] + counts["done"]
+            self.stats["remaining"] = counts["pending"]
             
             logger.info(f"📊 Discovery Complete. Total: {self.stats['total_posts']} | Remaining: {self.stats['remaining']}")
             
-            processed_in_session = 0
+            # Extra tabs reuse the cleared context; each gets static-asset blocking
+            pool = [await self.open_worker_page(context) for _ in range(self.pool_size)]
+            logger.info(f"🗂️  Page pool: {len(pool)} tabs")
+            try:
+                async with self.governor:
+                    await asyncio.gather(*(self.worker(wp) for wp in pool))
+            finally:
+                if self.http:
+                    await self.http.close()
+                self.stats["remaining"] = self.frontier.counts()["pending"]
+                self.close_state()
             
-            while self.post_queue:
-                self.monitor.check()
-                
-                url, category = self.post_queue.pop(0)
-
-                # Normalize Category URL (Ensure index.php is present if it's missing)
-                if ("/category/" in url or "/list-of-all" in url) and "index.php" not in url:
-                    url = url.replace("vedkabhed.com/", "vedkabhed.com/index.php/")
-
-                if url in self.visited_urls:
-                    self.stats["remaining"] -= 1
-                    continue
-
-                try:
-
-                    # Detect if Category URL
-                    if "/category/" in url or "/list-of-all" in url:
-                        logger.info(f"📂 Scanning Category: {url}")
-                        new_links = await self.scan_category(page, url, category)
-                        
-                        count_added = 0
-                        for link in new_links:
-                            if link not in self.visited_urls:
-                                self.post_queue.append((link, category))
-                                count_added += 1
-                        
-                        # Only mark category as visited if it actually worked or we want to skip it
-                        if new_links:
-                            self.visited_urls.add(url)
-                            self.stats["total_posts"] += count_added
-                            self.stats["remaining"] += count_added
-                        else:
-                            logger.warning(f"⚠️ Category {url} returned 0 results. Marking as visited.")
-                            self.visited_urls.add(url)
-                        
-                        self.stats["remaining"] -= 1
-                        continue
-                        
-                    data = await self.scrape_post(page, url, category)
-                    if data:
-                        self.save_record(data)
-                        self.visited_urls.add(url)
-                        self.stats["processed"] += 1
-                        self.stats["remaining"] -= 1
-                        processed_in_session += 1
-                        
-                        if processed_in_session % 5 == 0:
-                            self.print_progress(category)
-                            self.save_state()
-                            
-                except Exception as e:
-                    logger.error(f"❌ Error {url}: {e}")
-                
+            logger.info(f"🔀 Fetches: {self.stats['http_fetches']} over HTTP | {self.stats['browser_fetches']} in browser")
             await context.close()
             logger.info("✅ All tasks complete.")
-            self.stats["remaining"] = len(self.post_queue)
             logger.info(f"🏁 Final Stats: Total: {self.stats['total_posts']} | Processed: {self.stats['processed']} | Remaining: {self.stats['remaining']}")
 
+    async def open_http_session(self, context, page):
+        """Hands the solved challenge (cookies + exact user agent) to a plain aiohttp session."""
+        user_agent = await page.evaluate("navigator.userAgent")
+        self.http = aiohttp.ClientSession(
+            headers={"User-Agent": user_agent, "Accept-Language": "en-US,en;q=0.9"},
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+        await self.refresh_http_cookies(context)
+        logger.info("⚡ HTTP fast path enabled (browser cookies handed off)")
+
+    async def refresh_http_cookies(self, context):
+        cookies = await context.cookies(BASE_URL)
+        if self.http is not None:
+            self.http.cookie_jar.update_cookies({c["name"]: c["value"] for c in cookies})
+
+    async def fetch_html(self, page, url):
+        """
+        Returns (title, html). Tries one plain HTTP request first; a challenge
+        response falls back to a full browser navigation, whose (possibly
+        renewed) cookies are then handed back to the HTTP session.
+        """
+        # Another tab may retire the session while this one waits for its slot
+        http = self.http
+        if http is not None:
+            try:
+                async with self.limiter.slot(url), http.get(url) as response:
+                    html = await response.text()
+                    status = response.status
+                if not is_challenge_html(status, html):
+                    self.http_misses = 0
+                    self.stats["http_fetches"] += 1
+                    soup_title = BeautifulSoup(html[:20000], 'html.parser').title
+                    return (soup_title.get_text() if soup_title else ""), html
+                self.http_misses += 1
+                logger.info(f"   HTTP got a challenge ({status}), using browser: {url}")
+            except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError) as e:
+                # RuntimeError: the session was closed under us ("Session is closed")
+                if not http.closed:
+                    self.http_misses += 1
+                logger.info(f"   HTTP fetch failed ({e!r}), using browser: {url}")
+
+        await page.goto(url, timeout=30000)
+        title = await page.title()
+        if is_challenge(title):
+            raise ChallengeDetected(url)
+        self.stats["browser_fetches"] += 1
+
+        if self.http is not None:
+            if self.http_misses >= HTTP_MAX_MISSES:
+                logger.warning("⚠️ HTTP fast path keeps getting challenged. Continuing in browser only.")
+                http, self.http = self.http, None
+                await http.close()
+            else:
+                await self.refresh_http_cookies(page.context)
+        return title, await page.content()
+
+    async def wait_for_clearance(self, page):
+        while is_challenge(await page.title()):
+            logger.info("⌛ Waiting for manual verification in browser...")
+            await asyncio.sleep(5)
+
+    async def open_worker_page(self, context):
+        page = await context.new_page()
+
+        async def block_static(route):
+            if route.request.resource_type in BLOCKED_RESOURCES:
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await page.route("**/*", block_static)
+        return page
+
+    async def worker(self, page):
+        """Leases from the frontier until it is empty and no other tab can add more."""
+        while True:
+            leased = self.frontier.lease(1)
+            if not leased:
+                if self.in_flight == 0:
+                    break
+                # Another tab is scanning a category and may enqueue posts
+                await asyncio.sleep(0.5)
+                continue
+            url, category = leased[0]
+            
+            # Counted before the challenge pause: a held item must keep the other tabs alive
+            self.in_flight += 1
+            try:
+                await self.cleared.wait()
+                # Tabs beyond the governor's permits wait here while the machine is under pressure
+                async with self.governor.permit():
+                    await self.process_item(page, url, category)
+            except ChallengeDetected:
+                # Hold every tab so the pool does not keep hitting the challenge
+                self.frontier.release(url)
+                if self.cleared.is_set():
+                    self.cleared.clear()
+                    logger.warning("🛑 Challenge page detected. Pausing all tabs until it is solved...")
+                    await self.wait_for_clearance(page)
+                    self.cleared.set()
+                    logger.info("✅ Challenge cleared. Resuming.")
+            finally:
+                self.in_flight -= 1
+
+    async def process_item(self, page, url, category):
+        leased_url = url
+        # Normalize Category URL (Ensure index.php is present if it's missing)
+        if is_category_url(url) and "index.php" not in url:
+            url = url.replace("vedkabhed.com/", "vedkabhed.com/index.php/")
+
+        try:
+
+            # Detect if Category URL
+            if is_category_url(url):
+                logger.info(f"📂 Scanning Category: {url}")
+                new_links = await self.scan_category(page, url, category)
+                
+                # Posts are in the frontier before the listing is acked
+                count_added = self.frontier.add(new_links, meta=category, priority=queue_priority("", category))
+                if new_links:
+                    self.stats["total_posts"] += count_added
+                    self.stats["remaining"] += count_added
+                else:
+                    logger.warning(f"⚠️ Category {url} returned 0 results. Marking as visited.")
+                self.frontier.ack(leased_url)
+                
+                self.stats["remaining"] -= 1
+                return
+                
+            data = await self.scrape_post(page, url, category)
+            if data:
+                self.save_record(data)
+                self.frontier.ack(leased_url)
+                self.stats["processed"] += 1
+                self.stats["remaining"] -= 1
+                self.processed_in_session += 1
+                
+                if self.processed_in_session % 5 == 0:
+                    self.print_progress(category)
+                    self.save_state()
+            else:
+                self.frontier.fail(leased_url, "no article content", outcome="parse_failure")
+                self.stats["remaining"] -= 1
+                    
+        except ChallengeDetected:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error {url}: {e}")
+            self.frontier.fail(leased_url, f"{type(e).__name__}: {e}", retry_in=300, outcome="transient")
+
     async def discover_content(self, page):
         """Discover posts from categories."""
         logger.info("🔍 Phase 1: Discovering Content...")
         
         try:
-            # 1. Get Category Links
-            # Strategy: Try common sitemaps but proceed to Menu Crawl if they fail/404
-            sitemaps_to_try = [
-                f"{BASE_URL}/sitemap_index.xml",
-                f"{BASE_URL}/sitemap.xml",
-                f"{BASE_URL}/wp-sitemap.xml"
-            ]
-            
-            links_found = set()
-            
-            for sitemap_url in sitemaps_to_try:
-                try:
-                    logger.info(f"🔍 Checking Sitemap: {sitemap_url}")
-                    response = await page.goto(sitemap_url, timeout=30000)
-                    
-                    if not response or response.status != 200:
-                        logger.warning(f"   Sitemap {sitemap_url} returned status {response.status if response else 'None'}")
-                        continue
+            # 1. Sitemaps first (read through the verified browser session)
+            async def browser_fetch(url):
+                response = await page.goto(url, timeout=30000)
+                if response and response.status == 200:
+                    yield await response.body()
+                else:
+                    logger.warning(f"   Sitemap {url} returned status {response.status if response else 'None'}")
 
-                    # Parse Sitemap
-                    content = await page.content()
-                    if "loc" not in content.lower():
-                        continue
-                        
-                    soup = BeautifulSoup(content, 'lxml')
-                    post_sitemaps = [loc.text for loc in soup.find_all('loc') if 'post-sitemap' in loc.text or '-post-' in loc.text]
-                    
-                    if not post_sitemaps and "loc" in content.lower():
-                        # Maybe it's a direct post sitemap
-                        post_sitemaps = [sitemap_url]
-
-                    for sm in post_sitemaps:
-                        logger.info(f"📂 Scanning Sitemap: {sm}")
-                        await page.goto(sm, timeout=30000)
-                        content = await page.content()
-                        soup = BeautifulSoup(content, 'lxml')
-                        urls = [loc.text for loc in soup.find_all('loc')]
-                        for u in urls:
-                            if u not in self.visited_urls:
-                                links_found.add((u, "Detected"))
-                    
-                    if links_found:
-                        self.post_queue = list(links_found)
-                        return # Success
-                        
-                except Exception as e:
-                    logger.warning(f"   Failed to process sitemap {sitemap_url}: {e}")
+            sitemap = SitemapDiscovery(BASE_URL, browser_fetch, include=WP_POSTS)
+            links_found = [u async for u, _ in sitemap.discover()]
+
+            if links_found:
+                added = self.frontier.add(links_found, meta="Detected", priority=queue_priority("", "Detected"))
+                logger.info(f"🗺️ Sitemap: {len(links_found)} posts, {added} new")
+                return # Success
 
             if not links_found:
                 raise Exception("Empty Sitemap")
@@ -254,27 +401,30 @@ class VedkaBhedScraper:
             
             # Get all links
             links = await page.eval_on_selector_all('a', 'elements => elements.map(e => ({href: e.href, text: e.innerText}))')
+            matched = 0
             for l in links:
                 href = l['href']
                 # Prefer URLs with index.php if available, but keep as is if not
                 
                 # Loose matching for target categories
                 if any(c.lower() in l['text'].lower() for c in TARGET_CATEGORIES) and 'vedkabhed.com' in href:
-                     if href not in self.visited_urls:
-                          self.post_queue.append((href, l['text'].strip()))
+                     text = l['text'].strip()
+                     self.frontier.add([href], meta=text, priority=queue_priority(href, text))
+                     matched += 1
             
             # Also try to find "All Rebuttals" or similar
-            if not self.post_queue:
+            if not matched:
                 logger.info(f"Homepage crawl found {len(links)} links, but 0 matched targets.")
                 logger.info("Trying Direct Category URLs...")
                 
                 for cat in TARGET_CATEGORIES:
                     slug = cat.lower().replace(':', '').replace(' ', '-')
                     cat_url = f"{BASE_URL}/index.php/category/{slug}/"
-                    self.post_queue.append((cat_url, cat))
+                    self.frontier.add([cat_url], meta=cat, priority=queue_priority(cat_url, cat))
             
             # Also add /all-rebuttals/ if exists
-            self.post_queue.append((f"{BASE_URL}/index.php/list-of-all-rebuttals/", "General"))
+            all_url = f"{BASE_URL}/index.php/list-of-all-rebuttals/"
+            self.frontier.add([all_url], meta="General", priority=queue_priority(all_url, "General"))
         except Exception as e:
             logger.error(f"❌ Menu Crawl failed: {e}")
 
@@ -331,11 +481,8 @@ class VedkaBhedScraper:
         return list(links_found)
 
     async def scrape_post(self, page, url, category):
-        await page.goto(url, timeout=30000)
-        
         # Metadata Extraction
-        title = await page.title()
-        content = await page.content()
+        title, content = await self.fetch_html(page, url)
         soup = BeautifulSoup(content, 'html.parser')
         
         article = soup.find('article') or soup.find('div', class_='entry-content')
@@ -380,8 +527,7 @@ class VedkaBhedScraper:
         return time_tag.get('datetime') if time_tag else None
 
     def save_record(self, record):
-        with open(OUTPUT_DIR / "vedkabhed_data.jsonl", 'a', encoding='utf-8') as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.output.write(record)
 
     def print_progress(self, current_category):
         speed = self.stats['processed'] / (time.time() - self.stats['start_time']) * 60
@@ -390,8 +536,17 @@ class VedkaBhedScraper:
         print(f"Processed: {self.stats['processed']} / {self.stats['total_posts']}")
         print(f"Remaining: {self.stats['remaining']}")
         print(f"Speed: {speed:.1f} posts/min")
-        print(f"{self.monitor.get_stats()}")
+        print(f"{self.governor.get_stats()}")
 
 if __name__ == "__main__":
-    scraper = VedkaBhedScraper()
+    if sys.argv[1:2] == ["retry-failed"]:
+        retry_failed_command("pipelines/vedkabhed/data.db", "vedkabhed", sys.argv[2:])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Vedka Bhed Scraper")
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE, help="Browser tabs working in parallel")
+    parser.add_argument("--browser-only", action="store_true", help="Fetch every post through the browser (no HTTP fast path)")
+    args = parser.parse_args()
+
+    scraper = VedkaBhedScraper(pool_size=args.pool_size, http_fast_path=not args.browser_only)
     asyncio.run(scraper.run())
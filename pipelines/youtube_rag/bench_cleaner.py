@@ -0,0 +1,75 @@
+import re
+import sys
+import time
+import random
+
+from cleaner import SpokenTextCleaner
+
+def reference_filter_noise(segments, mode="lecture"):
+    """Per-segment cleaner as it was before batching; kept as the correctness/speed baseline."""
+    fillers = SpokenTextCleaner(mode).fillers
+    filler_pattern = re.compile("|".join(fillers), re.IGNORECASE)
+    out = []
+    for seg in segments:
+        text = filler_pattern.sub("", seg['text'])
+        for t in SpokenTextCleaner.MODE_PATTERNS.get(mode, []):
+            text = re.sub(t, "", text, flags=re.IGNORECASE)
+        text = re.sub(r"\b(\w+)(?:\s+\1\b)+", r"\1", text, flags=re.IGNORECASE)
+        text = " ".join(text.split())
+        if len(text.split()) < 3:
+            continue
+        text = re.sub(r"\[.*?\]", "", text)
+        text = re.sub(r"\(.*?\)", "", text)
+        if text.strip():
+            new_seg = seg.copy()
+            new_seg['text'] = text.strip()
+            out.append(new_seg)
+    return out
+
+def make_transcript(n_segments, seed=7):
+    """Synthetic Whisper-style transcript (~5s segments) with fillers, repeats and reactions."""
+    rng = random.Random(seed)
+    vocab = ("the evidence shows that this claim about the text must be verified against "
+             "the original sources and the historical context of revelation").split()
+    noise = ["uh", "um", "you know", "I mean", "like", "so", "basically", "the the",
+             "[laughter]", "(applause)", "welcome back", "shut up", "right"]
+    segments = []
+    for i in range(n_segments):
+        words = [rng.choice(vocab) for _ in range(rng.randint(2, 18))]
+        for _ in range(rng.randint(0, 4)):
+            words.insert(rng.randint(0, len(words)), rng.choice(noise))
+        text = " ".join(words) + rng.choice([".", "?", "!", ","])
+        segments.append({"start": i * 5.0, "end": i * 5.0 + 5.0, "text": text})
+    return segments
+
+def bench(n_segments=50000, mode="lecture"):
+    segments = make_transcript(n_segments)
+    print(f"🧪 Cleaner benchmark: {n_segments} segments (~{n_segments * 5 / 3600:.1f}h of audio), mode={mode}")
+
+    t0 = time.perf_counter()
+    expected = reference_filter_noise(segments, mode)
+    ref_time = time.perf_counter() - t0
+
+    cleaner = SpokenTextCleaner(mode=mode)
+    t0 = time.perf_counter()
+    # Same batching as the runner: one ~60s window (12 segments) per call
+    got = []
+    for i in range(0, len(segments), 12):
+        got.extend(cleaner.filter_noise(segments[i:i + 12]))
+    batch_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    whole = cleaner.filter_noise(segments)
+    whole_time = time.perf_counter() - t0
+
+    match = got == expected and whole == expected
+    print(f"  per-segment (reference): {ref_time:.3f}s  ({n_segments / ref_time:,.0f} seg/s)")
+    print(f"  precompiled, 60s windows: {batch_time:.3f}s  ({n_segments / batch_time:,.0f} seg/s)")
+    print(f"  precompiled, whole file:  {whole_time:.3f}s  ({n_segments / whole_time:,.0f} seg/s)")
+    print(f"  {'✅' if match else '❌'} Output identical to reference: {match}")
+    return match
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    mode = sys.argv[2] if len(sys.argv) > 2 else "lecture"
+    sys.exit(0 if bench(n, mode) else 1)
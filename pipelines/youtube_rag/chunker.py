@@ -1,18 +1,109 @@
 import json
 import os
+import sqlite3
+import hashlib
+
+class SegmentEmbedder:
+    """
+    Batched CPU sentence embeddings for transcript segments.
+    Vectors are cached per (model, segment text) in memory and, if cache_path is
+    given, in a small SQLite file, so re-chunking with new thresholds (or a rerun
+    replayed from the transcript cache) does not re-run the model.
+    """
+    def __init__(self, model_name="all-MiniLM-L6-v2", batch_size=64, cache_path=None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = None
+        self.memory = {}
+        self.conn = None
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            self.conn = sqlite3.connect(cache_path)
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT,
+                    text_hash TEXT,
+                    vector BLOB,
+                    PRIMARY KEY (model, text_hash)
+                )
+            ''')
+            self.conn.commit()
+
+    def _load_model(self):
+        if self.model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise ImportError("Embedding chunking needs sentence-transformers: pip install sentence-transformers")
+            print(f"🧠 Loading embedding model ({self.model_name}) on CPU...")
+            self.model = SentenceTransformer(self.model_name, device="cpu")
+        return self.model
+
+    def embed(self, texts):
+        """Returns an (n, dim) float32 array of L2-normalised embeddings."""
+        import numpy as np
+
+        keys = [hashlib.sha1(t.encode("utf-8")).hexdigest() for t in texts]
+        missing = [k for k in dict.fromkeys(keys) if k not in self.memory]
+
+        if missing and self.conn:
+            for i in range(0, len(missing), 500):
+                part = missing[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(part))})",
+                    [self.model_name] + part
+                ).fetchall()
+                for k, blob in rows:
+                    self.memory[k] = np.frombuffer(blob, dtype=np.float32)
+            missing = [k for k in missing if k not in self.memory]
+
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            new_texts = [text_by_key[k] for k in missing]
+            vectors = self._load_model().encode(
+                new_texts, batch_size=self.batch_size, convert_to_numpy=True,
+                normalize_embeddings=True, show_progress_bar=False
+            ).astype(np.float32)
+            for k, v in zip(missing, vectors):
+                self.memory[k] = v
+            if self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                    [(self.model_name, k, v.tobytes()) for k, v in zip(missing, vectors)]
+                )
+                self.conn.commit()
+
+        return np.vstack([self.memory[k] for k in keys])
 
 class SemanticChunker:
-    def __init__(self, max_words=150, min_words=50):
+    def __init__(self, max_words=150, min_words=50, strategy="heuristic", embedder=None,
+                 breakpoint_percentile=25, similarity_threshold=None):
+        """
+        strategy: "heuristic" (word counts + punctuation) or "embedding"
+        (cut at topic shifts between adjacent segments, within min/max words).
+        Topic shifts are similarity drops below similarity_threshold if set,
+        otherwise below the breakpoint_percentile of the batch's similarities.
+        """
         self.max_words = max_words
         self.min_words = min_words
+        self.strategy = strategy
+        self.breakpoint_percentile = breakpoint_percentile
+        self.similarity_threshold = similarity_threshold
+        self.embedder = embedder
+        if strategy == "embedding" and self.embedder is None:
+            self.embedder = SegmentEmbedder()
 
     def chunk_segments(self, segments):
         """
         Chunks segments by idea/topic.
-        Since we don't have a transformer-based topic detector here, 
-        we use sentence-boundary and word-count heuristics to group segments.
+        The heuristic strategy has no topic detector: it uses sentence-boundary
+        and word-count heuristics to group segments. The embedding strategy
+        uses adjacent-segment similarity to find topic shifts.
         One chunk should ideally contain one cohesive thought.
         """
+        if self.strategy == "embedding" and len(segments) > 1:
+            return self._chunk_by_embedding(segments)
+
         chunks = []
         current_chunk = {
             "text": "",
@@ -20,21 +111,21 @@ class SemanticChunker:
             "end": 0,
             "metadata": {"segment_count": 0}
         }
-        
+
         word_count = 0
         for seg in segments:
             text = seg['text']
             word_count += len(text.split())
-            
+
             if not current_chunk["text"]:
                 current_chunk["start"] = seg['start']
                 current_chunk["text"] = text
             else:
                 current_chunk["text"] += " " + text
-            
+
             current_chunk["end"] = seg['end']
             current_chunk["metadata"]["segment_count"] += 1
-            
+
             # If chunk is large enough and seems to end a thought (ending in . ? !)
             if word_count >= self.min_words:
                 if text.endswith(('.', '?', '!')) or word_count >= self.max_words:
@@ -46,11 +137,62 @@ class SemanticChunker:
                         "metadata": {"segment_count": 0}
                     }
                     word_count = 0
-        
+
         # Add trailing
         if current_chunk["text"]:
             chunks.append(current_chunk)
-            
+
+        return chunks
+
+    def topic_breaks(self, embeddings):
+        """
+        Vectorised pass over adjacent cosine similarities.
+        breaks[i] is True when there is a topic shift between segment i and i+1.
+        """
+        import numpy as np
+
+        sims = np.einsum("ij,ij->i", embeddings[:-1], embeddings[1:])
+        if self.similarity_threshold is not None:
+            threshold = self.similarity_threshold
+        else:
+            threshold = np.percentile(sims, self.breakpoint_percentile)
+        return sims < threshold, sims
+
+    def _chunk_by_embedding(self, segments):
+        texts = [seg['text'] for seg in segments]
+        embeddings = self.embedder.embed(texts)
+        breaks, sims = self.topic_breaks(embeddings)
+        word_counts = [len(t.split()) for t in texts]
+
+        chunks = []
+        first = 0
+        word_count = 0
+        for i, seg in enumerate(segments):
+            word_count += word_counts[i]
+            is_last = i == len(segments) - 1
+            reason = None
+            if word_count >= self.max_words:
+                reason = "max_words"
+            elif word_count >= self.min_words and not is_last and breaks[i]:
+                reason = "topic_shift"
+            elif is_last:
+                reason = "end"
+
+            if reason:
+                group = segments[first:i + 1]
+                chunks.append({
+                    "text": " ".join(texts[first:i + 1]),
+                    "start": group[0]['start'],
+                    "end": group[-1]['end'],
+                    "metadata": {
+                        "segment_count": len(group),
+                        "boundary": reason,
+                        "boundary_similarity": float(sims[i]) if not is_last else None
+                    }
+                })
+                first = i + 1
+                word_count = 0
+
         return chunks
 
 if __name__ == "__main__":
@@ -2,7 +2,26 @@ import re
 import json
 import os
 
+def combine_word_patterns(patterns):
+    """
+    Merges r"\bphrase\b" patterns into one alternation. A first-letter lookahead
+    lets the regex engine skip most word starts without trying every branch.
+    """
+    bodies = [p[2:-2] for p in patterns if p.startswith(r"\b") and p.endswith(r"\b")]
+    if len(bodies) != len(patterns) or not all(b[:1].isalpha() for b in bodies):
+        return re.compile("|".join(patterns), re.IGNORECASE)
+    first_letters = "".join(sorted({b[0].lower() for b in bodies}))
+    return re.compile(r"\b(?=[" + first_letters + r"])(?:" + "|".join(bodies) + r")\b", re.IGNORECASE)
+
 class SpokenTextCleaner:
+    # Category-specific noise, removed in the same pass as the common fillers
+    MODE_PATTERNS = {
+        # Remove high-emotional/taunting keywords (simple list for now)
+        "debate": [r"\byou're wrong\b", r"\bshut up\b", r"\bstupid\b"],
+        # Remove motivational/repetitive introductory phrases
+        "lecture": [r"\bwelcome back\b", r"\bthank you for joining\b", r"\bbefore we start\b"],
+    }
+
     def __init__(self, mode="lecture"):
         """
         mode: "debate" or "lecture"
@@ -15,51 +34,49 @@ class SpokenTextCleaner:
             r"\blike\b", r"\bright\b", r"\bso\b", r"\banyway\b",
             r"\bat the end of the day\b", r"\bbasically\b", r"\bliterally\b"
         ]
-        self.filler_pattern = re.compile("|".join(self.fillers), re.IGNORECASE)
+        # All patterns are compiled once per cleaner (i.e. once per video).
+        # Batches are joined with "\n", so none of them may match across a newline.
+        self.noise_pattern = combine_word_patterns(self.fillers + self.MODE_PATTERNS.get(self.mode, []))
+        self.repeat_pattern = re.compile(r"\b(\w+)(?:[^\S\n]+\1\b)+", re.IGNORECASE)
+        self.reaction_pattern = re.compile(r"\[.*?\]|\(.*?\)")
 
-    def clean_segment(self, text):
+    def clean_batch(self, texts):
         """
         Stage 3 Implementation: Aggressive Spoken-Text Cleaning
+        Cleans a whole batch of segment texts with one regex pass per rule.
         """
-        # 1. Remove fillers
-        text = self.filler_pattern.sub("", text)
-        
-        # 2. Remove categorization-specific noise
-        if self.mode == "debate":
-            # Remove high-emotional/taunting keywords (simple list for now)
-            taunts = [r"\byou're wrong\b", r"\bshut up\b", r"\bstupid\b"]
-            for t in taunts:
-                text = re.sub(t, "", text, flags=re.IGNORECASE)
-        elif self.mode == "lecture":
-            # Remove motivational/repetitive introductory phrases
-            motivational = [r"\bwelcome back\b", r"\bthank you for joining\b", r"\bbefore we start\b"]
-            for m in motivational:
-                text = re.sub(m, "", text, flags=re.IGNORECASE)
+        if not texts:
+            return []
+        joined = "\n".join(t.replace("\n", " ") for t in texts)
 
-        # 3. Remove repeated words/phrases (simple back-to-back)
-        text = re.sub(r"\b(\w+)(?:\s+\1\b)+", r"\1", text, flags=re.IGNORECASE)
-        
-        # 4. Normalize whitespace
-        text = " ".join(text.split())
-        
-        return text
+        # 1. Remove fillers + categorization-specific noise
+        joined = self.noise_pattern.sub("", joined)
+
+        # 2. Remove repeated words/phrases (simple back-to-back)
+        joined = self.repeat_pattern.sub(r"\1", joined)
+
+        # 3. Normalize whitespace
+        return [" ".join(line.split()) for line in joined.split("\n")]
+
+    def clean_segment(self, text):
+        return self.clean_batch([text])[0]
 
     def filter_noise(self, segments):
         """
         Processes a list of segments and removes low-signal ones.
         """
+        texts = self.clean_batch([seg['text'] for seg in segments])
+
+        # Reject if too short
+        kept = [(seg, text) for seg, text in zip(segments, texts) if len(text.split()) >= 3]
+        if not kept:
+            return []
+
+        # Remove audience reactions
+        stripped = self.reaction_pattern.sub("", "\n".join(text for _, text in kept)).split("\n")
+
         cleaned_segments = []
-        for seg in segments:
-            text = self.clean_segment(seg['text'])
-            
-            # Reject if too short
-            if len(text.split()) < 3:
-                continue
-                
-            # Remove audience reactions
-            text = re.sub(r"\[.*?\]", "", text)
-            text = re.sub(r"\(.*?\)", "", text)
-            
+        for (seg, _), text in zip(kept, stripped):
             if text.strip():
                 new_seg = seg.copy()
                 new_seg['text'] = text.strip()
@@ -6,11 +6,14 @@ from datetime import datetime
 class YouTubeRAGDB:
     def __init__(self, db_path):
         self.db_path = db_path
+        # One long-lived connection; WAL lets stats.py read while the runner writes.
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
         self._init_db()
         
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        c = self.conn.cursor()
         c.execute('''
             CREATE TABLE IF NOT EXISTS videos (
                 video_id TEXT PRIMARY KEY,
@@ -18,17 +21,10 @@ class YouTubeRAGDB:
                 title TEXT,
                 processed_at TEXT,
                 current_stage TEXT DEFAULT 'intake',
-                last_error TEXT
+                last_error TEXT,
+                chunk_count INTEGER DEFAULT 0
             )
         ''')
-        # Migration: Check if columns exist (for existing DBs)
-        c.execute("PRAGMA table_info(videos)")
-        cols = [col[1] for col in c.fetchall()]
-        if 'current_stage' not in cols:
-            c.execute("ALTER TABLE videos ADD COLUMN current_stage TEXT DEFAULT 'intake'")
-        if 'last_error' not in cols:
-            c.execute("ALTER TABLE videos ADD COLUMN last_error TEXT")
-
         c.execute('''
             CREATE TABLE IF NOT EXISTS chunks (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -42,77 +38,85 @@ class YouTubeRAGDB:
                 FOREIGN KEY(video_id) REFERENCES videos(video_id)
             )
         ''')
-        conn.commit()
-        conn.close()
+
+        # Migration: Check if columns exist (for existing DBs)
+        c.execute("PRAGMA table_info(videos)")
+        cols = [col[1] for col in c.fetchall()]
+        if 'current_stage' not in cols:
+            c.execute("ALTER TABLE videos ADD COLUMN current_stage TEXT DEFAULT 'intake'")
+        if 'last_error' not in cols:
+            c.execute("ALTER TABLE videos ADD COLUMN last_error TEXT")
+        if 'chunk_count' not in cols:
+            c.execute("ALTER TABLE videos ADD COLUMN chunk_count INTEGER DEFAULT 0")
+            c.execute('''
+                UPDATE videos SET chunk_count =
+                    (SELECT COUNT(*) FROM chunks WHERE chunks.video_id = videos.video_id)
+            ''')
+
+        # Indexes: ordered export / resume lookups stay O(log n) per video
+        c.execute("CREATE INDEX IF NOT EXISTS idx_chunks_video_start ON chunks(video_id, start_time)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_chunks_video_end ON chunks(video_id, end_time)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
 
     def add_video(self, video_id, url, title=None):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('INSERT OR IGNORE INTO videos (video_id, url, title, processed_at) VALUES (?, ?, ?, ?)',
-                  (video_id, url, title, datetime.now().isoformat()))
-        conn.commit()
-        conn.close()
+        with self.conn:
+            self.conn.execute('INSERT OR IGNORE INTO videos (video_id, url, title, processed_at) VALUES (?, ?, ?, ?)',
+                              (video_id, url, title, datetime.now().isoformat()))
 
     def update_video_status(self, video_id, stage, error=None):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('UPDATE videos SET current_stage = ?, last_error = ? WHERE video_id = ?',
-                  (stage, error, video_id))
-        conn.commit()
-        conn.close()
+        with self.conn:
+            self.conn.execute('UPDATE videos SET current_stage = ?, last_error = ? WHERE video_id = ?',
+                              (stage, error, video_id))
 
     def get_video_status(self, video_id):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('SELECT current_stage, last_error FROM videos WHERE video_id = ?', (video_id,))
-        row = c.fetchone()
-        conn.close()
+        row = self.conn.execute('SELECT current_stage, last_error FROM videos WHERE video_id = ?', (video_id,)).fetchone()
         return row if row else (None, None)
 
     def add_chunks(self, video_id, chunks):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        for chunk in chunks:
-            c.execute('''
+        if not chunks:
+            return
+        created_at = datetime.now().isoformat()
+        rows = [(
+            video_id,
+            chunk['text'],
+            chunk.get('start'),
+            chunk.get('end'),
+            chunk.get('speaker'),
+            json.dumps(chunk.get('metadata', {})),
+            created_at
+        ) for chunk in chunks]
+        with self.conn:
+            self.conn.executemany('''
                 INSERT INTO chunks (video_id, text, start_time, end_time, speaker, metadata, created_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                video_id,
-                chunk['text'],
-                chunk.get('start'),
-                chunk.get('end'),
-                chunk.get('speaker'),
-                json.dumps(chunk.get('metadata', {})),
-                datetime.now().isoformat()
-            ))
-        conn.commit()
-        conn.close()
+            ''', rows)
+            self.conn.execute('UPDATE videos SET chunk_count = chunk_count + ? WHERE video_id = ?',
+                              (len(rows), video_id))
 
     def get_chunks(self, video_id):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
+        c = self.conn.cursor()
+        c.row_factory = sqlite3.Row
         c.execute('SELECT text, start_time as start, end_time as end, speaker, metadata FROM chunks WHERE video_id = ? ORDER BY start_time', (video_id,))
         rows = [dict(row) for row in c.fetchall()]
         for r in rows:
             r['metadata'] = json.loads(r['metadata'])
-        conn.close()
         return rows
 
     def get_last_chunk_end_time(self, video_id):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('SELECT MAX(end_time) FROM chunks WHERE video_id = ?', (video_id,))
-        row = c.fetchone()
-        conn.close()
+        row = self.conn.execute('SELECT MAX(end_time) FROM chunks WHERE video_id = ?', (video_id,)).fetchone()
         return row[0] if row and row[0] is not None else 0.0
 
+    def get_chunk_counts(self):
+        """Per-video chunk totals from the maintained counter (no scan of chunks)."""
+        return dict(self.conn.execute('SELECT video_id, chunk_count FROM videos').fetchall())
+
     def delete_chunks(self, video_id):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('DELETE FROM chunks WHERE video_id = ?', (video_id,))
-        conn.commit()
-        conn.close()
+        with self.conn:
+            self.conn.execute('DELETE FROM chunks WHERE video_id = ?', (video_id,))
+            self.conn.execute('UPDATE videos SET chunk_count = 0 WHERE video_id = ?', (video_id,))
 
 if __name__ == "__main__":
     base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -4,26 +4,34 @@ import json
 import argparse
 from pathlib import Path
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from profiling.stages import PROFILER, add_profile_arguments, enable_from_args
+
 # Local imports
 from downloader import download_audio
-from transcriber import transcribe_audio
+from transcriber import transcribe_audio, BACKEND, SEGMENT_LENGTH
+from transcript_cache import TranscriptCache
 from cleaner import SpokenTextCleaner
-from chunker import SemanticChunker
+from chunker import SemanticChunker, SegmentEmbedder
 from validator import ChunkValidator
 from db_handler import YouTubeRAGDB
 
 class YouTubeRAGPipeline:
-    def __init__(self):
+    def __init__(self, chunk_strategy="heuristic"):
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
         self.audio_dir = os.path.join(self.base_dir, "audio")
         self.transcripts_dir = os.path.join(self.base_dir, "transcripts")
+        self.transcript_cache_dir = os.path.join(self.transcripts_dir, "cache")
         self.output_dir = os.path.join(self.base_dir, "output")
         self.db_path = os.path.join(self.base_dir, "db", "youtube_rag.db")
         self.prompts_dir = os.path.join(self.base_dir, "prompts")
         
         self.db = YouTubeRAGDB(self.db_path)
         self.validator = ChunkValidator()
-        self.chunker = SemanticChunker()
+        embedder = None
+        if chunk_strategy == "embedding":
+            embedder = SegmentEmbedder(cache_path=os.path.join(self.transcript_cache_dir, "embeddings.db"))
+        self.chunker = SemanticChunker(strategy=chunk_strategy, embedder=embedder)
 
     def load_prompt(self, stage_name):
         path = os.path.join(self.prompts_dir, f"{stage_name}.md")
@@ -32,7 +40,7 @@ class YouTubeRAGPipeline:
                 return f.read()
         return f"Prompt for {stage_name} not found."
 
-    def process_url(self, url, content_type="lecture", model_name="small"):
+    def process_url(self, url, content_type="lecture", model_name="small", use_cache=True):
         """
         Stream-Aware Pipeline Execution
         """
@@ -51,7 +59,8 @@ class YouTubeRAGPipeline:
             # 1. DOWNLOAD
             if current_status is None or current_status == "FAILED_AT_download":
                 print(f"📦 STAGE 1: DOWNLOAD")
-                audio_path = download_audio(url, self.audio_dir)
+                with PROFILER.stage('download'):
+                    audio_path = download_audio(url, self.audio_dir)
                 if not audio_path: raise Exception("Download failed.")
                 self.db.update_video_status(video_id, "download")
                 current_status = "download"
@@ -68,13 +77,28 @@ class YouTubeRAGPipeline:
                 if last_offset > 0:
                     print(f"🔄 RESUMING FROM CHECKPOINT: {last_offset:.2f} seconds")
                 
-                # This call will block until all segments are done, 
-                # but will execute our callback for each segment.
-                # We pass the last_offset to skip already processed segments.
-                transcribe_audio(audio_path, model_name, partial_callback=self._on_segment_ready, start_offset=last_offset)
+                # Raw Whisper output only depends on audio + model settings, so a
+                # rerun after cleaner/chunker changes replays it from the cache.
+                cache = None
+                if use_cache:
+                    cache = TranscriptCache(self.transcript_cache_dir, audio_path, model_name, BACKEND, SEGMENT_LENGTH)
+                
+                # Segment stages (clean/chunk/validate/persist) nest under this one
+                if cache and cache.is_complete():
+                    print(f"♻️  TRANSCRIPT CACHE HIT ({cache.key}): replaying segments")
+                    with PROFILER.stage('replay'):
+                        cache.replay(self._on_segment_ready, start_offset=last_offset)
+                else:
+                    # This call will block until all segments are done, 
+                    # but will execute our callback for each segment.
+                    # We pass the last_offset to skip already processed segments.
+                    with PROFILER.stage('transcribe'):
+                        transcribe_audio(audio_path, model_name, partial_callback=self._on_segment_ready,
+                                         start_offset=last_offset, segment_length=SEGMENT_LENGTH, cache=cache)
                 
                 # Final Export (Text and JSON) from DB
-                self._final_export(video_id, url, content_type)
+                with PROFILER.stage('export'):
+                    self._final_export(video_id, url, content_type)
                 self.db.update_video_status(video_id, "complete")
                 print(f"✨ SUCCESS: Fully Processed {video_id}.")
             else:
@@ -98,16 +122,20 @@ class YouTubeRAGPipeline:
         
         print(f"  🧹 Processing {len(raw_segments)} raw segments...")
         # 3. CLEAN
-        cleaned_segments = self._cleaner.filter_noise(raw_segments)
+        with PROFILER.stage('clean'):
+            cleaned_segments = self._cleaner.filter_noise(raw_segments)
         if not cleaned_segments: return
         
         # 4. CHUNK & VALIDATE
-        semantic_chunks = self.chunker.chunk_segments(cleaned_segments)
-        valid_chunks, rejected = self.validator.filter_chunks(semantic_chunks)
+        with PROFILER.stage('chunk'):
+            semantic_chunks = self.chunker.chunk_segments(cleaned_segments)
+        with PROFILER.stage('validate'):
+            valid_chunks, rejected = self.validator.filter_chunks(semantic_chunks)
         
         # 5. PERSIST
         if valid_chunks:
-            self.db.add_chunks(self._current_video_id, valid_chunks)
+            with PROFILER.stage('persist'):
+                self.db.add_chunks(self._current_video_id, valid_chunks)
             print(f"  ✅ Saved {len(valid_chunks)} chunks to DB. ({rejected} rejected)")
 
     def _final_export(self, video_id, url, content_type):
@@ -142,11 +170,15 @@ def main():
     parser.add_argument("url", help="YouTube video URL")
     parser.add_argument("--type", choices=["debate", "lecture"], default="lecture", help="Content category")
     parser.add_argument("--model", default="base", help="Whisper model name")
+    parser.add_argument("--chunker", choices=["heuristic", "embedding"], default="heuristic", help="Chunk boundary strategy")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the transcript cache and re-run Whisper")
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
+    enable_from_args(args)
     
-    pipeline = YouTubeRAGPipeline()
-    pipeline.process_url(args.url, content_type=args.type, model_name=args.model)
+    pipeline = YouTubeRAGPipeline(chunk_strategy=args.chunker)
+    pipeline.process_url(args.url, content_type=args.type, model_name=args.model, use_cache=not args.no_cache)
 
 if __name__ == "__main__":
     main()
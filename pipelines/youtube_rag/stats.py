@@ -46,11 +46,12 @@ def get_status():
                 "chunks": 0
             }
             
-        c.execute("SELECT video_id, COUNT(*) FROM chunks GROUP BY video_id")
-        for vid, count in c.fetchall():
+        # Maintained per-video counter; avoids a GROUP BY scan over all chunks
+        for vid, count in db_manager.get_chunk_counts().items():
             if vid in processed_videos:
-                processed_videos[vid]["chunks"] = count
+                processed_videos[vid]["chunks"] = count or 0
         conn.close()
+    db_manager.close()
 
     # 2. Check Audio files for in-progress or downloaded
     audio_files = []
@@ -16,7 +16,11 @@ for p in FFMPEG_PATHS:
     if os.path.exists(p) and p not in os.environ["PATH"]:
         os.environ["PATH"] += os.pathsep + p
 
-def segment_audio(audio_path, segment_length=60):
+# Identity of the transcription setup; both feed the transcript cache key.
+BACKEND = "openai-whisper"
+SEGMENT_LENGTH = 60
+
+def segment_audio(audio_path, segment_length=SEGMENT_LENGTH):
     """
     Splits audio into chunks using ffmpeg.
     Returns a list of (segment_path, start_time) tuples.
@@ -46,28 +50,33 @@ def segment_audio(audio_path, segment_length=60):
     segments = sorted(list(temp_dir.glob("seg_*.m4a")))
     return [(str(s), i * segment_length) for i, s in enumerate(segments)]
 
-def transcribe_audio(audio_path, model_name="small", partial_callback=None, start_offset=0.0):
+def transcribe_audio(audio_path, model_name="small", partial_callback=None, start_offset=0.0,
+                     segment_length=SEGMENT_LENGTH, cache=None):
     """
     Transcribes audio using OpenAI Whisper.
     Supports segment-based transcription and resumption from start_offset.
+    If a TranscriptCache is given, windows already in it are replayed instead of
+    re-transcribed, and freshly transcribed windows are recorded into it.
     """
-    print(f"🎙️ Loading Whisper ({model_name}) on CPU...")
-    model = whisper.load_model(model_name)
+    model = None
+
+    def get_model():
+        nonlocal model
+        if model is None:
+            print(f"🎙️ Loading Whisper ({model_name}) on CPU...")
+            model = whisper.load_model(model_name)
+        return model
     
     # If no callback, we do full-file (classic)
     if not partial_callback:
         print(f"📄 Transcribing full file: {audio_path}")
-        result = model.transcribe(audio_path, verbose=False, fp16=False)
+        result = get_model().transcribe(audio_path, verbose=False, fp16=False)
         return result.get("segments", [])
     
     # Segment-based (Streaming style)
-    segments_info = segment_audio(audio_path)
+    segments_info = segment_audio(audio_path, segment_length)
     all_segments = []
     
-    # Filter segments that end before our start_offset
-    # Each segment is approx 60s
-    segment_length = 60 
-    
     for i, (seg_path, offset) in enumerate(segments_info):
         # If this segment ends before our last successful offset, skip it
         if offset + segment_length <= start_offset:
@@ -76,15 +85,21 @@ def transcribe_audio(audio_path, model_name="small", partial_callback=None, star
             except: pass
             continue
             
-        print(f"⏳ Processing segment {i+1}/{len(segments_info)} (Offset: {offset}s)...")
-        result = model.transcribe(seg_path, verbose=False, fp16=False)
-        
-        # Adjust timestamps relative to original audio
-        seg_results = result.get("segments", [])
-        for sr in seg_results:
-            sr["start"] += offset
-            sr["end"] += offset
-            all_segments.append(sr)
+        seg_results = cache.get_window(i) if cache else None
+        if seg_results is not None:
+            print(f"♻️  Segment {i+1}/{len(segments_info)} from transcript cache (Offset: {offset}s)")
+        else:
+            print(f"⏳ Processing segment {i+1}/{len(segments_info)} (Offset: {offset}s)...")
+            result = get_model().transcribe(seg_path, verbose=False, fp16=False)
+            
+            # Adjust timestamps relative to original audio
+            seg_results = result.get("segments", [])
+            for sr in seg_results:
+                sr["start"] += offset
+                sr["end"] += offset
+            if cache:
+                cache.record_window(i, offset, seg_results, len(segments_info))
+        all_segments.extend(seg_results)
             
         # Immediately notify runner for cleaning/chunking
         partial_callback(seg_results, i == len(segments_info) - 1)
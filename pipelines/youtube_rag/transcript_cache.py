@@ -0,0 +1,97 @@
+import os
+import json
+import gzip
+import hashlib
+
+def hash_audio_file(audio_path, block_size=1 << 20):
+    """
+    SHA-256 of the audio content (not the path), so a re-download of the
+    same video still hits the cache.
+    """
+    h = hashlib.sha256()
+    with open(audio_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class TranscriptCache:
+    """
+    Persists raw Whisper segments per transcription window.
+    Keyed by (audio hash, model, backend, window length) so that only a change
+    in one of those invalidates the cache; cleaner/chunker/validator changes
+    replay the stored segments instead of re-running Whisper.
+
+    On disk: <cache_dir>/<key>.json.gz holding only what the downstream stages
+    read (start, end, text) as compact [start, end, text] triples.
+    """
+    def __init__(self, cache_dir, audio_path, model_name, backend, segment_length):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.key_fields = {
+            "audio_sha256": hash_audio_file(audio_path),
+            "model": model_name,
+            "backend": backend,
+            "segment_length": segment_length,
+        }
+        self.segment_length = segment_length
+        key_src = json.dumps(self.key_fields, sort_keys=True)
+        self.key = hashlib.sha256(key_src.encode("utf-8")).hexdigest()[:32]
+        self.path = os.path.join(cache_dir, f"{self.key}.json.gz")
+        self.window_count = None
+        self.windows = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable transcript cache {self.path}: {e}")
+            return
+        if data.get("key") != self.key_fields:
+            return
+        self.window_count = data.get("window_count")
+        self.windows = {int(i): (w["offset"], w["segments"]) for i, w in data.get("windows", {}).items()}
+
+    def _save(self):
+        data = {
+            "key": self.key_fields,
+            "window_count": self.window_count,
+            "windows": {str(i): {"offset": off, "segments": segs} for i, (off, segs) in sorted(self.windows.items())},
+        }
+        tmp_path = self.path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def is_complete(self):
+        return self.window_count is not None and len(self.windows) >= self.window_count
+
+    def get_window(self, index):
+        """Returns the cached segments of one window as Whisper-style dicts, or None."""
+        if index not in self.windows:
+            return None
+        return [{"start": s, "end": e, "text": t} for s, e, t in self.windows[index][1]]
+
+    def record_window(self, index, offset, segments, window_count):
+        """Stores one transcribed window (timestamps already absolute) and flushes to disk."""
+        self.window_count = window_count
+        self.windows[index] = (offset, [[round(s["start"], 3), round(s["end"], 3), s["text"]] for s in segments])
+        self._save()
+
+    def replay(self, callback, start_offset=0.0):
+        """
+        Feeds cached windows to callback exactly like transcribe_audio would,
+        honouring the same start_offset skip rule used for resumption.
+        """
+        all_segments = []
+        for i in range(self.window_count):
+            offset, _ = self.windows[i]
+            if offset + self.segment_length <= start_offset:
+                continue
+            segs = self.get_window(i)
+            all_segments.extend(segs)
+            callback(segs, i == self.window_count - 1)
+        return all_segments
@@ -1,73 +1,125 @@
 import os
+import sys
 import json
 import re
+import sqlite3
 
 class ChunkValidator:
     """
     Stage 4 Implementation: Chunk Validation
     Accepts/Rejects chunks based on factual and argumentative value.
     """
+    # Procedural / Meta-Commentary (e.g., logistics, mic checks)
+    procedural_keywords = [
+        r"can you hear me", r"check the mic", r"next slide", 
+        r"move to the next", r"in this video", r"subscribe to my",
+        r"welcome back", r"let's get started"
+    ]
+
     def __init__(self, min_word_count=20):
         self.min_word_count = min_word_count
+        # One alternation for all procedural phrases; the named group tells which one hit
+        self.procedural_pattern = re.compile(
+            "|".join(f"(?P<p{i}>{p})" for i, p in enumerate(self.procedural_keywords))
+        )
+        self.filler_start_pattern = re.compile(r"^(so|but|and|actually|basically)\b")
 
-    def validate_chunk(self, chunk):
+    def _check(self, text):
         """
         Stage 4 & 5 Implementation: RAG Quality Gate
         Enforces self-containment and filters out procedural noise.
+        Returns (reason_code, message); reason_code is None when accepted.
         """
-        text = chunk.get('text', '')
         words = text.split()
         word_count = len(words)
 
         # 1. Accept only if it expresses a complete idea (Length check)
         if word_count < self.min_word_count:
-            return False, "Rejection: Chunk is too short (minimal signal)."
+            return "too_short", "Rejection: Chunk is too short (minimal signal)."
 
         # 2. Reject Repetition
-        unique_words = set(words)
-        if len(unique_words) / word_count < 0.4:
-            return False, "Rejection: High redundancy/repetition."
+        if len(set(words)) / word_count < 0.4:
+            return "redundant", "Rejection: High redundancy/repetition."
 
-        # 3. Reject Procedural / Meta-Commentary (e.g., logistics, mic checks)
-        procedural_keywords = [
-            r"can you hear me", r"check the mic", r"next slide", 
-            r"move to the next", r"in this video", r"subscribe to my",
-            r"welcome back", r"let's get started"
-        ]
+        # 3. Reject Procedural / Meta-Commentary
         text_lower = text.lower()
-        for pattern in procedural_keywords:
-            if re.search(pattern, text_lower):
-                return False, f"Rejection: Procedural noise detected ('{pattern}')."
+        m = self.procedural_pattern.search(text_lower)
+        if m:
+            pattern = self.procedural_keywords[int(m.lastgroup[1:])]
+            return "procedural", f"Rejection: Procedural noise detected ('{pattern}')."
 
         # 4. Reject Meta-Conversational Noise (Heuristic)
-        if re.match(r"^(so|but|and|actually|basically)\b", text_lower):
-            if word_count < 30: # If it's short and starts with a filler-link, reject.
-                return False, "Rejection: Conversational filler-start."
+        if word_count < 30 and self.filler_start_pattern.match(text_lower):
+            # If it's short and starts with a filler-link, reject.
+            return "filler_start", "Rejection: Conversational filler-start."
 
         # 5. Reject emotional/venting if it lacks factual substance
-        if text.count('!') > 3 and word_count < 40:
-            return False, "Rejection: Emotional outburst/noise."
+        if word_count < 40 and text.count('!') > 3:
+            return "emotional", "Rejection: Emotional outburst/noise."
 
-        return True, "Accepted"
+        return None, "Accepted"
 
-    def filter_chunks(self, chunks):
+    def validate_chunk(self, chunk):
+        reason, message = self._check(chunk.get('text', ''))
+        return reason is None, message
+
+    def validate_batch(self, chunks):
         """
-        Filters a list of chunks, keeping only the valid ones.
+        Scores a whole batch in one pass.
+        Returns {"valid": [...], "rejected": [(chunk, reason_code, message), ...],
+                 "counts": {reason_code: n}}.
         """
-        valid_chunks = []
-        rejected_count = 0
-        
+        check = self._check
+        valid = []
+        rejected = []
+        counts = {}
         for c in chunks:
-            is_valid, reason = self.validate_chunk(c)
-            if is_valid:
-                valid_chunks.append(c)
+            reason, message = check(c.get('text', ''))
+            if reason is None:
+                valid.append(c)
             else:
-                rejected_count += 1
-                # print(f"DEBUG: {reason}")
-                
-        return valid_chunks, rejected_count
+                rejected.append((c, reason, message))
+                counts[reason] = counts.get(reason, 0) + 1
+        return {"valid": valid, "rejected": rejected, "counts": counts}
+
+    def filter_chunks(self, chunks):
+        """
+        Filters a list of chunks, keeping only the valid ones.
+        """
+        result = self.validate_batch(chunks)
+        return result["valid"], len(result["rejected"])
+
+def revalidate_db(db_path, batch_size=5000):
+    """
+    Re-runs the quality gate over every stored chunk (read-only) and
+    returns rejection counts per reason without re-running the pipeline.
+    """
+    validator = ChunkValidator()
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("SELECT text FROM chunks")
+    totals = {"checked": 0, "accepted": 0}
+    while True:
+        rows = c.fetchmany(batch_size)
+        if not rows:
+            break
+        result = validator.validate_batch([{"text": r[0] or ""} for r in rows])
+        totals["checked"] += len(rows)
+        totals["accepted"] += len(result["valid"])
+        for reason, n in result["counts"].items():
+            totals[reason] = totals.get(reason, 0) + n
+    conn.close()
+    return totals
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--revalidate":
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        db_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(base_dir, "db", "youtube_rag.db")
+        print(f"🔍 Revalidating chunks in {db_path}")
+        for key, value in revalidate_db(db_path).items():
+            print(f"  {key:<14} {value}")
+        sys.exit(0)
+
     validator = ChunkValidator()
     test_chunk = {"text": "This is a great point about the nature of evidence in theological debates. It must be verifiable."}
     print(validator.validate_chunk(test_chunk))
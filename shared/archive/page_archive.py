@@ -0,0 +1,273 @@
+"""
+Compressed raw-page archive shared by the HTML-storing pipelines.
+
+Raw HTML is kept as zstd-compressed blobs (zlib when the `zstandard` package
+is not installed) in a `raw_pages` table inside the pipeline's own data.db.
+A zstd dictionary can be trained per site from stored pages; small product
+pages from one site share most of their markup, so this is where most of the
+size reduction comes from.
+
+Writes are buffered and committed in one transaction per batch; reads stream
+with fetchmany so processors never hold every page in memory.
+"""
+
+import json
+import sqlite3
+import sys
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+
+class PageArchive:
+    def __init__(self, db_path: str, site: str, batch_size: int = 50, level: int = 10):
+        self.db_path = db_path
+        self.site = site
+        self.batch_size = batch_size
+        self.level = level
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.buffer: List[Tuple] = []
+        self._dicts: Dict[int, Any] = {}
+        self._compressor = None
+        self._dict_id: Optional[int] = None
+        self._init_db()
+        self._load_site_dictionary()
+
+    def _init_db(self):
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS raw_pages (
+                url TEXT PRIMARY KEY,
+                site TEXT,
+                fetched_at TEXT,
+                meta TEXT,
+                codec TEXT,
+                dict_id INTEGER,
+                raw_size INTEGER,
+                body BLOB
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS raw_page_dicts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                site TEXT,
+                created_at TEXT,
+                sample_count INTEGER,
+                data BLOB
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_raw_pages_site ON raw_pages(site)")
+        self.conn.commit()
+
+    # ------------------------------------------------------------------
+    # Compression
+    # ------------------------------------------------------------------
+
+    def _load_site_dictionary(self):
+        """Use the newest trained dictionary of this site for new writes."""
+        if zstd is None:
+            return
+        row = self.conn.execute(
+            'SELECT id FROM raw_page_dicts WHERE site = ? ORDER BY id DESC LIMIT 1', (self.site,)
+        ).fetchone()
+        self._dict_id = row[0] if row else None
+        dict_data = self._get_dict(self._dict_id) if self._dict_id else None
+        self._compressor = zstd.ZstdCompressor(level=self.level, dict_data=dict_data)
+
+    def _get_dict(self, dict_id: int):
+        if dict_id not in self._dicts:
+            row = self.conn.execute('SELECT data FROM raw_page_dicts WHERE id = ?', (dict_id,)).fetchone()
+            if not row:
+                raise KeyError(f"Archive dictionary {dict_id} is missing from {self.db_path}")
+            self._dicts[dict_id] = zstd.ZstdCompressionDict(row[0])
+        return self._dicts[dict_id]
+
+    def _compress(self, raw: bytes) -> Tuple[str, Optional[int], bytes]:
+        if self._compressor is not None:
+            return 'zstd', self._dict_id, self._compressor.compress(raw)
+        return 'zlib', None, zlib.compress(raw, 9)
+
+    def _decompress(self, codec: str, dict_id: Optional[int], body: bytes) -> str:
+        if codec == 'zlib':
+            return zlib.decompress(body).decode('utf-8')
+        if codec == 'zstd':
+            if zstd is None:
+                raise ImportError("This archive holds zstd pages: pip install zstandard")
+            dict_data = self._get_dict(dict_id) if dict_id else None
+            return zstd.ZstdDecompressor(dict_data=dict_data).decompress(body).decode('utf-8')
+        raise ValueError(f"Unknown archive codec: {codec}")
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add(self, url: str, html: str, fetched_at: Optional[str] = None, **meta):
+        """Buffer one page (replacing any stored copy); written once the buffer reaches batch_size."""
+        raw = html.encode('utf-8')
+        codec, dict_id, body = self._compress(raw)
+        self.buffer.append((
+            url, self.site, fetched_at or datetime.now().isoformat(),
+            json.dumps(meta, ensure_ascii=False) if meta else None,
+            codec, dict_id, len(raw), body
+        ))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        with self.conn:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO raw_pages (url, site, fetched_at, meta, codec, dict_id, raw_size, body)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', self.buffer)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def urls(self) -> Set[str]:
+        rows = self.conn.execute('SELECT url FROM raw_pages WHERE site = ?', (self.site,)).fetchall()
+        return {row[0] for row in rows} | {row[0] for row in self.buffer}
+
+    def iter_pages(self, fetch_size: int = 200) -> Iterator[Tuple[str, str, Dict]]:
+        """Streams (url, html, meta) for this site in insertion order."""
+        self.flush()
+        cursor = self.conn.execute(
+            'SELECT url, meta, codec, dict_id, body FROM raw_pages WHERE site = ? ORDER BY rowid', (self.site,)
+        )
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            for url, meta, codec, dict_id, body in rows:
+                yield url, self._decompress(codec, dict_id, body), json.loads(meta) if meta else {}
+
+    def sample(self, n: int = 1) -> List[Tuple[str, str, Dict]]:
+        """Random pages of this site, for debugging selectors."""
+        rows = self.conn.execute(
+            'SELECT url, meta, codec, dict_id, body FROM raw_pages WHERE site = ? ORDER BY RANDOM() LIMIT ?',
+            (self.site, n)
+        ).fetchall()
+        return [(url, self._decompress(codec, dict_id, body), json.loads(meta) if meta else {})
+                for url, meta, codec, dict_id, body in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        count, raw, stored = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM raw_pages WHERE site = ?',
+            (self.site,)
+        ).fetchone()
+        return {
+            "pages": count,
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+            "ratio": round(raw / stored, 2) if stored else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def absorb_legacy(self, table: str, meta_columns: Sequence[str] = (), time_column: str = "scraped_at") -> int:
+        """
+        One-off migration: moves uncompressed `html` rows of an old raw table
+        into the archive and deletes them there. Safe to call on every start.
+        """
+        c = self.conn.cursor()
+        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,))
+        if not c.fetchone():
+            return 0
+        c.execute(f"PRAGMA table_info({table})")
+        cols = [col[1] for col in c.fetchall()]
+        if 'html' not in cols:
+            return 0
+
+        select_cols = ["url", "html", time_column if time_column in cols else "NULL"]
+        select_cols += [m for m in meta_columns if m in cols]
+        meta_names = select_cols[3:]
+        read = self.conn.execute(f"SELECT {', '.join(select_cols)} FROM {table} WHERE html IS NOT NULL")
+
+        moved = 0
+        while True:
+            rows = read.fetchmany(self.batch_size)
+            if not rows:
+                break
+            for row in rows:
+                meta = {name: value for name, value in zip(meta_names, row[3:]) if value is not None}
+                self.add(row[0], row[1], fetched_at=row[2], **meta)
+            moved += len(rows)
+        read.close()
+        self.flush()
+
+        if moved:
+            with self.conn:
+                self.conn.execute(f"DELETE FROM {table} WHERE html IS NOT NULL")
+            self.conn.execute("VACUUM")
+            print(f"📦 Moved {moved} raw pages from '{table}' into the compressed archive.")
+        return moved
+
+    def train_dictionary(self, sample_count: int = 1000, dict_size: int = 112 * 1024) -> int:
+        """
+        Trains a zstd dictionary from this site's stored pages, recompresses
+        them with it and uses it for all further writes. Returns the dict id.
+        """
+        if zstd is None:
+            raise ImportError("Dictionary training needs zstandard: pip install zstandard")
+        samples = []
+        for _, html, _ in self.iter_pages():
+            samples.append(html.encode('utf-8'))
+            if len(samples) >= sample_count:
+                break
+        if len(samples) < 10:
+            raise ValueError(f"Need at least 10 stored pages to train a dictionary (have {len(samples)})")
+
+        trained = zstd.train_dictionary(dict_size, samples)
+        with self.conn:
+            cur = self.conn.execute(
+                'INSERT INTO raw_page_dicts (site, created_at, sample_count, data) VALUES (?, ?, ?, ?)',
+                (self.site, datetime.now().isoformat(), len(samples), trained.as_bytes())
+            )
+        new_id = cur.lastrowid
+        self._load_site_dictionary()
+        self.recompress()
+        return new_id
+
+    def recompress(self):
+        """Rewrites every page of this site with the current codec/dictionary."""
+        self.flush()
+        urls = [row[0] for row in self.conn.execute('SELECT url FROM raw_pages WHERE site = ?', (self.site,))]
+        for i in range(0, len(urls), self.batch_size):
+            part = urls[i:i + self.batch_size]
+            rows = self.conn.execute(
+                f"SELECT url, codec, dict_id, body FROM raw_pages WHERE url IN ({','.join('?' * len(part))})", part
+            ).fetchall()
+            updates = []
+            for url, codec, dict_id, body in rows:
+                new_codec, new_dict_id, new_body = self._compress(self._decompress(codec, dict_id, body).encode('utf-8'))
+                updates.append((new_codec, new_dict_id, new_body, url))
+            with self.conn:
+                self.conn.executemany('UPDATE raw_pages SET codec = ?, dict_id = ?, body = ? WHERE url = ?', updates)
+        self.conn.execute("VACUUM")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python page_archive.py <DB_PATH> <SITE> [stats|train]")
+        sys.exit(1)
+
+    archive = PageArchive(sys.argv[1], sys.argv[2])
+    if len(sys.argv) > 3 and sys.argv[3] == "train":
+        dict_id = archive.train_dictionary()
+        print(f"✅ Trained dictionary {dict_id} for {archive.site}")
+    print(json.dumps(archive.stats(), indent=2))
+    archive.close()
@@ -0,0 +1,255 @@
+"""
+Sitemap-first URL discovery for the WordPress / WooCommerce / BigCommerce pipelines.
+
+Reads robots.txt `Sitemap:` lines plus the usual sitemap locations, follows
+sitemap indexes, and yields (url, lastmod) pairs. XML is parsed incrementally
+as chunks arrive (gzip sitemaps are inflated on the fly), so even very large
+sitemaps are never held in memory. With `since`, child sitemaps and entries
+whose lastmod is older are skipped, so a rerun only sees what changed.
+That is only safe if the previous run read every child sitemap: a child that
+errors, times out or returns nothing counts in stats["failed"], and callers
+advance their cursor (save_last_run) only when `complete` is true.
+
+The fetcher is pluggable: `aiohttp_fetcher` streams over HTTP, and a browser
+scraper can pass its own async generator that yields the response body.
+"""
+
+import re
+import sqlite3
+import zlib
+import logging
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("SitemapDiscovery")
+
+# Sitemap roots tried after the ones listed in robots.txt
+DEFAULT_SITEMAP_PATHS = ["/sitemap_index.xml", "/wp-sitemap.xml", "/sitemap.xml"]
+
+# Child-sitemap filters for common generators (Yoast, WP core, WooCommerce, BigCommerce)
+WP_POSTS = r"post-sitemap\d*\.xml|wp-sitemap-posts-post-\d+\.xml"
+WC_PRODUCTS = r"product-sitemap\d*\.xml|wp-sitemap-posts-product-\d+\.xml|type=products"
+
+FetchChunks = Callable[[str], AsyncIterator[bytes]]
+
+
+def parse_lastmod(text: Optional[str]) -> Optional[datetime]:
+    """W3C datetime (2023-05-01, 2023-05-01T10:00:00+00:00, ...Z) -> aware UTC datetime."""
+    if not text:
+        return None
+    text = text.strip().replace("Z", "+00:00")
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            dt = datetime.strptime(text[:10], "%Y-%m-%d")
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapParser:
+    """
+    Incremental sitemap parser. feed() takes raw (optionally gzipped) bytes
+    and returns the entries completed so far as (kind, loc, lastmod) where
+    kind is "sitemap" (child of an index) or "url".
+    """
+
+    def __init__(self):
+        self._xml = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._inflate = None
+        self.started = False
+
+    def feed(self, data: bytes) -> List[Tuple[str, str, Optional[datetime]]]:
+        if not self.started:
+            self.started = True
+            if data[:2] == b"\x1f\x8b":
+                self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._inflate is not None:
+            data = self._inflate.decompress(data)
+        self._xml.feed(data)
+        return self._drain()
+
+    def close(self) -> List[Tuple[str, str, Optional[datetime]]]:
+        if self._inflate is not None:
+            self._xml.feed(self._inflate.flush())
+        self._xml.close()
+        return self._drain()
+
+    def _drain(self):
+        entries = []
+        for event, elem in self._xml.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                continue
+            kind = _local(elem.tag)
+            if kind not in ("url", "sitemap"):
+                continue
+            loc = lastmod = None
+            for child in elem:
+                name = _local(child.tag)
+                if name == "loc":
+                    loc = (child.text or "").strip()
+                elif name == "lastmod":
+                    lastmod = parse_lastmod(child.text)
+            if loc:
+                entries.append((kind, loc, lastmod))
+            # Drop parsed entries so memory stays flat on huge sitemaps
+            self._root.clear()
+        return entries
+
+
+def aiohttp_fetcher(session, limiter=None, timeout: int = 60, headers=None) -> FetchChunks:
+    """Streams a URL's body in chunks through an aiohttp session (and optional HostRateLimiter)."""
+
+    async def fetch_chunks(url: str):
+        if limiter is not None:
+            async with limiter.slot(url):
+                async for chunk in _stream(url):
+                    yield chunk
+        else:
+            async for chunk in _stream(url):
+                yield chunk
+
+    async def _stream(url: str):
+        async with session.get(url, timeout=timeout, headers=headers) as response:
+            if response.status != 200:
+                logger.info(f"   Sitemap {url} returned {response.status}")
+                return
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                yield chunk
+
+    return fetch_chunks
+
+
+class SitemapDiscovery:
+    def __init__(self, base_url: str, fetch_chunks: FetchChunks, include: Optional[str] = None,
+                 extra_paths: Sequence[str] = (), max_depth: int = 3):
+        """
+        include: regex a child sitemap URL must match to be followed (e.g. WP_POSTS)
+        extra_paths: site-specific sitemap roots tried before the defaults
+        """
+        self.base_url = base_url.rstrip("/")
+        self.fetch_chunks = fetch_chunks
+        self.include = re.compile(include) if include else None
+        self.extra_paths = list(extra_paths)
+        self.max_depth = max_depth
+        self.stats = {"sitemaps": 0, "skipped_sitemaps": 0, "urls": 0, "unchanged": 0, "failed": 0}
+
+    @property
+    def found(self) -> bool:
+        """True once a sitemap produced entries (including ones skipped as unchanged)."""
+        return bool(self.stats["urls"] or self.stats["unchanged"] or self.stats["skipped_sitemaps"])
+
+    @property
+    def complete(self) -> bool:
+        """True if a sitemap was found and every sitemap followed was read in full."""
+        return self.found and not self.stats["failed"]
+
+    async def robots_sitemaps(self) -> List[str]:
+        body = b""
+        try:
+            async for chunk in self.fetch_chunks(f"{self.base_url}/robots.txt"):
+                body += chunk
+        except Exception as e:
+            logger.warning(f"robots.txt unavailable: {e}")
+            return []
+        found = []
+        for line in body.decode("utf-8", "ignore").splitlines():
+            if line.lower().startswith("sitemap:"):
+                found.append(line.split(":", 1)[1].strip())
+        return found
+
+    async def roots(self) -> List[str]:
+        candidates = await self.robots_sitemaps()
+        candidates += [self.base_url + p for p in self.extra_paths + DEFAULT_SITEMAP_PATHS]
+        return list(dict.fromkeys(candidates))
+
+    async def _read(self, url: str) -> AsyncIterator[Tuple[str, str, Optional[datetime]]]:
+        parser = SitemapParser()
+        async for chunk in self.fetch_chunks(url):
+            for entry in parser.feed(chunk):
+                yield entry
+        if parser.started:
+            for entry in parser.close():
+                yield entry
+
+    async def discover(self, since: Optional[datetime] = None) -> AsyncIterator[Tuple[str, Optional[datetime]]]:
+        """
+        Yields (url, lastmod) from the first sitemap root that has any entries.
+        Entries without lastmod are always yielded.
+        """
+        for root in await self.roots():
+            stack = [(root, 0)]
+            seen = set()
+            while stack:
+                sitemap_url, depth = stack.pop()
+                if sitemap_url in seen:
+                    continue
+                seen.add(sitemap_url)
+                logger.info(f"🗺️  Reading sitemap: {sitemap_url}")
+                self.stats["sitemaps"] += 1
+                children = []
+                entries = 0
+                failed = False
+                try:
+                    async for kind, loc, lastmod in self._read(sitemap_url):
+                        entries += 1
+                        if kind == "sitemap":
+                            if depth >= self.max_depth:
+                                continue
+                            if self.include and not self.include.search(loc):
+                                continue
+                            if since and lastmod and lastmod < since:
+                                self.stats["skipped_sitemaps"] += 1
+                                continue
+                            children.append((loc, depth + 1))
+                        else:
+                            if since and lastmod and lastmod < since:
+                                self.stats["unchanged"] += 1
+                                continue
+                            self.stats["urls"] += 1
+                            yield loc, lastmod
+                except ET.ParseError as e:
+                    logger.warning(f"   Not a sitemap ({sitemap_url}): {e}")
+                    failed = True
+                except Exception as e:
+                    logger.warning(f"   Failed to read sitemap {sitemap_url}: {e}")
+                    failed = True
+                # A missing root is just a candidate that does not exist; an empty
+                # child (non-200) or a root that broke off mid-read loses entries
+                if (depth > 0 and (failed or not entries)) or (failed and entries):
+                    self.stats["failed"] += 1
+                # Keep document order: first child is processed first
+                stack.extend(reversed(children))
+            if self.found:
+                return
+
+
+# ----------------------------------------------------------------------
+# Per-site "last discovery run" bookkeeping, kept in the pipeline's own DB
+# ----------------------------------------------------------------------
+
+def load_last_run(db_path: str, site: str) -> Optional[datetime]:
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS discovery_state (site TEXT PRIMARY KEY, last_run TEXT)")
+    row = conn.execute("SELECT last_run FROM discovery_state WHERE site = ?", (site,)).fetchone()
+    conn.close()
+    return parse_lastmod(row[0]) if row else None
+
+
+def save_last_run(db_path: str, site: str, when: datetime):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS discovery_state (site TEXT PRIMARY KEY, last_run TEXT)")
+    conn.execute("INSERT OR REPLACE INTO discovery_state (site, last_run) VALUES (?, ?)", (site, when.isoformat()))
+    conn.commit()
+    conn.close()
@@ -0,0 +1,140 @@
+"""
+Streaming JSONL -> SQLite bulk loader for pipeline outputs.
+
+Lines are decoded one at a time and inserted in chunks with executemany, all
+inside a single transaction. Only the current chunk of rows is held in
+memory, so multi-GB exports load in one pass. Rows whose unique key (normally
+the URL) already exists are skipped by `INSERT OR IGNORE`. Keys already in
+the table and duplicates inside the file are recognised by a hash set up
+front, so a re-import skips them before any column is encoded. That set is
+the part that grows: a 16-byte digest (about 90 bytes with set overhead) per
+key in the table plus per new key in the file. Pass key=None to skip it.
+
+Usage:
+    COLUMNS = {"url": "url", "title": "title", "categories": lambda r: r.get("categories", [])}
+    load_jsonl("output/data.jsonl", "data.db", "articles", COLUMNS, constants={"language": "hi"})
+
+A column source is either a field name or a callable taking the record.
+Lists and dicts are stored as JSON text.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+ColumnSource = Union[str, Callable[[Dict[str, Any]], Any]]
+
+BULK_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+)
+
+
+# One reusable encoder; json.dumps(..., ensure_ascii=False) builds a new one per call
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _cell(value):
+    if type(value) in (list, dict):
+        return _encode(value) if value else ("[]" if type(value) is list else "{}")
+    return value
+
+
+def _field(name):
+    return lambda record: record.get(name)
+
+
+def _digest(value) -> bytes:
+    return hashlib.blake2b(str(value).encode('utf-8'), digest_size=16).digest()
+
+
+def load_jsonl(jsonl_path: str, db_path: str, table: str, columns: Dict[str, ColumnSource],
+               constants: Optional[Dict[str, Any]] = None, key: Optional[str] = "url",
+               batch_size: int = 2000, progress_every: int = 10000,
+               conn: Optional[sqlite3.Connection] = None) -> Dict[str, Any]:
+    """
+    Loads one JSONL file into `table`. `constants` are fixed per file
+    (e.g. {"language": "hi"}). `key` is the record field used for dedup
+    (None to disable); its column is the one mapped straight to that field.
+    Pass `conn` to load several files over one connection. It is used as
+    configured; BULK_PRAGMAS are applied only to a connection opened here.
+    Returns counts and rows/sec.
+    """
+    if not os.path.exists(jsonl_path):
+        print(f"❌ Input file not found: {jsonl_path}")
+        return {"read": 0, "inserted": 0, "skipped": 0, "errors": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(db_path)
+        for pragma in BULK_PRAGMAS:
+            conn.execute(pragma)
+
+    constants = constants or {}
+    names = list(columns) + list(constants)
+    getters = [src if callable(src) else _field(src) for src in columns.values()]
+    fixed = [_cell(v) for v in constants.values()]
+    sql = f"INSERT OR IGNORE INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+
+    stats = {"read": 0, "inserted": 0, "skipped": 0, "errors": 0}
+    seen = set()
+    key_column = next((col for col, src in columns.items() if src == key), None) if key else None
+    if key_column:
+        for (value,) in conn.execute(f"SELECT {key_column} FROM {table} WHERE {key_column} IS NOT NULL"):
+            seen.add(_digest(value))
+    batch = []
+    start = time.perf_counter()
+    name = os.path.basename(jsonl_path)
+
+    def write_batch():
+        cur = conn.executemany(sql, batch)
+        stats["inserted"] += cur.rowcount
+        stats["skipped"] += len(batch) - cur.rowcount
+        batch.clear()
+
+    with conn:
+        with open(jsonl_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                stats["read"] += 1
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    stats["errors"] += 1
+                    print(f"Error parsing line {stats['read']} of {name}: {e}")
+                    continue
+
+                if key and record.get(key) is not None:
+                    digest = _digest(record[key])
+                    if digest in seen:
+                        stats["skipped"] += 1
+                        continue
+                    seen.add(digest)
+
+                batch.append([_cell(get(record)) for get in getters] + fixed)
+                if len(batch) >= batch_size:
+                    write_batch()
+
+                if progress_every and stats["read"] % progress_every == 0:
+                    rate = stats["read"] / (time.perf_counter() - start)
+                    print(f"   {name}: {stats['read']:,} rows read ({rate:,.0f} rows/s)")
+
+            if batch:
+                write_batch()
+
+    if own_conn:
+        conn.close()
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    stats["rows_per_sec"] = round(stats["read"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    print(f"✅ {name} -> {os.path.basename(db_path)}:{table}")
+    print(f"   Imported: {stats['inserted']} | Skipped (Duplicates): {stats['skipped']} | Errors: {stats['errors']}"
+          f" | {stats['rows_per_sec']:,.0f} rows/s")
+    return stats
+
@@ -0,0 +1,204 @@
+"""
+Opt-in stage profiling for scrapers and pipelines.
+
+Wrap hot-path stages in `with PROFILER.stage("parse", group="islamqa"):`.
+While profiling is off (the default) a stage is a shared no-op context, so the
+hooks can stay in the code permanently. `--profile` on an entry point calls
+PROFILER.enable(); at exit it writes:
+
+    <prefix>.txt        per-stage table: calls, total, mean, p95, max, share of wall time
+    <prefix>.collapsed  collapsed stacks ("a;b;c <count>"), ready for flamegraph.pl
+                        or speedscope. With sampling on, these are Python stacks
+                        sampled from every thread; otherwise nested stage timings
+                        in microseconds.
+
+Stages nest (the stack is a ContextVar, so concurrent asyncio tasks each keep
+their own) and `group` separates e.g. adapters in a multi-site run. Times are
+wall-clock, so an async "fetch" stage includes time spent waiting on the network,
+and stages running concurrently can add up to more than 100% of wall time.
+"""
+
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+_NULL = nullcontext()
+_stack: ContextVar[Tuple[str, ...]] = ContextVar('profiling_stack', default=())
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'group', 'start', 'token')
+
+    def __init__(self, profiler: 'StageProfiler', name: str, group: str):
+        self.profiler = profiler
+        self.name = name
+        self.group = group
+
+    def __enter__(self):
+        self.token = _stack.set(_stack.get() + (self.name,))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        path = _stack.get()
+        _stack.reset(self.token)
+        self.profiler.record(self.name, elapsed, group=self.group, path=path)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+class StageProfiler:
+    """Aggregates stage timings and, optionally, sampled stacks."""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._timings: Dict[Tuple[str, str], List[float]] = defaultdict(list)  # (group, stage) -> seconds
+        self._paths: Counter = Counter()  # "group;stage;substage" -> seconds
+        self._samples: Counter = Counter()  # collapsed python stack -> samples
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self.prefix: Optional[str] = None
+
+    def enable(self, prefix: str = 'profile', sample_interval: Optional[float] = None,
+               write_at_exit: bool = True):
+        """
+        Start collecting. `prefix` is where the report files go;
+        `sample_interval` (seconds, e.g. 0.005) also turns on stack sampling.
+        """
+        self.enabled = True
+        self.prefix = prefix
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        if sample_interval:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample, args=(sample_interval,),
+                                             name='profiling-sampler', daemon=True)
+            self._sampler.start()
+        if write_at_exit:
+            atexit.register(self.finish)
+
+    def stage(self, name: str, group: str = ''):
+        """Context manager (sync or async) timing one stage; a no-op when disabled."""
+        if not self.enabled:
+            return _NULL
+        return _Stage(self, name, group)
+
+    def record(self, name: str, seconds: float, group: str = '', path: Optional[Tuple[str, ...]] = None):
+        """Add an externally measured timing (e.g. a download latency reported by the client)."""
+        if not self.enabled:
+            return
+        key = ';'.join(((group,) if group else ()) + (path or _stack.get() + (name,)))
+        with self._lock:
+            self._timings[(group, name)].append(seconds)
+            self._paths[key] += seconds
+
+    def _sample(self, interval: float):
+        own = threading.get_ident()
+        while not self._stop.wait(interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, frame in frames.items():
+                    if thread_id == own:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    self._samples[';'.join(reversed(stack))] += 1
+
+    def summary(self) -> str:
+        wall = time.perf_counter() - self._started
+        cpu = time.process_time() - self._cpu_started
+        lines = [f"Wall {wall:.2f}s | CPU {cpu:.2f}s",
+                 f"{'group':<20} {'stage':<18} {'calls':>8} {'total s':>10} {'mean ms':>9} "
+                 f"{'p95 ms':>9} {'max ms':>9} {'% wall':>7}"]
+        with self._lock:
+            rows = sorted(self._timings.items(), key=lambda item: -sum(item[1]))
+            for (group, name), values in rows:
+                ordered = sorted(values)
+                total = sum(ordered)
+                p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                lines.append(
+                    f"{group or '-':<20} {name:<18} {len(ordered):>8} {total:>10.3f} "
+                    f"{total / len(ordered) * 1000:>9.2f} {p95 * 1000:>9.2f} {ordered[-1] * 1000:>9.2f} "
+                    f"{total / wall * 100 if wall else 0:>6.1f}%"
+                )
+        return '\n'.join(lines)
+
+    def collapsed(self) -> str:
+        with self._lock:
+            if self._samples:
+                items = self._samples.items()
+            else:
+                items = ((path, round(seconds * 1e6)) for path, seconds in self._paths.items())
+            return ''.join(f"{stack.replace(' ', '_')} {count}\n" for stack, count in items if count)
+
+    def finish(self):
+        """Stop sampling, print the summary and write the report files (once)."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+        summary = self.summary()
+        print(f"\n⏱️  PROFILE\n{summary}")
+        directory = os.path.dirname(os.path.abspath(self.prefix))
+        os.makedirs(directory, exist_ok=True)
+        with open(f"{self.prefix}.txt", 'w', encoding='utf-8') as f:
+            f.write(summary + '\n')
+        with open(f"{self.prefix}.collapsed", 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        print(f"   Written: {self.prefix}.txt, {self.prefix}.collapsed")
+
+
+# Process-wide profiler used by all entry points
+PROFILER = StageProfiler()
+
+
+def profiled(name: str, group: str = ''):
+    """Decorator timing every call of a (sync) function as stage `name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            with PROFILER.stage(name, group):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_profile_arguments(parser):
+    """Adds --profile / --profile-sample / --profile-out to an argparse parser."""
+    parser.add_argument('--profile', action='store_true',
+                        help='Time each stage and write a profile report at exit')
+    parser.add_argument('--profile-sample', type=float, metavar='SECONDS', nargs='?', const=0.005,
+                        help='Also sample Python stacks every SECONDS (default 0.005) for a flamegraph')
+    parser.add_argument('--profile-out', type=str, default='profile',
+                        help='Report path prefix (default: ./profile -> profile.txt, profile.collapsed)')
+
+
+def enable_from_args(args):
+    """Turns the profiler on if args carry --profile or --profile-sample."""
+    if getattr(args, 'profile', False) or getattr(args, 'profile_sample', None):
+        PROFILER.enable(prefix=args.profile_out, sample_interval=getattr(args, 'profile_sample', None))
@@ -0,0 +1,327 @@
+"""
+Durable crawl frontier shared by the scrapers.
+
+Every URL a scraper intends to fetch is a row in a `frontier` table, keyed by
+(site, url), with a state:
+
+    pending    waiting; eligible once next_eligible (unix time) has passed
+    in_flight  leased to a worker; reclaimed when lease_until passes
+    done       fetched and stored
+    failed     gave up (last_error says why)
+
+URLs that end up failed are copied to a `dead_letter` table with their
+outcome (see throttle/retry.py), status and last error. retry_failed() puts
+them back to pending.
+
+Workers lease URLs in batches, and acks/failures are buffered and committed
+in one transaction per batch. Pass `before_flush` (e.g. the page archive's
+flush) so results are durable before their URLs are marked done. A crash then
+loses at most work that is redone, never work that is skipped. On start,
+recover() returns a killed run's in-flight rows to pending, so a restart
+resumes at once without re-discovering anything. Rows lease in `priority`
+order (lower first), then in the order they were added.
+
+The table lives in its own file next to the pipeline's database
+(frontier_path()). The aiosqlite writers hold that database's write lock
+across awaits, and a lease() waiting on it would block the very event loop
+that has to commit.
+
+    frontier = Frontier(frontier_path(db_path), site="salafipublications", before_flush=archive.flush)
+    frontier.recover()
+    frontier.add(urls, meta=category_url)
+    for url, meta in frontier.lease(50):
+        ...
+        frontier.ack(url)            # or frontier.fail(url, "timeout", retry_in=60)
+    frontier.close()
+"""
+
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+STATES = (PENDING, IN_FLIGHT, DONE, FAILED)
+
+
+# Outcomes `retry-failed` requeues by default; 404s would mostly 404 again, and
+# URLs refused by robots.txt (outcome "robots") would be refused again
+DEFAULT_RETRY_OUTCOMES = ("transient", "blocked", "parse_failure")
+
+
+def frontier_path(db_path: str) -> str:
+    """data.db -> data.frontier.db"""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.frontier{ext or '.db'}"
+
+
+class Frontier:
+    def __init__(self, db_path: str, site: str, lease_seconds: float = 600.0,
+                 max_attempts: int = 5, batch_size: int = 50,
+                 before_flush: Optional[Callable[[], None]] = None):
+        """
+        lease_seconds: how long a leased URL stays with its worker before it is handed out again
+        max_attempts: leases per URL before fail(..., retry_in=...) gives up for good
+        batch_size: buffered acks/failures that trigger a flush
+        before_flush: called before acks are committed (flush the data they refer to)
+        """
+        self.db_path = db_path
+        self.site = site
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.before_flush = before_flush
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # WAL keeps commits safe against a killed process
+        self._acks: List[Tuple] = []
+        self._fails: List[Tuple] = []
+        self._init_db()
+
+    def _init_db(self):
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS frontier (
+                site TEXT NOT NULL,
+                url TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_eligible REAL NOT NULL DEFAULT 0,
+                lease_until REAL,
+                meta TEXT,
+                last_error TEXT,
+                updated_at REAL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (site, url)
+            )
+        ''')
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(frontier)")}
+        if "priority" not in columns:
+            # Frontier files written before priorities existed
+            self.conn.execute("ALTER TABLE frontier ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_frontier_ready ON frontier(site, state, next_eligible)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_frontier_order ON frontier(site, state, priority)")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS dead_letter (
+                site TEXT NOT NULL,
+                url TEXT NOT NULL,
+                outcome TEXT,
+                error TEXT,
+                attempts INTEGER,
+                failed_at REAL,
+                PRIMARY KEY (site, url)
+            )
+        ''')
+        self.conn.commit()
+
+    # ------------------------------------------------------------------
+    # Adding work
+    # ------------------------------------------------------------------
+
+    def add(self, urls: Iterable[str], meta: Optional[str] = None, done: bool = False,
+            requeue: bool = False, priority: int = 0) -> int:
+        """
+        Insert URLs not seen before; returns how many were new.
+        done: record them as already fetched (seeding from existing data)
+        requeue: also put known done/failed URLs back to pending (changed upstream)
+        priority: lease order, lower first
+        """
+        now = time.time()
+        state = DONE if done else PENDING
+        rows = [(self.site, url, state, meta, now, priority) for url in urls]
+        if not rows:
+            return 0
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany('''
+                INSERT OR IGNORE INTO frontier (site, url, state, meta, updated_at, priority)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            added = self.conn.total_changes - before
+            if requeue:
+                self.conn.executemany('''
+                    UPDATE frontier SET state = 'pending', attempts = 0, next_eligible = 0,
+                                        meta = COALESCE(?, meta), updated_at = ?
+                    WHERE site = ? AND url = ? AND state IN ('done', 'failed')
+                ''', [(meta, now, self.site, row[1]) for row in rows])
+        return added
+
+    def is_empty(self) -> bool:
+        """True until anything has been added for this site (used to seed once)."""
+        return self.conn.execute("SELECT 1 FROM frontier WHERE site = ? LIMIT 1", (self.site,)).fetchone() is None
+
+    def filter_done(self, urls: Iterable[str]) -> Set[str]:
+        """The subset of `urls` already done (meant for chunks of a few hundred)."""
+        urls = list(urls)
+        if not urls:
+            return set()
+        rows = self.conn.execute(f'''
+            SELECT url FROM frontier WHERE site = ? AND state = 'done' AND url IN ({', '.join('?' * len(urls))})
+        ''', [self.site] + urls)
+        return {url for url, in rows}
+
+    def recover(self) -> int:
+        """Return this site's in-flight rows (a killed run's leases) to pending; returns the count."""
+        with self.conn:
+            cursor = self.conn.execute('''
+                UPDATE frontier SET state = 'pending', lease_until = NULL, updated_at = ?
+                WHERE site = ? AND state = 'in_flight'
+            ''', (time.time(), self.site))
+        return cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Leasing
+    # ------------------------------------------------------------------
+
+    def lease(self, n: int) -> List[Tuple[str, Optional[str]]]:
+        """Up to n eligible (url, meta) pairs, by priority then oldest first, marked in flight."""
+        now = time.time()
+        with self.conn:
+            # Take the write lock first so two processes never lease the same rows
+            self.conn.execute("BEGIN IMMEDIATE")
+            rows = self.conn.execute('''
+                SELECT rowid, url, meta FROM frontier
+                WHERE site = ? AND ((state = 'pending' AND next_eligible <= ?)
+                                    OR (state = 'in_flight' AND lease_until < ?))
+                ORDER BY priority, rowid LIMIT ?
+            ''', (self.site, now, now, n)).fetchall()
+            if rows:
+                self.conn.executemany('''
+                    UPDATE frontier SET state = 'in_flight', attempts = attempts + 1,
+                                        lease_until = ?, updated_at = ?
+                    WHERE rowid = ?
+                ''', [(now + self.lease_seconds, now, rowid) for rowid, _, _ in rows])
+        return [(url, meta) for _, url, meta in rows]
+
+    def release(self, url: str):
+        """Hand a leased URL back untried (e.g. the worker was interrupted); the lease is not counted."""
+        with self.conn:
+            self.conn.execute('''
+                UPDATE frontier SET state = 'pending', attempts = MAX(attempts - 1, 0),
+                                    lease_until = NULL, updated_at = ?
+                WHERE site = ? AND url = ? AND state = 'in_flight'
+            ''', (time.time(), self.site, url))
+
+    def next_eligible_in(self) -> Optional[float]:
+        """Seconds until the next pending URL becomes eligible (0 if one is ready, None if none wait)."""
+        row = self.conn.execute('''
+            SELECT MIN(next_eligible) FROM frontier WHERE site = ? AND state = 'pending'
+        ''', (self.site,)).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    # ------------------------------------------------------------------
+    # Completing work (buffered)
+    # ------------------------------------------------------------------
+
+    def ack(self, url: str):
+        """Mark a leased URL done (committed with the next flush)."""
+        self._acks.append((time.time(), self.site, url))
+        self._maybe_flush()
+
+    def fail(self, url: str, error: str, retry_in: Optional[float] = None, outcome: Optional[str] = None):
+        """
+        Record a failed attempt. With retry_in the URL goes back to pending,
+        eligible again in retry_in seconds, until it has used max_attempts;
+        without it the URL is failed for good and dead-lettered under outcome.
+        """
+        self._fails.append((error[:500], retry_in, time.time(), self.site, url, outcome))
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self._acks) + len(self._fails) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._acks and not self._fails:
+            return
+        if self.before_flush is not None:
+            self.before_flush()
+        with self.conn:
+            if self._acks:
+                self.conn.executemany('''
+                    UPDATE frontier SET state = 'done', lease_until = NULL, last_error = NULL, updated_at = ?
+                    WHERE site = ? AND url = ?
+                ''', self._acks)
+                self.conn.executemany("DELETE FROM dead_letter WHERE site = ? AND url = ?",
+                                      [(site, url) for _, site, url in self._acks])
+            if self._fails:
+                self.conn.executemany('''
+                    UPDATE frontier SET
+                        state = CASE WHEN ?2 IS NOT NULL AND attempts < ?5 THEN 'pending' ELSE 'failed' END,
+                        next_eligible = ?3 + COALESCE(?2, 0),
+                        lease_until = NULL, last_error = ?1, updated_at = ?3
+                    WHERE site = ?4 AND url = ?6
+                ''', [(error, retry_in, now, site, self.max_attempts, url)
+                      for error, retry_in, now, site, url, _ in self._fails])
+                self.conn.executemany('''
+                    INSERT OR REPLACE INTO dead_letter (site, url, outcome, error, attempts, failed_at)
+                    SELECT site, url, ?, last_error, attempts, updated_at FROM frontier
+                    WHERE site = ? AND url = ? AND state = 'failed'
+                ''', [(outcome, site, url) for _, _, _, site, url, outcome in self._fails])
+        self._acks = []
+        self._fails = []
+
+    def retry_failed(self, outcomes: Optional[Iterable[str]] = None) -> int:
+        """
+        Put dead-lettered URLs (all, or only the given outcomes) back to
+        pending with fresh attempts, ahead of the rest of the backlog;
+        returns how many.
+        """
+        self.flush()
+        query = "SELECT url FROM dead_letter WHERE site = ?"
+        params: List = [self.site]
+        if outcomes:
+            outcomes = list(outcomes)
+            query += f" AND outcome IN ({', '.join('?' * len(outcomes))})"
+            params += outcomes
+        urls = [(self.site, url) for url, in self.conn.execute(query, params).fetchall()]
+        with self.conn:
+            # One below the lowest priority in use, so they lease before everything else
+            first = self.conn.execute("SELECT COALESCE(MIN(priority), 0) - 1 FROM frontier WHERE site = ?",
+                                      (self.site,)).fetchone()[0]
+            self.conn.executemany('''
+                UPDATE frontier SET state = 'pending', attempts = 0, next_eligible = 0, priority = ?,
+                                    updated_at = ?
+                WHERE site = ? AND url = ? AND state = 'failed'
+            ''', [(first, time.time(), site, url) for site, url in urls])
+            self.conn.executemany("DELETE FROM dead_letter WHERE site = ? AND url = ?", urls)
+        return len(urls)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(STATES, 0)
+        for state, count in self.conn.execute(
+                "SELECT state, COUNT(*) FROM frontier WHERE site = ? GROUP BY state", (self.site,)):
+            counts[state] = count
+        return counts
+
+    def dead_letters(self) -> Dict[str, int]:
+        """Dead-lettered URL counts by outcome."""
+        return dict(self.conn.execute(
+            "SELECT COALESCE(outcome, 'unknown'), COUNT(*) FROM dead_letter WHERE site = ? GROUP BY 1", (self.site,)))
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def retry_failed_command(db_path: str, site: str, args: List[str]):
+    """
+    `scraper.py retry-failed [OUTCOME ...|all]`: requeue dead-lettered URLs;
+    the next run fetches them first.
+    """
+    frontier = Frontier(frontier_path(db_path), site=site)
+    try:
+        before = frontier.dead_letters()
+        outcomes = None if args == ["all"] else (args or list(DEFAULT_RETRY_OUTCOMES))
+        requeued = frontier.retry_failed(outcomes)
+        print(f"🪦 Dead letters for {site}: " + (", ".join(f"{k} {v}" for k, v in sorted(before.items())) or "none"))
+        print(f"♻️  Requeued {requeued} URLs ({'all outcomes' if outcomes is None else ', '.join(outcomes)}); "
+              f"they are fetched first on the next run.")
+    finally:
+        frontier.close()
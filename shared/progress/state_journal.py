@@ -0,0 +1,163 @@
+"""
+Journal-based resume state used by earlier versions of the scrapers.
+
+Live resume state now lives in the crawl frontier (progress/frontier.py).
+vedkabhed only loads a StateJournal once, to import an old state.json /
+state.journal into its frontier; JsonlWriter is still its output writer.
+
+Progress is appended to a journal of small JSON events ("visited",
+"queued") instead of rewriting one big state file. Events are held in
+memory and only a checkpoint writes and fsyncs the ones since the last
+checkpoint, so nothing reaches the disk before the caller has made its
+output durable. Every `compact_every` events the journal is folded into a
+snapshot that is written to a temp file and swapped in with os.replace,
+then the journal is truncated. Replaying events is idempotent, so a crash
+at any point leaves either the old or the new snapshot plus a journal that
+still applies to it; a torn last line is ignored.
+
+JsonlWriter is the matching output side: one buffered append handle whose
+records are fsynced in batches. Sync it, then checkpoint the journal (or
+flush the frontier), so a URL is never marked done on disk while its
+record is still only in memory.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+
+def _fsync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class JsonlWriter:
+    def __init__(self, path, fsync_every: int = 20):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.pending = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.f = open(self.path, 'a', encoding='utf-8', buffering=1024 * 1024)
+
+    def write(self, record: Dict[str, Any]):
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.pending += 1
+        if self.pending >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        if self.pending:
+            _fsync(self.f)
+            self.pending = 0
+
+    def close(self):
+        if not self.f.closed:
+            self.sync()
+            self.f.close()
+
+
+class StateJournal:
+    def __init__(self, snapshot_path, journal_path=None, compact_every: int = 5000):
+        """
+        snapshot_path: compacted JSON state ({"visited": [...], "queued": {...}, "stats": {...}})
+        journal_path: event log, defaults to <snapshot>.journal
+        """
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = Path(journal_path) if journal_path else self.snapshot_path.with_suffix(".journal")
+        self.compact_every = compact_every
+        self.visited: Set[str] = set()
+        self.queued: Dict[str, Optional[str]] = {}  # url -> category, not yet visited
+        self.stats: Dict[str, Any] = {}
+        self.events_since_compact = 0
+        self.unwritten = []  # Journal lines waiting for the next checkpoint
+        self.f = None
+
+    def load(self):
+        """Reads snapshot + journal and opens the journal for appending."""
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.visited = set(data.get("visited", []))
+            self.queued = dict(data.get("queued", {}))
+            self.stats = data.get("stats", {})
+
+        if self.journal_path.exists():
+            valid_bytes = 0
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        break  # torn write at the tail of a crashed run
+                    self._apply(event)
+                    self.events_since_compact += 1
+                    valid_bytes += len(line)
+            # Cut the torn tail so new events do not get glued onto it
+            os.truncate(self.journal_path, valid_bytes)
+
+        return self.open()
+
+    def open(self):
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        self.f = open(self.journal_path, 'a', encoding='utf-8')
+        return self
+
+    def _apply(self, event: Dict[str, Any]):
+        url = event.get("url")
+        if event.get("e") == "visited":
+            self.visited.add(url)
+            self.queued.pop(url, None)
+        elif event.get("e") == "queued" and url not in self.visited:
+            self.queued[url] = event.get("category")
+
+    def _append(self, event: Dict[str, Any]):
+        self._apply(event)
+        self.unwritten.append(json.dumps(event, ensure_ascii=False) + "\n")
+        self.events_since_compact += 1
+
+    def mark_visited(self, url: str):
+        self._append({"e": "visited", "url": url})
+
+    def mark_queued(self, url: str, category: Optional[str] = None):
+        if url not in self.visited and url not in self.queued:
+            self._append({"e": "queued", "url": url, "category": category})
+
+    def checkpoint(self, stats: Optional[Dict[str, Any]] = None):
+        """
+        Makes every event so far durable; compacts once the journal is long
+        enough. Call it only after the records those events refer to are synced.
+        """
+        if stats is not None:
+            self.stats = dict(stats)
+        self.f.writelines(self.unwritten)
+        self.unwritten = []
+        _fsync(self.f)
+        if self.events_since_compact >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        tmp = self.snapshot_path.with_suffix(self.snapshot_path.suffix + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                "visited": sorted(self.visited),
+                "queued": self.queued,
+                "stats": self.stats
+            }, f)
+            _fsync(f)
+        os.replace(tmp, self.snapshot_path)
+        # Events are now in the snapshot; replaying them again would be harmless
+        self.unwritten = []
+        self.f.close()
+        self.f = open(self.journal_path, 'w', encoding='utf-8')
+        _fsync(self.f)
+        self.events_since_compact = 0
+
+    def close(self, stats: Optional[Dict[str, Any]] = None):
+        if self.f and not self.f.closed:
+            if stats is not None:
+                self.stats = dict(stats)
+            self.compact()
+            self.f.close()
@@ -0,0 +1,203 @@
+"""
+Resource governor for the asyncio scrapers.
+
+One background task samples CPU, this process's RSS and free disk every
+`interval` seconds and keeps exponentially smoothed values, so a single spike
+does not throttle anything. From the smoothed load it resizes a pool of worker
+permits: cut by a quarter while over a limit, grown by a step once there is
+headroom again. Workers hold a permit per item:
+
+    governor = ResourceGovernor(max_permits=24)
+    await governor.start()
+    ...
+    async with governor.permit():
+        await fetch_and_parse(url)
+    ...
+    await governor.stop()
+
+Under pressure fewer workers run instead of all of them sleeping and waking
+together, and no worker pays for psutil calls on its own hot path.
+"""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceGovernor:
+    def __init__(self, max_permits: int, min_permits: int = 1, interval: float = 1.0,
+                 cpu_limit: float = 90.0, rss_limit_mb: Optional[float] = None,
+                 min_free_disk_mb: float = 500.0, disk_path: str = '.',
+                 smoothing: float = 0.3, disk_every: int = 10):
+        """
+        max_permits: workers allowed with no pressure (the scraper's concurrency)
+        min_permits: floor kept under pressure so progress never stops
+        cpu_limit: system CPU percent
+        rss_limit_mb: this process's RSS; defaults to half of physical memory
+        min_free_disk_mb: free space wanted on disk_path's filesystem
+        smoothing: weight of the newest sample in the moving average
+        disk_every: sample disk usage every N ticks (it changes slowly)
+        """
+        self.max_permits = max(1, max_permits)
+        self.min_permits = max(1, min(min_permits, self.max_permits))
+        self.interval = interval
+        self.cpu_limit = cpu_limit
+        self.rss_limit_mb = rss_limit_mb or psutil.virtual_memory().total / (2 * 1024 * 1024)
+        self.min_free_disk_mb = min_free_disk_mb
+        self.disk_path = disk_path
+        self.smoothing = smoothing
+        self.disk_every = max(1, disk_every)
+        self.step = max(1, self.max_permits // 8)
+
+        self.permits = self.max_permits
+        self.in_use = 0
+        self.state: Dict[str, Any] = {
+            "cpu": 0.0, "rss_mb": 0.0, "disk_free_mb": None, "load": 0.0,
+            "permits": self.permits, "in_use": 0, "throttled": False,
+        }
+        self._process = psutil.Process(os.getpid())
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._ticks = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def start(self):
+        """Take a first sample and start the background sampler."""
+        psutil.cpu_percent(interval=None)  # Primes the counter; the first reading is meaningless
+        self.sample()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+        return False
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.sample()
+            except (psutil.Error, OSError) as e:
+                logger.debug(f"Resource sample failed: {e}")
+                continue
+            self._resize()
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+    def _smooth(self, key: str, value: float) -> float:
+        if self._ticks == 0:
+            return value
+        return self.smoothing * value + (1 - self.smoothing) * self.state[key]
+
+    def sample(self) -> Dict[str, Any]:
+        """Read the counters once and update the smoothed state."""
+        cpu = psutil.cpu_percent(interval=None)
+        rss_mb = self._process.memory_info().rss / (1024 * 1024)
+        if self._ticks % self.disk_every == 0:
+            self.state["disk_free_mb"] = psutil.disk_usage(self.disk_path).free / (1024 * 1024)
+
+        self.state["cpu"] = round(self._smooth("cpu", cpu), 1)
+        self.state["rss_mb"] = round(self._smooth("rss_mb", rss_mb), 1)
+        self._ticks += 1
+
+        # 1.0 means some resource sits exactly at its limit
+        disk_free = self.state["disk_free_mb"]
+        disk_load = self.min_free_disk_mb / disk_free if disk_free else float('inf')
+        self.state["load"] = round(max(self.state["cpu"] / self.cpu_limit,
+                                       self.state["rss_mb"] / self.rss_limit_mb,
+                                       disk_load), 3)
+        return self.state
+
+    def target_permits(self) -> int:
+        """Permits for the current load: multiplicative decrease, additive increase."""
+        load = self.state["load"]
+        if load > 1.0:
+            return max(self.min_permits, int(self.permits * 0.75))
+        if load < 0.85:
+            return min(self.max_permits, self.permits + self.step)
+        return self.permits
+
+    def _resize(self):
+        target = self.target_permits()
+        if target == self.permits:
+            return
+        if target < self.permits and not self.state["throttled"]:
+            logger.warning(f"⚠️ Resource pressure (CPU {self.state['cpu']}% | RSS {self.state['rss_mb']:.0f} MB"
+                           f" | load {self.state['load']}). Scaling workers down to {target}...")
+            self.state["throttled"] = True
+        elif target == self.max_permits and self.state["throttled"]:
+            logger.info(f"✅ Resources recovered. Back to {target} workers.")
+            self.state["throttled"] = False
+        # Shrinking never interrupts work in progress; fewer permits are handed out from now on
+        self.permits = target
+        self.state["permits"] = target
+        self._wake()
+
+    # ------------------------------------------------------------------
+    # Permits
+    # ------------------------------------------------------------------
+    def _wake(self):
+        """Hand free permits to waiters, oldest first."""
+        while self._waiters and self.in_use < self.permits:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_use += 1
+                waiter.set_result(None)
+        self.state["in_use"] = self.in_use
+
+    async def acquire(self):
+        if self.in_use < self.permits and not self._waiters:
+            self.in_use += 1
+            self.state["in_use"] = self.in_use
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # Granted just as we were cancelled
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self):
+        self.in_use -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def permit(self):
+        """async with governor.permit(): <one unit of work>"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> str:
+        disk = self.state["disk_free_mb"]
+        disk_text = f" | Disk free: {disk / 1024:.1f} GB" if disk is not None else ""
+        return (f"CPU: {self.state['cpu']}% | RSS: {self.state['rss_mb']:.0f} MB{disk_text}"
+                f" | Workers: {self.in_use}/{self.permits}")
@@ -2,33 +2,38 @@ import psutil
 import time
 import logging
 
+from .governor import ResourceGovernor
+
+
 class ResourceMonitor:
-    def __init__(self, check_interval=2.0, cpu_limit=90.0, ram_limit=90.0):
+    """
+    Synchronous view of ResourceGovernor's sampling for code without an event
+    loop. check() never sleeps; pacing work under pressure is the governor's
+    job (ResourceGovernor.permit()).
+
+    ram_limit keeps its old meaning, a percent of physical memory; it becomes
+    the governor's RSS limit unless rss_limit_mb is given.
+    """
+
+    def __init__(self, check_interval=2.0, cpu_limit=90.0, ram_limit=90.0, rss_limit_mb=None):
         self.check_interval = check_interval
         self.cpu_limit = cpu_limit
         self.ram_limit = ram_limit
+        if rss_limit_mb is None and ram_limit is not None:
+            rss_limit_mb = psutil.virtual_memory().total / (1024 * 1024) * ram_limit / 100
+        self.governor = ResourceGovernor(max_permits=1, interval=check_interval,
+                                         cpu_limit=cpu_limit, rss_limit_mb=rss_limit_mb)
         self.last_check = 0
-        self.paused = False
         self.logger = logging.getLogger(__name__)
 
     def check(self):
-        """Check system resources and pause if limits exceeded."""
+        """Refresh the smoothed state at most every check_interval seconds; returns it."""
         now = time.time()
-        if now - self.last_check < self.check_interval:
-            return
-
-        self.last_check = now
-        cpu = psutil.cpu_percent()
-        ram = psutil.virtual_memory().percent
-
-        if cpu > self.cpu_limit or ram > self.ram_limit:
-            if not self.paused:
-                self.logger.warning(f"⚠️ System Overload: CPU {cpu}% | RAM {ram}%. Throttling...")
-                self.paused = True
-            time.sleep(1) # active wait
-        elif self.paused:
-            self.logger.info("✅ System recovered. Resuming...")
-            self.paused = False
+        if now - self.last_check >= self.check_interval:
+            self.last_check = now
+            self.governor.sample()
+        return self.governor.state
 
     def get_stats(self):
-        return f"CPU: {psutil.cpu_percent()}% | RAM: {psutil.virtual_memory().percent}%"
+        state = self.check()
+        return f"CPU: {state['cpu']}% | RSS: {state['rss_mb']:.0f} MB"
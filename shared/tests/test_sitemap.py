@@ -0,0 +1,99 @@
+"""
+Sitemap discovery when a child sitemap cannot be read.
+
+The cursor test drives the abdurrahman pipeline against a local server.
+"""
+
+import asyncio
+import http.server
+import importlib.util
+import os
+import sys
+import threading
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+pytest.importorskip("bs4")
+
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(SHARED_DIR)
+from discovery.sitemap import SitemapDiscovery, aiohttp_fetcher, load_last_run, WP_POSTS  # noqa: E402
+
+ABDURRAHMAN = os.path.join(SHARED_DIR, '..', 'pipelines', 'abdurrahman', 'scraper.py')
+
+
+def _urlset(base, slugs):
+    entries = "".join(f"<url><loc>{base}/{slug}/</loc><lastmod>2024-01-01</lastmod></url>" for slug in slugs)
+    return f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+
+class _Site(http.server.BaseHTTPRequestHandler):
+    broken = True
+
+    def do_GET(self):
+        base = f"http://{self.headers['Host']}"
+        status, body = 200, ""
+        if self.path == "/sitemap_index.xml":
+            body = ('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                    f"<sitemap><loc>{base}/post-sitemap1.xml</loc></sitemap>"
+                    f"<sitemap><loc>{base}/post-sitemap2.xml</loc></sitemap></sitemapindex>")
+        elif self.path == "/post-sitemap1.xml":
+            body = _urlset(base, ["first", "second"])
+        elif self.path == "/post-sitemap2.xml":
+            status, body = (500, "down") if self.broken else (200, _urlset(base, ["third"]))
+        elif self.path in ("/first/", "/second/", "/third/"):
+            body = "<html><body><article>text</article></body></html>"
+        else:
+            status, body = 404, "not found"
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    _Site.broken = True
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Site)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+async def _discover(base):
+    async with aiohttp.ClientSession() as session:
+        sitemap = SitemapDiscovery(base, aiohttp_fetcher(session), include=WP_POSTS)
+        urls = [url async for url, _ in sitemap.discover()]
+    return sitemap, urls
+
+
+def test_failed_child_sitemap_makes_discovery_incomplete(site):
+    sitemap, urls = asyncio.run(_discover(site))
+    assert urls == [f"{site}/first/", f"{site}/second/"]
+    assert sitemap.found and not sitemap.complete
+    assert sitemap.stats["failed"] == 1
+
+    _Site.broken = False
+    sitemap, urls = asyncio.run(_discover(site))
+    assert len(urls) == 3 and sitemap.complete
+
+
+def test_failed_child_sitemap_does_not_move_the_cursor(site, tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location("abdurrahman_scraper", ABDURRAHMAN)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "BASE_URL", site)
+    db_path = str(tmp_path / "data.db")
+
+    asyncio.run(module.AbdurRahmanScraper(db_path).run())
+    assert load_last_run(db_path, "abdurrahman") is None
+
+    _Site.broken = False
+    asyncio.run(module.AbdurRahmanScraper(db_path).run())
+    assert load_last_run(db_path, "abdurrahman") is not None
@@ -0,0 +1,63 @@
+"""
+Per-host politeness budget for the asyncio scrapers.
+
+Each host gets a request rate (requests/second) and a cap on requests in
+flight. Slots are handed out by reservation: every caller books the next free
+send time for its host before sleeping, so many concurrent tasks still leave
+the host evenly spaced instead of bursting when they wake up together.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class HostRateLimiter:
+    def __init__(self, rate: float = 2.0, max_concurrency: int = 4, host_rates: Optional[Dict[str, float]] = None):
+        """
+        rate: default requests/second per host
+        max_concurrency: max requests in flight per host
+        host_rates: per-host overrides of rate, keyed by netloc
+        """
+        self.rate = rate
+        self.max_concurrency = max_concurrency
+        self.host_rates = host_rates or {}
+        self._next_slot: Dict[str, float] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.requests: Dict[str, int] = {}
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def _interval(self, host: str) -> float:
+        rate = self.host_rates.get(host, self.rate)
+        return 1.0 / rate if rate > 0 else 0.0
+
+    async def wait_turn(self, host: str):
+        """Sleeps until this caller's reserved send time for host."""
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self._interval(host)
+        self.requests[host] = self.requests.get(host, 0) + 1
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def hold(self, url: str, seconds: float):
+        """Sends nothing to url's host for the next `seconds` (e.g. a Retry-After)."""
+        host = self.host_of(url)
+        until = time.monotonic() + seconds
+        self._next_slot[host] = max(self._next_slot.get(host, until), until)
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """async with limiter.slot(url): <one request to url's host>"""
+        host = self.host_of(url)
+        sem = self._semaphores.get(host)
+        if sem is None:
+            sem = self._semaphores[host] = asyncio.Semaphore(self.max_concurrency)
+        async with sem:
+            await self.wait_turn(host)
+            yield
@@ -0,0 +1,138 @@
+"""
+Retrying fetch for the aiohttp scrapers.
+
+fetch_with_retry() gets one URL and classifies the outcome instead of
+collapsing every problem into None:
+
+    ok             200, text returned
+    not_found      404/410 and other permanent 4xx; retrying will not help
+    transient      timeouts, connection errors, 408/429/5xx; retried here with
+                   exponential backoff and full jitter, honouring Retry-After
+    blocked        401/403; not retried (hammering makes a block worse)
+    parse_failure  the page arrived but the scraper could not read it (set by
+                   the caller, not here)
+
+Waits longer than max_delay are not slept in-process. The result comes back
+transient with `retry_in` set, so the caller can hand the URL to the frontier
+for later (Frontier.fail(url, ..., retry_in=result.retry_in)). With a
+HostRateLimiter the request runs inside the host's slot, and a Retry-After
+pauses the whole host (up to max_delay) instead of only the one request.
+
+    result = await fetch_with_retry(session, url, limiter=self.limiter)
+    if result.ok:
+        ...
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, NamedTuple, Optional
+
+import aiohttp
+
+OK = "ok"
+NOT_FOUND = "not_found"
+TRANSIENT = "transient"
+BLOCKED = "blocked"
+PARSE_FAILURE = "parse_failure"
+OUTCOMES = (OK, NOT_FOUND, TRANSIENT, BLOCKED, PARSE_FAILURE)
+
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504, 520, 521, 522, 523, 524}
+BLOCKED_STATUSES = {401, 403, 451}
+
+
+class FetchResult(NamedTuple):
+    url: str
+    outcome: str
+    status: Optional[int] = None
+    text: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 1
+    retry_in: Optional[float] = None  # For transient results: when a later try makes sense
+
+    @property
+    def ok(self) -> bool:
+        return self.outcome == OK
+
+    def describe(self) -> str:
+        """Short reason for logs and the dead-letter table."""
+        if self.error:
+            return self.error
+        return f"HTTP {self.status}" if self.status is not None else self.outcome
+
+
+def classify_status(status: int) -> str:
+    if 200 <= status < 300:
+        return OK
+    if status in RETRY_STATUSES or status >= 500:
+        return TRANSIENT
+    if status in BLOCKED_STATUSES:
+        return BLOCKED
+    return NOT_FOUND
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds from now (delta-seconds or HTTP-date); None if absent or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff for the given 1-based attempt."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+async def fetch_with_retry(session: aiohttp.ClientSession, url: str, attempts: int = 3,
+                           base_delay: float = 1.0, max_delay: float = 30.0, timeout: float = 30,
+                           limiter=None, headers: Optional[Mapping[str, str]] = None) -> FetchResult:
+    """
+    attempts: requests made before a transient failure is returned
+    base_delay / max_delay: backoff scale and the longest wait slept in-process
+    limiter: optional HostRateLimiter; each attempt takes a slot for url's host
+    """
+    result = None
+    for attempt in range(1, attempts + 1):
+        retry_after = None
+        try:
+            if limiter is not None:
+                async with limiter.slot(url):
+                    result, retry_after = await _get(session, url, timeout, headers, attempt)
+            else:
+                result, retry_after = await _get(session, url, timeout, headers, attempt)
+        except aiohttp.InvalidURL as e:
+            return FetchResult(url, NOT_FOUND, error=_describe(e), attempts=attempt)
+        except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError) as e:
+            result = FetchResult(url, TRANSIENT, error=_describe(e), attempts=attempt)
+
+        if result.outcome != TRANSIENT:
+            return result
+
+        delay = retry_after if retry_after is not None else backoff_delay(attempt, base_delay, max_delay)
+        if retry_after is not None and limiter is not None:
+            # The host pauses for at most max_delay; the URL itself waits the full Retry-After
+            limiter.hold(url, min(retry_after, max_delay))
+        if attempt == attempts or delay > max_delay:
+            return result._replace(retry_in=max(delay, base_delay * 2 ** attempt))
+        await asyncio.sleep(delay)
+    return result
+
+
+def _describe(e: BaseException) -> str:
+    return f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+
+
+async def _get(session, url, timeout, headers, attempt):
+    async with session.get(url, timeout=timeout, headers=headers) as response:
+        outcome = classify_status(response.status)
+        if outcome == OK:
+            return FetchResult(url, OK, response.status, await response.text(), attempts=attempt), None
+        return (FetchResult(url, outcome, response.status, attempts=attempt),
+                parse_retry_after(response.headers.get('Retry-After')))